@@ -0,0 +1,148 @@
+"""
+브라우저 수집 입장 제어 모듈
+- 프로세스 전역으로 동시 실행 브라우저 수 제한 (모든 Streamlit 세션 공유)
+- 초과 요청은 상한이 있는 FIFO 대기열에서 차례를 기다리며 대기 순번을 콜백으로 알림
+- 예상 대기 시간(최근 처리 시간 이동평균 기반)이 기한을 넘으면 대기열에 넣지 않고 바로 거절
+  → 부하가 몰려도 OOM 대신 "혼잡" 응답으로 처리량이 완만하게 떨어짐
+"""
+import os
+import math
+import time
+import itertools
+import threading
+from contextlib import contextmanager
+
+DEFAULT_MAX_CONCURRENT = int(os.environ.get('AD_REPORT_MAX_BROWSERS', '1'))
+DEFAULT_MAX_QUEUE = int(os.environ.get('AD_REPORT_ADMISSION_QUEUE', '8'))
+DEFAULT_MAX_WAIT = float(os.environ.get('AD_REPORT_ADMISSION_MAX_WAIT', '120'))    # 초
+INITIAL_SERVICE_SECONDS = 20.0      # 처리 기록이 없을 때의 1건 처리 시간 추정치
+SERVICE_EWMA_ALPHA = 0.3
+POSITION_POLL_INTERVAL = 0.5
+
+
+class AdmissionRejected(RuntimeError):
+    """대기열이 가득 찼거나 예상 대기 시간이 기한을 넘어 수집을 시작하지 않음"""
+
+    def __init__(self, message: str, position: int = None, estimated_wait: float = None):
+        super().__init__(message)
+        self.position = position
+        self.estimated_wait = estimated_wait
+
+
+class AdmissionController:
+    """
+    동시 실행 상한 + FIFO 대기열
+    - with controller.slot(on_update): ... 블록 안에서 브라우저 사용
+    - on_update(dict): 대기 순번이 바뀔 때마다 {'position', 'estimated_wait_s'}로 호출
+    """
+
+    def __init__(self, max_concurrent: int = DEFAULT_MAX_CONCURRENT, max_queue: int = DEFAULT_MAX_QUEUE,
+                 max_wait: float = DEFAULT_MAX_WAIT):
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self._cond = threading.Condition()
+        self._tickets = itertools.count()
+        self._waiting = []              # 대기 중인 티켓 (FIFO)
+        self._active = 0
+        self._service_ewma = INITIAL_SERVICE_SECONDS
+        self._stats = {'admitted': 0, 'queued': 0, 'rejected_full': 0, 'rejected_deadline': 0,
+                       'timed_out': 0, 'max_waited_ms': 0}
+
+    def estimate_wait(self, position: int) -> float:
+        """대기 순번 position(1부터)의 예상 대기 시간 (초)"""
+        return math.ceil(position / self.max_concurrent) * self._service_ewma
+
+    def _reject(self, key: str, message: str, position: int, estimate: float):
+        self._stats[key] += 1
+        raise AdmissionRejected(message, position, estimate)
+
+    @contextmanager
+    def slot(self, on_update=None):
+        started = time.monotonic()
+        with self._cond:
+            ticket = next(self._tickets)
+            if self._active < self.max_concurrent and not self._waiting:
+                self._active += 1
+            else:
+                position = len(self._waiting) + 1
+                estimate = self.estimate_wait(position)
+                if len(self._waiting) >= self.max_queue:
+                    self._reject('rejected_full', f'수집 대기열이 가득 찼습니다 ({self.max_queue}건 대기 중)',
+                                 position, estimate)
+                if estimate > self.max_wait:
+                    self._reject('rejected_deadline',
+                                 f'예상 대기 시간 {estimate:.0f}초가 한도({self.max_wait:.0f}초)를 넘습니다',
+                                 position, estimate)
+                self._waiting.append(ticket)
+                self._stats['queued'] += 1
+                self._wait_turn(ticket, started, on_update)
+            self._stats['admitted'] += 1
+            waited_ms = int((time.monotonic() - started) * 1000)
+            self._stats['max_waited_ms'] = max(self._stats['max_waited_ms'], waited_ms)
+
+        admitted_at = time.monotonic()
+        try:
+            yield {'waited_ms': waited_ms}
+        finally:
+            with self._cond:
+                self._active -= 1
+                elapsed = time.monotonic() - admitted_at
+                self._service_ewma += SERVICE_EWMA_ALPHA * (elapsed - self._service_ewma)
+                self._cond.notify_all()
+
+    def _wait_turn(self, ticket: int, started: float, on_update):
+        """차례가 올 때까지 대기 (self._cond 보유 상태에서 호출, on_update는 lock 밖에서 호출)"""
+        last_position = None
+        while True:
+            position = self._waiting.index(ticket) + 1
+            if position == 1 and self._active < self.max_concurrent:
+                self._waiting.pop(0)
+                self._active += 1
+                self._cond.notify_all()
+                return
+            if position != last_position:
+                last_position = position
+                if on_update is not None:
+                    # 갱신 내용은 lock 안에서 계산하고 콜백은 lock을 놓은 뒤 호출
+                    # (콜백이 느리거나 다른 lock을 잡아도 입장·반환이 막히지 않음), 다시 잡은 뒤 상태 재확인
+                    update = {'position': position, 'estimated_wait_s': round(self.estimate_wait(position), 1)}
+                    self._cond.release()
+                    try:
+                        on_update(update)
+                    except Exception:
+                        pass
+                    finally:
+                        self._cond.acquire()
+                    continue
+            if time.monotonic() - started > self.max_wait:
+                self._waiting.remove(ticket)
+                self._cond.notify_all()
+                self._reject('timed_out', f'대기 시간 한도({self.max_wait:.0f}초) 초과', position,
+                             self.estimate_wait(position))
+            self._cond.wait(POSITION_POLL_INTERVAL)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return dict(self._stats, active=self._active, waiting=len(self._waiting),
+                        max_concurrent=self.max_concurrent, service_estimate_s=round(self._service_ewma, 1))
+
+
+_controller = None
+_controller_lock = threading.Lock()
+
+
+def get_admission_controller() -> AdmissionController:
+    """프로세스 전역 입장 제어기"""
+    global _controller
+    with _controller_lock:
+        if _controller is None:
+            _controller = AdmissionController()
+        return _controller
+
+
+def set_admission_controller(controller):
+    """프로세스 전역 입장 제어기 교체 (수집 워커 프로세스: 서버 제어기에 입장을 요청하는 대리 객체)"""
+    global _controller
+    with _controller_lock:
+        _controller = controller
@@ -7,6 +7,7 @@ import subprocess
 import sys
 import os
 import gc
+import time
 import tempfile
 from datetime import datetime, date
 
@@ -136,6 +137,43 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# ── 관리자 페이지 (AD_REPORT_ADMIN_TOKEN이 설정된 경우에만 ?admin=<토큰>) ──
+def render_admin_page():
+    """단계별 소요 시간 p50/p95/p99 + 수집 큐·입장 제어·워커 상태 (프로세스 전역 값)"""
+    from stage_timing import stage_percentiles
+    from capture_jobs import get_job_queue
+    from admission import get_admission_controller
+
+    st.markdown('<p class="main-header">🛠️ 운영 현황</p>', unsafe_allow_html=True)
+    st.caption(f'서버 프로세스 기준 · 단계별 최근 표본 · {datetime.now():%H:%M:%S} 갱신')
+
+    rows = [dict(stage=stage, **summary) for stage, summary in stage_percentiles().items()]
+    st.markdown('**단계별 소요 시간 (ms)**')
+    if rows:
+        st.dataframe(rows, use_container_width=True, hide_index=True)
+    else:
+        st.info('아직 기록된 수집·신고서 생성이 없습니다.')
+
+    col_jobs, col_admission = st.columns(2)
+    with col_jobs:
+        st.markdown('**수집 작업 큐**')
+        st.json(get_job_queue().stats())
+    with col_admission:
+        st.markdown('**브라우저 입장 제어**')
+        st.json(get_admission_controller().stats())
+    import capture_workers
+    if capture_workers._worker_pool is not None:     # 조회만으로 워커 풀을 만들지 않음
+        st.markdown('**수집 워커 프로세스**')
+        st.json(capture_workers._worker_pool.stats())
+    if st.button('🔄 새로고침'):
+        st.rerun()
+
+
+_admin_token = os.environ.get('AD_REPORT_ADMIN_TOKEN')
+if _admin_token and st.query_params.get('admin') == _admin_token:
+    render_admin_page()
+    st.stop()
+
 # ── 사이드바 ──
 with st.sidebar:
     st.markdown('### ⚖️ 뒷광고 신고 도우미')
@@ -184,6 +222,9 @@ with col_url:
 with col_btn:
     capture_btn = st.button('🔍 증거 수집', use_container_width=True)
 
+# 같은 URL은 일정 시간 동안 캐시된 수집 결과를 재사용 (브라우저·Gemini 호출 생략)
+force_refresh = st.checkbox('🔄 캐시 무시하고 새로 수집', value=False, key='force_refresh')
+
 # 증거 수집 상태 저장
 if 'evidence' not in st.session_state:
     st.session_state.evidence = None
@@ -214,6 +255,46 @@ if uploaded_screenshots:
         st.session_state.manual_screenshots.append(save_path)
     st.success(f'{len(uploaded_screenshots)}개 스크린샷이 첨부되었습니다.')
 
+def render_stage_event(status, event: dict):
+    """수집 단계 이벤트 1건을 상태 패널에 표시"""
+    stage = event['stage']
+    sec = f'{event.get("elapsed_ms", 0) / 1000:.1f}초'
+    if stage == 'queued':
+        status.write(f'⏳ 브라우저 대기 순번 {event["position"]} (예상 대기 약 {event["estimated_wait_s"]:.0f}초)')
+    elif stage == 'admitted':
+        status.write(f'▶️ 수집 시작 (대기 {event["waited_ms"] / 1000:.1f}초)')
+    elif stage == 'rejected':
+        status.write(f'🚫 {event["message"]}')
+    elif stage == 'profile_downgraded':
+        status.write('🧠 서버 메모리가 부족해 가벼운 수집 방식으로 전환했습니다')
+    elif stage == 'page_loaded':
+        note = ' (캐시)' if event.get('cache_hit') else ''
+        status.write(f'🌐 페이지 로드 완료{note} — {sec}')
+    elif stage == 'screenshot_ready':
+        status.write(f'📸 스크린샷 캡처 완료 — {sec}')
+    elif stage == 'text_verdict':
+        if event['has_ad_disclosure']:
+            where = '첫부분' if event['first_part'] else '본문 (첫부분 아님)'
+            status.write(f'📝 텍스트 광고 표시: ✅ {where} — {", ".join(event["keywords"])}')
+        else:
+            status.write('📝 텍스트 광고 표시: ❌ 없음')
+    elif stage == 'affiliate_indicators':
+        indicators = event['affiliate_indicators']
+        status.write(f'🔗 어필리에이트 지표: {"; ".join(indicators) if indicators else "없음"}')
+    elif stage == 'vision_verdict':
+        if event['skipped']:
+            status.write(f'🖼️ 이미지 분석 생략 — {(event.get("decision") or {}).get("detail", "")}')
+        elif event.get('error'):
+            status.write(f'🖼️ 이미지 분석: ⚠️ {event["error"]}')
+        else:
+            found = '✅ 발견' if event['image_has_disclosure'] else '❌ 미발견'
+            status.write(f'🖼️ 이미지/스티커 광고 표시: {found} — {sec}')
+
+
+# 수집은 프로세스 전역 작업 큐에서 실행 — 위젯 조작으로 스크립트가 재실행돼도 계속 진행
+if 'capture_job' not in st.session_state:
+    st.session_state.capture_job = None
+
 if capture_btn and target_url:
     if not _pw_ready:
         st.warning(
@@ -221,20 +302,45 @@ if capture_btn and target_url:
             "잠시 후 다시 시도하거나, 아래 **스크린샷 직접 업로드** 기능을 사용해 주세요."
         )
     else:
-        with st.spinner('증거를 수집하고 있습니다... (스크린샷 캡처 + 어필리에이트 지표 분석)'):
-            try:
-                from evidence_collector import capture_screenshot, analyze_violation
-                evidence_dir = os.path.join(tempfile.gettempdir(), 'ad_report_evidence')
-
-                evidence = capture_screenshot(target_url, evidence_dir)
-                analysis = analyze_violation(evidence)
-                st.session_state.evidence = evidence
-                st.session_state.analysis = analysis
-                gc.collect()
-            except Exception as e:
-                gc.collect()
-                st.error(f'증거 수집 중 오류가 발생했습니다: {str(e)}')
-                st.info("💡 스크린샷을 직접 촬영해 아래 업로드 기능을 사용할 수 있습니다.")
+        from capture_jobs import get_job_queue
+        evidence_dir = os.path.join(tempfile.gettempdir(), 'ad_report_evidence')
+        st.session_state.capture_job = get_job_queue().submit(
+            target_url, evidence_dir, force_refresh=force_refresh)
+
+if st.session_state.capture_job:
+    from capture_jobs import get_job_queue, QUEUED, RUNNING, DONE
+
+    job = get_job_queue().get(st.session_state.capture_job)
+    if job is None:
+        st.session_state.capture_job = None
+        st.warning('수집 작업 정보가 만료되었습니다. 다시 수집해 주세요.')
+    else:
+        if job['status'] == QUEUED:
+            label = f'대기 중입니다... (대기 순번 {job["queue_position"]})'
+        elif job['status'] == RUNNING:
+            label = '증거를 수집하고 있습니다... (스크린샷 캡처 + 어필리에이트 지표 분석)'
+        elif job['status'] == DONE:
+            label = '증거 수집 완료'
+        else:
+            label = '증거 수집 실패'
+        state = {DONE: 'complete'}.get(job['status'], 'running' if job['status'] in (QUEUED, RUNNING) else 'error')
+        with st.status(label, expanded=job['status'] != DONE, state=state) as status:
+            for event in job['events']:
+                render_stage_event(status, event)
+
+        if job['status'] in (QUEUED, RUNNING):
+            # 자동 새로고침으로 진행 상황 갱신
+            time.sleep(1)
+            st.rerun()
+
+        st.session_state.capture_job = None
+        if job['status'] == DONE:
+            st.session_state.evidence = job['evidence']
+            st.session_state.analysis = job['analysis']
+        else:
+            st.error(f'증거 수집 중 오류가 발생했습니다: {job["error"]}')
+            st.info("💡 스크린샷을 직접 촬영해 아래 업로드 기능을 사용할 수 있습니다.")
+        gc.collect()
 
 # 수집 결과 표시
 if st.session_state.evidence:
@@ -249,6 +355,8 @@ if st.session_state.evidence:
         st.markdown('**📋 수집 결과**')
         st.markdown(f'- **페이지 제목**: {ev.get("page_title", "N/A")}')
         st.markdown(f'- **캡처 시각**: {ev.get("captured_at", "N/A")}')
+        if ev.get('cache_hit'):
+            st.caption('♻️ 최근 수집된 결과를 재사용했습니다. 새로 수집하려면 "캐시 무시하고 새로 수집"을 선택하세요.')
         st.markdown(f'- **광고 표시 발견**: {"✅ 있음" if ev.get("has_ad_disclosure") else "❌ 없음"}')
 
         if ev.get('affiliate_indicators'):
@@ -271,6 +379,8 @@ if st.session_state.evidence:
                 st.markdown('❌ 이미지/스티커에서 광고 표시 미발견')
         elif img_analysis.get('error'):
             st.caption(f'⚠️ 이미지 분석: {img_analysis["error"]}')
+        elif ev.get('decision', {}).get('tier') == 'text':
+            st.caption(f'⚡ {ev["decision"]["detail"]}')
 
     with col_b:
         st.markdown('**🔎 위반 분석 결과**')
@@ -0,0 +1,95 @@
+"""
+벤치마크 공용 모듈 (capture_benchmark / report_benchmark)
+- 실행 환경 정보 (git 커밋, Python, 플랫폼, CPU 수)
+- 결과 JSON 저장
+- 기준 실행(baseline) JSON과 시나리오별 지표 비교 → 허용 비율을 넘게 나빠진 항목 표시
+"""
+import os
+import sys
+import json
+import platform
+import subprocess
+from datetime import datetime
+
+
+def run_info(options: dict = None) -> dict:
+    """결과 JSON의 meta 항목"""
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=5,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip() or None
+    except Exception:
+        commit = None
+    return {
+        'started_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'git_commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'options': options or {},
+    }
+
+
+def write_results(results: dict, path: str = None):
+    """path가 없거나 '-'이면 stdout"""
+    text = json.dumps(results, ensure_ascii=False, indent=2)
+    if not path or path == '-':
+        sys.stdout.write(text + '\n')
+        return
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text + '\n')
+
+
+def _lookup(data: dict, path: str):
+    for part in path.split('.'):
+        if not isinstance(data, dict) or part not in data:
+            return None
+        data = data[part]
+    return data if isinstance(data, (int, float)) and not isinstance(data, bool) else None
+
+
+def compare_to_baseline(results: dict, baseline: dict, metrics: dict, threshold: float = 0.2) -> list:
+    """
+    시나리오 이름이 같은 항목끼리 지표 비교
+    - metrics: {'latency_ms.p95': 'lower', 'throughput_per_s': 'higher', ...} (좋은 방향)
+    - 반환: [{'scenario', 'metric', 'baseline', 'current', 'change', 'regression'}]
+      change는 (현재 - 기준) / 기준, regression은 나쁜 방향으로 threshold 초과 여부
+    """
+    base_by_name = {s['name']: s for s in baseline.get('scenarios', [])}
+    rows = []
+    for scenario in results.get('scenarios', []):
+        base = base_by_name.get(scenario['name'])
+        if base is None:
+            continue
+        for metric, better in metrics.items():
+            current, previous = _lookup(scenario, metric), _lookup(base, metric)
+            if current is None or previous is None:
+                continue
+            change = (current - previous) / previous if previous else (0.0 if current == previous else None)
+            worse = change is not None and (change > threshold if better == 'lower' else change < -threshold)
+            rows.append({
+                'scenario': scenario['name'],
+                'metric': metric,
+                'baseline': previous,
+                'current': current,
+                'change': None if change is None else round(change, 3),
+                'regression': worse,
+            })
+    return rows
+
+
+def format_comparison(rows: list) -> str:
+    """compare_to_baseline 결과를 사람이 읽는 표로 (회귀 항목에 ▲ 표시)"""
+    lines = []
+    for row in rows:
+        change = '  n/a' if row['change'] is None else f'{row["change"] * 100:+6.1f}%'
+        mark = '▲' if row['regression'] else ' '
+        lines.append(f'{mark} {row["scenario"]:<32} {row["metric"]:<24} '
+                     f'{row["baseline"]:>12} → {row["current"]:>12}  {change}')
+    return '\n'.join(lines)
+
+
+def load_baseline(path: str) -> dict:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
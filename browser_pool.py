@@ -0,0 +1,192 @@
+"""
+브라우저 풀 모듈
+- 상시 대기(warm) Chromium 인스턴스 N개 유지
+- 작업마다 새 BrowserContext 발급 (쿠키·스토리지 격리)
+- 헬스 체크 / 크래시 자동 복구 / N페이지마다 재시작(recycle)
+
+Playwright sync API 객체는 생성한 스레드에서만 사용할 수 있으므로
+브라우저마다 전용 워커 스레드를 두고, 작업(callable)을 큐로 넘겨 실행한다.
+"""
+import os
+import queue
+import atexit
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Callable, Optional
+
+# Streamlit Cloud(메모리 약 1GB) 기준 기본값
+DEFAULT_POOL_SIZE = int(os.environ.get('AD_REPORT_BROWSER_POOL_SIZE', '1'))
+DEFAULT_MAX_PAGES = int(os.environ.get('AD_REPORT_BROWSER_MAX_PAGES', '30'))
+
+LAUNCH_ARGS = [
+    '--no-sandbox',
+    '--disable-dev-shm-usage',
+    '--disable-gpu',
+    '--single-process',
+    '--disable-extensions',
+    '--disable-background-networking',
+    '--disable-default-apps',
+]
+
+CONTEXT_OPTIONS = {
+    'viewport': {'width': 1280, 'height': 900},
+    'locale': 'ko-KR',
+    'user_agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
+    'java_script_enabled': True,
+}
+
+_STOP = object()
+
+
+class _PooledBrowser(threading.Thread):
+    """브라우저 1개를 소유하고 공유 큐에서 작업을 꺼내 실행하는 워커 스레드"""
+
+    def __init__(self, pool: 'BrowserPool', index: int):
+        super().__init__(name=f'browser-pool-{index}', daemon=True)
+        self.pool = pool
+        self._playwright = None
+        self._browser = None
+        self.pages_served = 0
+        self.launch_count = 0
+
+    # ── 브라우저 수명 관리 ─────────────────────────────────────
+    def _launch(self):
+        from playwright.sync_api import sync_playwright
+
+        if self._playwright is None:
+            self._playwright = sync_playwright().start()
+        self._browser = self._playwright.chromium.launch(headless=True, args=LAUNCH_ARGS)
+        self.pages_served = 0
+        self.launch_count += 1
+
+    def _close_browser(self):
+        if self._browser is not None:
+            try:
+                self._browser.close()
+            except Exception:
+                pass
+        self._browser = None
+
+    def _healthy(self) -> bool:
+        """브라우저 프로세스가 살아 있는지 확인"""
+        if self._browser is None:
+            return False
+        try:
+            return self._browser.is_connected()
+        except Exception:
+            return False
+
+    def _ensure_browser(self):
+        # 크래시(연결 끊김) 또는 재시작 주기 도달 시 새로 띄움
+        if self._healthy() and self.pages_served < self.pool.max_pages:
+            return
+        self._close_browser()
+        self._launch()
+
+    # ── 작업 루프 ──────────────────────────────────────────────
+    def run(self):
+        try:
+            self._launch()   # 미리 띄워 둠 (warm)
+        except Exception:
+            self._close_browser()   # 첫 작업 때 다시 시도
+
+        while True:
+            job = self.pool._jobs.get()
+            if job is _STOP:
+                break
+            fn, future = job
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(self._run_job(fn))
+            except BaseException as e:
+                future.set_exception(e)
+
+        self._close_browser()
+        if self._playwright is not None:
+            try:
+                self._playwright.stop()
+            except Exception:
+                pass
+            self._playwright = None
+
+    def _run_job(self, fn: Callable):
+        self._ensure_browser()
+        context = None
+        try:
+            context = self._browser.new_context(**CONTEXT_OPTIONS)
+            return fn(context)
+        except Exception:
+            # 작업 중 브라우저가 죽었으면 다음 작업 전에 재기동
+            if not self._healthy():
+                self._close_browser()
+            raise
+        finally:
+            self.pages_served += 1
+            if context is not None:
+                try:
+                    context.close()
+                except Exception:
+                    pass
+
+
+class BrowserPool:
+    """상시 대기 Chromium 풀"""
+
+    def __init__(self, size: int = DEFAULT_POOL_SIZE, max_pages: int = DEFAULT_MAX_PAGES):
+        self.size = max(1, size)
+        self.max_pages = max(1, max_pages)
+        self._jobs = queue.Queue()
+        self._workers = [_PooledBrowser(self, i) for i in range(self.size)]
+        for w in self._workers:
+            w.start()
+
+    def submit(self, fn: Callable) -> Future:
+        """fn(context)를 풀의 브라우저에서 실행하도록 예약"""
+        future = Future()
+        self._jobs.put((fn, future))
+        return future
+
+    def run(self, fn: Callable, timeout: Optional[float] = None):
+        """
+        fn(context)를 실행하고 결과를 반환 (예외는 그대로 전달)
+        - 시간 초과 시 아직 대기 중인 작업은 취소 (이미 실행 중이면 끝까지 진행됨)
+        """
+        future = self.submit(fn)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeout:
+            future.cancel()
+            raise
+
+    def stats(self) -> dict:
+        return {
+            'size': self.size,
+            'max_pages': self.max_pages,
+            'queued': self._jobs.qsize(),
+            'workers': [
+                {'pages_served': w.pages_served, 'launch_count': w.launch_count, 'alive': w.is_alive()}
+                for w in self._workers
+            ],
+        }
+
+    def shutdown(self, wait: bool = True):
+        for _ in self._workers:
+            self._jobs.put(_STOP)
+        if wait:
+            for w in self._workers:
+                w.join(timeout=10)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_browser_pool() -> BrowserPool:
+    """프로세스 전역 브라우저 풀 (최초 호출 시 생성)"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = BrowserPool()
+            atexit.register(_pool.shutdown, False)
+        return _pool
@@ -0,0 +1,582 @@
+"""
+증거 수집(capture_screenshot) 오프라인 벤치마크
+- 로컬 HTTP 서버가 고정 페이지(fixture)를 제공 — 실제 플랫폼 없이 반복 측정
+  · naver_iframe_blog: 네이버 PC 블로그처럼 본문이 mainFrame iframe 안에 있는 페이지 (+ 모바일 경량 페이지)
+  · spa_never_idle: 롱폴링·비콘·시계 갱신으로 networkidle에 도달하지 않는 SPA
+  · many_links: 링크 수백 개(제휴 링크 포함)와 긴 본문, 광고 표시는 본문 끝에만
+  · disclosure_images: 광고 표시가 이미지(배지)에만 있는 페이지 + 큰 사진
+  · --fixture-dir: 녹화해 둔 HTML 파일(*.html)을 recorded:<이름> 시나리오로 추가
+- 동시성(여러 값 지정 가능)별로 수집을 실행하고 지연 백분위·처리량·최고 RSS·전송 바이트·
+  단계별 소요 시간(stage_timing)을 JSON으로 출력, --baseline 결과와 비교해 회귀 표시
+- 지연·처리량은 성공한 수집만으로 계산, 오류가 하나라도 난 시나리오가 있으면 종료 코드 1
+- process 모드의 워커 프로세스에는 벤치마크 전용 네이버 추출기가 등록되지 않아
+  naver_iframe_blog는 일반 경로(mainFrame 추출 없음)로 수집됨
+
+사용 예:
+    python capture_benchmark.py --concurrency 1,4 --runs 8 --output bench.json
+    python capture_benchmark.py --mode process --vision stub --baseline bench.json --fail-on-regression
+"""
+import os
+import io
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import threading
+from collections import Counter
+from urllib.parse import urlparse, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FIXTURES = ('naver_iframe_blog', 'spa_never_idle', 'many_links', 'disclosure_images')
+
+# 네이버 fixture만 다른 호스트 이름으로 접속 → 벤치마크 전용 추출기가 이 호스트에 붙음
+NAVER_HOST = 'localhost'
+LONG_POLL_SECONDS = 20
+
+# 회귀 비교 지표 (좋은 방향)
+COMPARE_METRICS = {
+    'latency_ms.p50': 'lower',
+    'latency_ms.p95': 'lower',
+    'latency_ms.p99': 'lower',
+    'throughput_per_s': 'higher',
+    'peak_rss_mb': 'lower',
+    'bytes_per_capture': 'lower',
+}
+
+_PARAGRAPH = ('오늘은 요즘 자주 쓰는 제품을 소개해 보려고 해요. 한 달 정도 매일 사용해 보니 장단점이 분명했어요. '
+              '포장은 깔끔했고 배송도 빨랐습니다. 가격 대비 만족도는 높은 편이라고 생각합니다. ')
+
+
+# ── fixture 페이지 ──────────────────────────────────────────────
+def _paragraphs(count: int, seed: int) -> str:
+    rnd = random.Random(seed)
+    return '\n'.join(
+        f'<p>{_PARAGRAPH * rnd.randint(1, 3)}{i + 1}번째 이야기입니다.</p>' for i in range(count)
+    )
+
+
+def _naver_outer(query: str) -> str:
+    return f'''<!DOCTYPE html><html lang="ko"><head><meta charset="utf-8"><title>벤치 블로그 : 네이버 블로그</title>
+<meta name="description" content="벤치마크용 블로그 글"></head><body>
+<div id="header"><a href="/naver/">벤치 블로그</a> <a href="/naver/PostList?{query}">전체글</a></div>
+<iframe id="mainFrame" name="mainFrame" src="/naver/PostView?{query}" style="width:100%;height:3200px;border:0"></iframe>
+<script>document.title = document.title;</script>
+</body></html>'''
+
+
+def _naver_post_body() -> str:
+    images = '\n'.join(f'<img src="/assets/photo_{i}.jpg" width="860">' for i in range(4))
+    return f'''<div class="se-main-container">
+<div class="se-title-text">한 달 사용 후기 — 데일리 보습 크림</div>
+{_paragraphs(30, 1)}
+{images}
+<p>이 포스팅은 업체로부터 제품을 무상으로 제공받아 작성되었습니다.</p>
+</div>'''
+
+
+def _naver_post(mobile: bool) -> str:
+    viewport = '<meta name="viewport" content="width=device-width">' if mobile else ''
+    return f'''<!DOCTYPE html><html lang="ko"><head><meta charset="utf-8">{viewport}
+<title>한 달 사용 후기 — 데일리 보습 크림</title>
+<meta property="og:description" content="데일리 보습 크림 후기"></head><body>
+{_naver_post_body()}
+</body></html>'''
+
+
+_SPA_SHELL = '''<!DOCTYPE html><html lang="ko"><head><meta charset="utf-8"><title>벤치 SPA</title></head>
+<body><div id="app">로딩 중…</div><span id="clock"></span>
+<noscript>이 사이트를 이용하려면 JavaScript를 켜 주세요.</noscript>
+<script src="/spa/app.js"></script></body></html>'''
+
+_SPA_JS = '''
+(function () {
+  fetch('/spa/api/post').then(r => r.json()).then(post => {
+    const app = document.getElementById('app');
+    app.innerHTML = '<article><h1>' + post.title + '</h1>' + post.html + '</article>';
+  });
+  (function poll() { fetch('/spa/api/poll').then(poll, () => setTimeout(poll, 1000)); })();
+  setInterval(() => { fetch('/spa/api/beacon', {method: 'POST', body: String(Date.now())}); }, 2000);
+  setInterval(() => { document.getElementById('clock').textContent = new Date().toISOString(); }, 1000);
+})();
+'''
+
+
+def _spa_post() -> dict:
+    return {
+        'title': '#광고 신상 러닝화 첫 착용기',
+        'html': '<p>#광고 #협찬 브랜드로부터 제품을 제공받았습니다.</p>' + _paragraphs(20, 2),
+    }
+
+
+def _many_links_page(count: int = 600) -> str:
+    rnd = random.Random(3)
+    links = []
+    for i in range(count):
+        if rnd.random() < 0.15:
+            links.append(f'<li><a href="https://shop.example.com/item/{i}?ref=bench&utm_source=blog">구매하기 {i}</a></li>')
+        else:
+            links.append(f'<li><a href="/links/related/{i}">관련 글 {i}</a></li>')
+    return f'''<!DOCTYPE html><html lang="ko"><head><meta charset="utf-8"><title>링크 모음 리뷰</title>
+<meta name="description" content="링크가 아주 많은 긴 리뷰 페이지"></head><body>
+<article><h1>링크 모음 리뷰</h1>
+{_paragraphs(60, 4)}
+<ul>{''.join(links)}</ul>
+<p>본 글은 제휴 마케팅 활동의 일환으로 수수료를 제공받을 수 있으며 광고를 포함합니다.</p>
+</article></body></html>'''
+
+
+def _disclosure_images_page() -> str:
+    photos = '\n'.join(f'<img src="/assets/photo_{i}.jpg" width="1000">' for i in range(4))
+    return f'''<!DOCTYPE html><html lang="ko"><head><meta charset="utf-8"><title>주말 캠핑 장비 리뷰</title></head>
+<body><article><h1>주말 캠핑 장비 리뷰</h1>
+<img src="/assets/badge_0.png" width="320" alt="">
+{_paragraphs(12, 5)}
+<img src="/assets/badge_1.png" width="320" alt="">
+{photos}
+{_paragraphs(8, 6)}
+<img src="/assets/badge_2.png" width="320" alt="">
+</article></body></html>'''
+
+
+def _make_assets() -> dict:
+    """경로 → (content-type, bytes) — 사진(JPEG 노이즈)과 광고 배지(PNG)"""
+    from PIL import Image, ImageDraw
+
+    assets = {}
+    rnd = random.Random(7)
+    for i in range(4):
+        img = Image.effect_noise((1200, 800), 40 + i * 10).convert('RGB')
+        img = Image.blend(img, Image.new('RGB', img.size, (rnd.randint(0, 255), 120, 90)), 0.5)
+        buf = io.BytesIO()
+        img.save(buf, 'JPEG', quality=85)
+        assets[f'/assets/photo_{i}.jpg'] = ('image/jpeg', buf.getvalue())
+    for i, label in enumerate(('AD', 'SPONSORED', 'PAID PARTNERSHIP')):
+        img = Image.new('RGB', (640, 160), (220, 30, 40))
+        draw = ImageDraw.Draw(img)
+        draw.rectangle((8, 8, 631, 151), outline=(255, 255, 255), width=6)
+        draw.text((40, 60), label, fill=(255, 255, 255))
+        buf = io.BytesIO()
+        img.save(buf, 'PNG')
+        assets[f'/assets/badge_{i}.png'] = ('image/png', buf.getvalue())
+    return assets
+
+
+# ── fixture 서버 ────────────────────────────────────────────────
+class _CountingWriter:
+    """응답 바이트(헤더 포함)를 fixture별로 집계하는 wfile 래퍼"""
+
+    def __init__(self, raw, count):
+        self._raw = raw
+        self._count = count
+
+    def write(self, data):
+        self._count(len(data))
+        return self._raw.write(data)
+
+    def flush(self):
+        return self._raw.flush()
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+
+class FixtureServer:
+    """
+    벤치마크 fixture 서버 (백그라운드 스레드)
+    - url(fixture): 시나리오 시작 URL
+    - traffic(): fixture별 {'requests', 'bytes'} / reset_traffic()
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, fixture_dir: str = None):
+        self.host = host
+        self.fixture_dir = fixture_dir
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._traffic = {}
+        self._pages = {
+            '/links': _many_links_page(),
+            '/images': _disclosure_images_page(),
+            '/spa/': _SPA_SHELL,
+        }
+        self._naver_post = {False: _naver_post(False), True: _naver_post(True)}
+        self._spa_post = json.dumps(_spa_post(), ensure_ascii=False).encode('utf-8')
+        self._assets = _make_assets()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def recorded_fixtures(self) -> list:
+        if not self.fixture_dir:
+            return []
+        return sorted(f'recorded:{name[:-5]}' for name in os.listdir(self.fixture_dir) if name.endswith('.html'))
+
+    def url(self, fixture: str) -> str:
+        base = f'http://{self.host}:{self.port}'
+        if fixture == 'naver_iframe_blog':
+            return f'http://{NAVER_HOST}:{self.port}/naver/PostList?blogId=bench&logNo=1'
+        if fixture == 'spa_never_idle':
+            return base + '/spa/'
+        if fixture == 'many_links':
+            return base + '/links'
+        if fixture == 'disclosure_images':
+            return base + '/images'
+        if fixture.startswith('recorded:'):
+            return f'{base}/recorded/{fixture[len("recorded:"):]}.html'
+        raise ValueError(f'알 수 없는 fixture: {fixture}')
+
+    # ── 트래픽 집계 ─────────────────────────────────────────────
+    def _count(self, fixture: str, nbytes: int = 0, request: bool = False):
+        with self._lock:
+            entry = self._traffic.setdefault(fixture, {'requests': 0, 'bytes': 0})
+            entry['bytes'] += nbytes
+            entry['requests'] += int(request)
+
+    def traffic(self) -> dict:
+        with self._lock:
+            return {k: dict(v) for k, v in self._traffic.items()}
+
+    def reset_traffic(self):
+        with self._lock:
+            self._traffic.clear()
+
+    # ── 라우팅 ──────────────────────────────────────────────────
+    @staticmethod
+    def fixture_of(path: str, referer: str = '') -> str:
+        """요청 경로 → 트래픽 집계 단위 (공용 이미지는 Referer의 페이지 기준)"""
+        if path.startswith('/assets/') and referer:
+            return FixtureServer.fixture_of(urlparse(referer).path)
+        for prefix, name in (('/naver/', 'naver_iframe_blog'), ('/spa/', 'spa_never_idle'),
+                             ('/links', 'many_links'), ('/images', 'disclosure_images'),
+                             ('/recorded/', 'recorded')):
+            if path.startswith(prefix):
+                return name
+        return 'other'
+
+    def _route(self, method: str, path: str, query: str):
+        """(status, content-type, bytes) — 롱폴링은 응답 전까지 대기"""
+        html = 'text/html; charset=utf-8'
+        if path in ('/naver/PostList', '/naver/'):
+            return 200, html, _naver_outer(query or 'blogId=bench&logNo=1').encode('utf-8')
+        if path in ('/naver/PostView', '/naver/m/PostView'):
+            return 200, html, self._naver_post[path.startswith('/naver/m/')].encode('utf-8')
+        if path == '/spa/app.js':
+            return 200, 'application/javascript', _SPA_JS.encode('utf-8')
+        if path == '/spa/api/post':
+            return 200, 'application/json; charset=utf-8', self._spa_post
+        if path == '/spa/api/poll':
+            self._stop.wait(LONG_POLL_SECONDS)
+            return 200, 'application/json', b'{"events": []}'
+        if path == '/spa/api/beacon':
+            return 204, 'text/plain', b''
+        if path in self._pages:
+            return 200, html, self._pages[path].encode('utf-8')
+        if path.startswith('/links/related/'):
+            return 200, html, f'<html><body><p>관련 글 {path.rsplit("/", 1)[-1]}</p></body></html>'.encode('utf-8')
+        if path in self._assets:
+            ctype, body = self._assets[path]
+            return 200, ctype, body
+        if path.startswith('/recorded/') and self.fixture_dir:
+            return self._recorded(path[len('/recorded/'):])
+        return 404, 'text/plain', b'not found'
+
+    def _recorded(self, relpath: str):
+        root = os.path.realpath(self.fixture_dir)
+        full = os.path.realpath(os.path.join(root, relpath))
+        if not full.startswith(root + os.sep) or not os.path.isfile(full):
+            return 404, 'text/plain', b'not found'
+        import mimetypes
+        ctype = mimetypes.guess_type(full)[0] or 'application/octet-stream'
+        if ctype.startswith('text/'):
+            ctype += '; charset=utf-8'
+        with open(full, 'rb') as f:
+            return 200, ctype, f.read()
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self):
+                super().setup()
+                self._fixture = 'other'
+                self.wfile = _CountingWriter(self.wfile, lambda n: server._count(self._fixture, n))
+
+            def _handle(self, method: str):
+                length = int(self.headers.get('Content-Length') or 0)
+                if length:
+                    self.rfile.read(length)
+                parsed = urlparse(self.path)
+                self._fixture = server.fixture_of(parsed.path, self.headers.get('Referer', ''))
+                server._count(self._fixture, request=True)
+                status, ctype, body = server._route(method, parsed.path, parsed.query)
+                self.send_response(status)
+                self.send_header('Content-Type', ctype)
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('Cache-Control', 'no-store')
+                self.end_headers()
+                if method != 'HEAD':
+                    self.wfile.write(body)
+
+            def do_GET(self):
+                self._handle('GET')
+
+            def do_HEAD(self):
+                self._handle('HEAD')
+
+            def do_POST(self):
+                self._handle('POST')
+
+            def log_message(self, fmt, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> 'FixtureServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, name='bench-fixtures', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def _install_local_naver_extractor(port: int):
+    """NAVER_HOST를 네이버 블로그로 취급 (PC → 모바일 경량 URL 변환, mainFrame 본문 추출, 본문 셀렉터)"""
+    import evidence_collector
+    from site_extractors import NaverBlogExtractor, register_extractor
+
+    class LocalNaverBlogExtractor(NaverBlogExtractor):
+        domains = (NAVER_HOST,)
+
+        def light_url(self, url: str) -> str:
+            parsed = urlparse(url)
+            qs = parse_qs(parsed.query)
+            blog_id = (qs.get('blogId') or ['bench'])[0]
+            log_no = (qs.get('logNo') or ['1'])[0]
+            return f'http://{NAVER_HOST}:{port}/naver/m/PostView?blogId={blog_id}&logNo={log_no}'
+
+    register_extractor(LocalNaverBlogExtractor)
+    evidence_collector.READY_SELECTORS.setdefault(NAVER_HOST, evidence_collector.READY_SELECTORS['blog.naver.com'])
+
+
+# ── 실행 ────────────────────────────────────────────────────────
+def _configure_environment(args, max_concurrency: int):
+    """
+    수집 모듈을 import하기 전에 환경변수 설정 (모듈 상수가 import 시점에 정해짐)
+    - 입장 제어·브라우저 풀 크기를 측정 동시성에 맞춤, 대기열 거절 없음
+    - 이미지 분석 캐시는 끔 (같은 fixture를 반복하므로 캐시가 지연을 가림), --vision-cache로 켬
+    - 증거·이미지 분석 캐시 디렉터리는 임시 디렉터리로 — 서비스가 쓰는 /tmp 캐시에 결과를 남기지 않음
+    """
+    cache_root = tempfile.mkdtemp(prefix='capture-bench-cache-')
+    os.environ.setdefault('AD_REPORT_CACHE_DIR', os.path.join(cache_root, 'evidence'))
+    os.environ.setdefault('AD_REPORT_VISION_CACHE_DIR', os.path.join(cache_root, 'vision'))
+    os.environ.setdefault('AD_REPORT_MAX_BROWSERS', str(max_concurrency))
+    os.environ.setdefault('AD_REPORT_ADMISSION_QUEUE', str(max(8, args.runs * 2)))
+    os.environ.setdefault('AD_REPORT_ADMISSION_MAX_WAIT', '3600')
+    browsers = args.browsers or (1 if args.mode == 'process' else max_concurrency)
+    os.environ.setdefault('AD_REPORT_BROWSER_POOL_SIZE', str(browsers))
+    if not args.vision_cache:
+        os.environ.setdefault('AD_REPORT_VISION_CACHE_DISTANCE', '-1')
+    if args.vision == 'off':
+        os.environ.pop('GEMINI_API_KEY', None)
+        os.environ.pop('GOOGLE_API_KEY', None)
+    return browsers
+
+
+def _start_vision_stub(args):
+    from gemini_stub_server import GeminiStubServer
+
+    stub = GeminiStubServer(latency_ms=args.stub_latency_ms, jitter_ms=args.stub_latency_ms / 4, seed=1).start()
+    os.environ['GEMINI_API_BASE'] = stub.base_url
+    os.environ['GEMINI_API_KEY'] = 'bench'
+    os.environ.setdefault('AD_REPORT_GEMINI_RPM', '6000')
+    os.environ.setdefault('AD_REPORT_GEMINI_BURST', '50')
+    return stub
+
+
+def _run_calls(call, runs: int, concurrency: int) -> tuple:
+    """call()을 concurrency개 스레드로 runs번 → ([(latency_ms, result|None, error|None)], wall_s)"""
+    from concurrent.futures import ThreadPoolExecutor
+
+    def timed(_):
+        started = time.perf_counter()
+        try:
+            result, error = call(), None
+        except Exception as e:
+            result, error = None, str(e) or type(e).__name__
+        return (time.perf_counter() - started) * 1000, result, error
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        samples = list(pool.map(timed, range(runs)))
+    return samples, time.perf_counter() - started
+
+
+def _run_many(url: str, save_dir: str, runs: int, concurrency: int, browsers: int, profile: str) -> tuple:
+    """capture_many(async) — 지연은 각 결과의 timings.total_ms (세마포어 대기 포함)"""
+    import asyncio
+    from evidence_collector import capture_many
+
+    async def collect():
+        return [r async for r in capture_many([url] * runs, save_dir, concurrency=concurrency,
+                                              browsers=browsers, profile=profile)]
+
+    started = time.perf_counter()
+    results = asyncio.run(collect())
+    wall = time.perf_counter() - started
+    return [((r.get('timings') or {}).get('total_ms') or 0.0, r, None) for r in results], wall
+
+
+def run_scenario(server: FixtureServer, fixture: str, concurrency: int, args, browsers: int, save_dir: str) -> dict:
+    from evidence_collector import capture_screenshot
+    from memory_watchdog import StageWatch
+    from stage_timing import get_stage_histogram, summarize
+
+    url = server.url(fixture)
+    worker_pool = None
+    if args.mode == 'process':
+        from capture_workers import CaptureWorkerPool
+        worker_pool = CaptureWorkerPool(size=concurrency)
+        call = lambda: worker_pool.run(url, save_dir, profile=args.profile, force_refresh=True)
+    else:
+        call = lambda: capture_screenshot(url, save_dir, profile=args.profile, force_refresh=True)
+
+    try:
+        if args.warmup:
+            # 브라우저 기동·워커 프로세스 생성은 측정에서 제외
+            if args.mode == 'many':
+                _run_many(url, save_dir, args.warmup, concurrency, browsers, args.profile)
+            else:
+                _run_calls(call, max(args.warmup, concurrency), concurrency)
+        get_stage_histogram().reset()
+        server.reset_traffic()
+
+        with StageWatch('benchmark', soft_mb=10 ** 9, hard_mb=10 ** 9) as watch:
+            if args.mode == 'many':
+                samples, wall = _run_many(url, save_dir, args.runs, concurrency, browsers, args.profile)
+            else:
+                samples, wall = _run_calls(call, args.runs, concurrency)
+    finally:
+        if worker_pool is not None:
+            worker_pool.shutdown()
+            time.sleep(0.5)
+            worker_pool.kill_all()
+
+    # 지연·처리량은 성공한 수집만 — 바로 실패한 수집이 섞이면 지표가 좋아 보임
+    errors = [err or (res or {}).get('error') for _, res, err in samples]
+    ok_latencies = [latency for (latency, _, _), error in zip(samples, errors) if not error]
+    errors = [e for e in errors if e]
+    results = [res for _, res, _ in samples if res]
+    traffic = server.traffic()
+    fixture_key = 'recorded' if fixture.startswith('recorded:') else fixture
+    stages = {
+        stage.split('.', 1)[1]: {k: v for k, v in summary.items() if k not in ('window',)}
+        for stage, summary in get_stage_histogram().snapshot().items() if stage.startswith('capture.')
+    }
+    return {
+        'name': f'{fixture}@c{concurrency}',
+        'fixture': fixture,
+        'url': url,
+        'mode': args.mode,
+        'profile': args.profile,
+        'concurrency': concurrency,
+        'runs': len(samples),
+        'errors': len(errors),
+        'error_rate': round(len(errors) / len(samples), 3) if samples else None,
+        'error_samples': sorted(set(errors))[:3],
+        'failed': bool(errors),
+        'wall_s': round(wall, 3),
+        'throughput_per_s': round(len(ok_latencies) / wall, 3) if wall else None,
+        'latency_ms': summarize(ok_latencies),
+        'stages_ms': stages,
+        'peak_rss_mb': watch.peak_mb,
+        'bytes_transferred': traffic.get(fixture_key, {}).get('bytes', 0),
+        'bytes_per_capture': round(traffic.get(fixture_key, {}).get('bytes', 0) / max(1, len(samples))),
+        'requests': traffic.get(fixture_key, {}).get('requests', 0),
+        'other_bytes': sum(v['bytes'] for k, v in traffic.items() if k != fixture_key),
+        'capture_methods': dict(Counter(r.get('capture_method') or 'none' for r in results)),
+        'decision_tiers': dict(Counter((r.get('decision') or {}).get('tier') or 'none' for r in results)),
+        'downgraded': sum(1 for r in results if (r.get('memory') or {}).get('downgraded_from')),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='증거 수집 오프라인 벤치마크 (로컬 fixture 서버)')
+    parser.add_argument('--fixtures', default=','.join(FIXTURES), help=f'쉼표 구분 (기본: 전체 {",".join(FIXTURES)})')
+    parser.add_argument('--fixture-dir', help='녹화한 HTML 파일 디렉터리 (*.html → recorded:<이름> 시나리오)')
+    parser.add_argument('--concurrency', default='1,4', help='동시 수집 수, 쉼표로 여러 값 (예: 1,2,4)')
+    parser.add_argument('--runs', type=int, default=8, help='시나리오당 측정 수집 횟수')
+    parser.add_argument('--warmup', type=int, default=1, help='측정 전 예열 횟수 (0이면 생략)')
+    parser.add_argument('--mode', choices=('thread', 'process', 'many'), default='thread',
+                        help='thread: capture_screenshot 직접 / process: 격리 워커 풀 / many: capture_many(async)')
+    parser.add_argument('--profile', default='screenshot', help='수집 프로파일 (text_only/screenshot/full)')
+    parser.add_argument('--browsers', type=int, help='브라우저 수 (기본: thread·many는 최대 동시성, process는 워커당 1)')
+    parser.add_argument('--vision', choices=('off', 'stub'), default='off', help='stub: 로컬 Gemini 대역 서버 사용')
+    parser.add_argument('--stub-latency-ms', type=float, default=800)
+    parser.add_argument('--vision-cache', action='store_true', help='이미지 분석 캐시 사용 (기본: 끔)')
+    parser.add_argument('--save-dir', help='스크린샷·메타데이터 저장 위치 (기본: 임시 디렉터리)')
+    parser.add_argument('--output', '-o', help='결과 JSON 경로 (기본: stdout)')
+    parser.add_argument('--baseline', help='비교할 이전 결과 JSON')
+    parser.add_argument('--threshold', type=float, default=0.2, help='회귀로 볼 변화 비율 (기본 0.2 = 20%%)')
+    parser.add_argument('--fail-on-regression', action='store_true', help='회귀가 있으면 종료 코드 1 (오류가 난 시나리오는 항상 1)')
+    args = parser.parse_args()
+
+    concurrencies = sorted({max(1, int(c)) for c in args.concurrency.split(',') if c.strip()})
+    fixtures = [f.strip() for f in args.fixtures.split(',') if f.strip()]
+    unknown = [f for f in fixtures if f not in FIXTURES]
+    if unknown:
+        parser.error(f'알 수 없는 fixture: {", ".join(unknown)}')
+
+    browsers = _configure_environment(args, max(concurrencies))
+    stub = _start_vision_stub(args) if args.vision == 'stub' else None
+    server = FixtureServer(fixture_dir=args.fixture_dir).start()
+    fixtures += server.recorded_fixtures()
+    _install_local_naver_extractor(server.port)
+
+    from benchmark_common import run_info, write_results, compare_to_baseline, format_comparison, load_baseline
+
+    save_dir = args.save_dir or tempfile.mkdtemp(prefix='capture-bench-')
+    results = {'meta': run_info(dict(vars(args), browsers=browsers, save_dir=save_dir)), 'scenarios': []}
+    try:
+        for fixture in fixtures:
+            for concurrency in concurrencies:
+                scenario = run_scenario(server, fixture, concurrency, args, browsers, save_dir)
+                results['scenarios'].append(scenario)
+                print(f'{scenario["name"]:<32} p50 {scenario["latency_ms"].get("p50")}ms  '
+                      f'p95 {scenario["latency_ms"].get("p95")}ms  {scenario["throughput_per_s"]}/s  '
+                      f'RSS {scenario["peak_rss_mb"]}MB  {scenario["bytes_transferred"]}B  '
+                      f'오류 {scenario["errors"]}', file=sys.stderr)
+    finally:
+        server.stop()
+        if stub is not None:
+            results['meta']['vision_stub'] = stub.stats()
+            stub.stop()
+        import browser_pool
+        if browser_pool._pool is not None:
+            browser_pool._pool.shutdown(wait=True)
+
+    regressions = []
+    if args.baseline:
+        rows = compare_to_baseline(results, load_baseline(args.baseline), COMPARE_METRICS, args.threshold)
+        results['comparison'] = {'baseline': args.baseline, 'threshold': args.threshold, 'rows': rows}
+        regressions = [r for r in rows if r['regression']]
+        print(format_comparison(rows), file=sys.stderr)
+    failed = [s['name'] for s in results['scenarios'] if s['failed']]
+    if failed:
+        print(f'오류가 난 시나리오: {", ".join(failed)}', file=sys.stderr)
+    write_results(results, args.output)
+    if failed or (regressions and args.fail_on_regression):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,185 @@
+"""
+증거 수집 작업 큐 모듈
+- 프로세스 전역 큐 + 워커 스레드 풀: Streamlit 스크립트 재실행과 무관하게 수집 진행
+- 작업 id만 st.session_state에 보관하고 UI는 상태를 주기적으로 조회
+- 같은 URL·옵션의 작업이 대기/실행 중이면 새로 만들지 않고 기존 작업 id 반환 (세션 간 공유)
+- 단계 이벤트(evidence_collector on_stage)를 작업에 누적 → 재실행 후에도 진행 상황 표시
+- 끝난 작업은 JOB_TTL이 지나면 정리
+- 실제 수집은 기본적으로 격리된 워커 프로세스(capture_workers)에서 실행
+"""
+import os
+import time
+import uuid
+import queue
+import threading
+from typing import Optional
+
+DEFAULT_WORKERS = int(os.environ.get('AD_REPORT_CAPTURE_WORKERS', '2'))
+JOB_TTL = int(os.environ.get('AD_REPORT_JOB_TTL', '3600'))        # 끝난 작업 보관 시간 (초)
+MAX_FINISHED_JOBS = 200
+
+QUEUED, RUNNING, DONE, FAILED = 'queued', 'running', 'done', 'failed'
+
+
+class CaptureJob:
+    """수집 작업 1건 (상태는 CaptureJobQueue의 lock 안에서만 변경)"""
+
+    def __init__(self, url: str, save_dir: str, options: dict):
+        self.id = uuid.uuid4().hex[:12]
+        self.url = url
+        self.save_dir = save_dir
+        self.options = options
+        self.status = QUEUED
+        self.events = []
+        self.evidence = None
+        self.analysis = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def dedup_key(self) -> tuple:
+        return (self.url, self.save_dir, tuple(sorted(self.options.items())))
+
+    def snapshot(self, position: Optional[int] = None) -> dict:
+        return {
+            'id': self.id,
+            'url': self.url,
+            'status': self.status,
+            'queue_position': position,
+            'events': list(self.events),
+            'evidence': self.evidence,
+            'analysis': self.analysis,
+            'error': self.error,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+
+
+class CaptureJobQueue:
+    """
+    FIFO 작업 큐 + 워커 스레드
+    - submit(): 작업 id 반환 (즉시)
+    - get(): 상태 스냅샷 (events·결과 포함)
+    """
+
+    def __init__(self, workers: int = DEFAULT_WORKERS):
+        self._queue = queue.Queue()
+        self._jobs = {}
+        self._pending = []            # 대기 순서 (queue_position 계산용)
+        self._lock = threading.Lock()
+        self._closed = False
+        self._workers = [
+            threading.Thread(target=self._worker, name=f'capture-worker-{i}', daemon=True)
+            for i in range(max(1, workers))
+        ]
+        for t in self._workers:
+            t.start()
+
+    def submit(self, url: str, save_dir: str, **options) -> str:
+        """수집 작업 등록 (options: capture_screenshot 인자) → 작업 id"""
+        job = CaptureJob(url, save_dir, options)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError('작업 큐가 종료되었습니다')
+            self._prune()
+            # 같은 작업이 대기/실행 중이면 공유 (강제 재수집은 항상 새 작업)
+            if not options.get('force_refresh'):
+                for existing in self._jobs.values():
+                    if existing.status in (QUEUED, RUNNING) and existing.dedup_key == job.dedup_key:
+                        return existing.id
+            self._jobs[job.id] = job
+            self._pending.append(job.id)
+        self._queue.put(job.id)
+        return job.id
+
+    def get(self, job_id: str) -> Optional[dict]:
+        """작업 상태 스냅샷 (없거나 정리된 작업이면 None)"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            position = self._pending.index(job_id) + 1 if job.status == QUEUED else None
+            return job.snapshot(position)
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = {QUEUED: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+            for job in self._jobs.values():
+                counts[job.status] += 1
+            return dict(counts, workers=len(self._workers))
+
+    def shutdown(self):
+        """새 작업 거부 + 워커 종료 신호 (실행 중인 작업은 끝까지 진행)"""
+        with self._lock:
+            self._closed = True
+        for _ in self._workers:
+            self._queue.put(None)
+
+    def _prune(self):
+        """오래된 완료 작업 정리 (lock 안에서 호출)"""
+        now = time.time()
+        finished = sorted(
+            (j for j in self._jobs.values() if j.status in (DONE, FAILED)),
+            key=lambda j: j.finished_at,
+        )
+        expired = [j for j in finished if now - j.finished_at > JOB_TTL]
+        expired += finished[len(expired):max(len(expired), len(finished) - MAX_FINISHED_JOBS)]
+        for job in expired:
+            del self._jobs[job.id]
+
+    def _finish(self, job: CaptureJob, status: str):
+        """상태와 finished_at을 한 번에 기록 (lock 안에서 호출) — _prune이 finished_at 없는 완료 작업을 보지 않도록"""
+        job.status = status
+        job.finished_at = time.time()
+
+    def _on_stage(self, job: CaptureJob, event: dict):
+        with self._lock:
+            job.events.append(event)
+
+    def _worker(self):
+        from evidence_collector import capture_screenshot, analyze_violation
+        from capture_workers import CAPTURE_ISOLATION, get_capture_worker_pool
+
+        while True:
+            job_id = self._queue.get()
+            if job_id is None:
+                return
+            with self._lock:
+                job = self._jobs.get(job_id)
+                self._pending.remove(job_id)
+                if job is None:
+                    continue
+                job.status = RUNNING
+                job.started_at = time.time()
+            try:
+                on_stage = lambda e: self._on_stage(job, e)
+                if CAPTURE_ISOLATION == 'process':
+                    # 별도 워커 프로세스에서 수집 (메모리 폭주·멈춤이 서버에 번지지 않음)
+                    # 입장 제어는 워커가 브라우저 단계에서만 서버 전역 제어기에 요청 (캐시 적중·정적 수집은 바로 진행)
+                    evidence = get_capture_worker_pool().run(job.url, job.save_dir, on_stage, **job.options)
+                else:
+                    evidence = capture_screenshot(job.url, job.save_dir, on_stage=on_stage, **job.options)
+                analysis = analyze_violation(evidence)
+                with self._lock:
+                    job.evidence, job.analysis = evidence, analysis
+                    self._finish(job, DONE)
+            except Exception as e:
+                with self._lock:
+                    job.error = str(e) or type(e).__name__
+                    self._finish(job, FAILED)
+
+
+_job_queue = None
+_job_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> CaptureJobQueue:
+    """프로세스 전역 수집 작업 큐 (모든 Streamlit 세션이 공유)"""
+    global _job_queue
+    with _job_queue_lock:
+        if _job_queue is None:
+            _job_queue = CaptureJobQueue()
+        return _job_queue
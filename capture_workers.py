@@ -0,0 +1,346 @@
+"""
+격리된 수집 워커 프로세스 모듈
+- capture_screenshot을 별도 프로세스(자체 브라우저 풀 포함)에서 실행 → 무거운 페이지가
+  Chromium 메모리를 폭발시켜도 워커 1개만 종료되고 Streamlit 서버는 유지
+- 감독 스레드가 워커마다 RSS 상한(프로세스 트리 합계)·작업별 강제 타임아웃 감시
+- N건 처리 후 워커 재시작(누수 정리), 결과·단계 이벤트는 Pipe(IPC)로 전달
+- 스크린샷·메타데이터는 공유 디렉터리에 저장되므로 경로만 전달
+- 브라우저 입장 제어는 서버 프로세스의 전역 제어기 사용 — 워커의 capture_screenshot이 브라우저
+  단계에 들어갈 때만 Pipe로 입장을 요청 (캐시 적중·정적 수집은 슬롯 없이 진행)
+"""
+import os
+import time
+import atexit
+import queue
+import signal
+import threading
+from contextlib import ExitStack, contextmanager
+from concurrent.futures import Future
+
+from memory_watchdog import process_tree_rss
+from stage_timing import get_stage_histogram
+
+DEFAULT_PROCESSES = int(os.environ.get('AD_REPORT_CAPTURE_PROCESSES', '1'))
+DEFAULT_MAX_JOBS = int(os.environ.get('AD_REPORT_WORKER_MAX_JOBS', '20'))          # 이 건수 후 재시작
+# memory_watchdog.HARD_LIMIT_MB(600)보다 높게 — 워커 안의 하드 한도 처리(브라우저 재시작)가 먼저 동작
+DEFAULT_RSS_LIMIT_MB = int(os.environ.get('AD_REPORT_WORKER_RSS_MB', '700'))
+DEFAULT_JOB_TIMEOUT = int(os.environ.get('AD_REPORT_WORKER_JOB_TIMEOUT', '150'))   # 수집 + 이미지 분석
+RSS_POLL_INTERVAL = 0.5
+
+# 'process': 워커 프로세스에서 수집 / 'thread': 서버 프로세스 안에서 수집 (예전 방식)
+CAPTURE_ISOLATION = os.environ.get('AD_REPORT_CAPTURE_ISOLATION', 'process')
+
+
+class WorkerCrashed(RuntimeError):
+    """워커 프로세스가 작업 도중 종료됨 (RSS 초과·타임아웃·크래시)"""
+
+
+# ── 워커 프로세스 본체 ──────────────────────────────────────────
+class _RemoteAdmission:
+    """워커 프로세스의 입장 제어기 대리 — 감독 스레드가 서버 전역 제어기의 슬롯을 대신 잡고 놓음"""
+
+    def __init__(self, conn, send):
+        self.conn = conn
+        self.send = send
+
+    @contextmanager
+    def slot(self, on_update=None):
+        from admission import AdmissionRejected
+
+        self.send(('acquire', None))
+        while True:
+            kind, payload = self.conn.recv()
+            if kind == 'admission_update':
+                if on_update is not None:
+                    try:
+                        on_update(payload)
+                    except Exception:
+                        pass
+            elif kind == 'admission_rejected':
+                raise AdmissionRejected(payload['message'], payload['position'], payload['estimated_wait'])
+            elif kind == 'admitted':
+                break
+        try:
+            yield payload
+        finally:
+            self.send(('release', None))
+
+
+def _worker_main(conn):
+    """워커 프로세스 루프 — ('job', url, save_dir, options)를 받아 결과를 되돌려 보냄"""
+    try:
+        os.setsid()     # 자체 프로세스 그룹 → 감독자가 Chromium까지 한 번에 종료
+    except OSError:
+        pass
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    from admission import set_admission_controller
+    from evidence_collector import capture_screenshot
+
+    send_lock = threading.Lock()
+
+    def send(msg):
+        with send_lock:
+            conn.send(msg)
+
+    set_admission_controller(_RemoteAdmission(conn, send))
+
+    while True:
+        try:
+            msg = conn.recv()
+        except EOFError:
+            break
+        if msg is None:
+            break
+        _, url, save_dir, options = msg
+        try:
+            result = capture_screenshot(url, save_dir, on_stage=lambda e: send(('event', e)), **options)
+            send(('result', result))
+        except Exception as e:
+            send(('error', str(e) or type(e).__name__))
+
+    import browser_pool
+    if browser_pool._pool is not None:
+        browser_pool._pool.shutdown(wait=True)
+
+
+class _WorkerSlot(threading.Thread):
+    """감독 스레드 1개 = 워커 프로세스 1개 (필요할 때 띄우고, 문제가 생기면 종료 후 재생성)"""
+
+    def __init__(self, pool: 'CaptureWorkerPool', index: int):
+        super().__init__(name=f'capture-supervisor-{index}', daemon=True)
+        self.pool = pool
+        self.proc = None
+        self.conn = None
+        self.jobs_done = 0
+
+    # ── 프로세스 관리 ───────────────────────────────────────────
+    def _spawn(self):
+        ctx = self.pool.ctx
+        self.conn, child_conn = ctx.Pipe()
+        self.proc = ctx.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self.proc.start()
+        child_conn.close()
+        self.jobs_done = 0
+        self.pool._count('spawned')
+
+    def _kill(self):
+        if self.proc is None:
+            return
+        try:
+            os.killpg(self.proc.pid, signal.SIGKILL)
+        except (OSError, AttributeError):
+            self.proc.kill()
+        self.proc.join(5)
+        self._discard()
+
+    def _retire(self):
+        """정상 종료 요청 (작업 N건 처리 후 재시작)"""
+        try:
+            self.conn.send(None)
+            self.proc.join(10)
+        except (OSError, EOFError):
+            pass
+        if self.proc.is_alive():
+            self._kill()
+        else:
+            self._discard()
+        self.pool._count('recycled')
+
+    def _discard(self):
+        try:
+            self.conn.close()
+        except OSError:
+            pass
+        self.proc, self.conn = None, None
+
+    # ── 작업 실행 ───────────────────────────────────────────────
+    def run(self):
+        while True:
+            item = self.pool._jobs.get()
+            if item is None:
+                if self.proc is not None:
+                    self._retire()
+                return
+            future, url, save_dir, options, on_stage = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                result = self._run_job(url, save_dir, options, on_stage)
+            except Exception as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+            if self.proc is not None and self.jobs_done >= self.pool.max_jobs:
+                self._retire()
+
+    def _admit(self, admission: ExitStack):
+        """워커의 입장 요청 → 서버 전역 제어기 슬롯을 잡고(admission에 보관) 결과 회신"""
+        from admission import AdmissionRejected, get_admission_controller
+
+        slot = get_admission_controller().slot(lambda update: self.conn.send(('admission_update', update)))
+        try:
+            admitted = admission.enter_context(slot)
+        except AdmissionRejected as e:
+            self.conn.send(('admission_rejected', {'message': str(e), 'position': e.position,
+                                                   'estimated_wait': e.estimated_wait}))
+            return
+        self.conn.send(('admitted', admitted))
+
+    def _run_job(self, url: str, save_dir: str, options: dict, on_stage) -> dict:
+        # 워커가 잡은 입장 슬롯은 작업이 어떻게 끝나든(종료·크래시 포함) 반납
+        with ExitStack() as admission:
+            return self._run_job_admitted(url, save_dir, options, on_stage, admission)
+
+    def _run_job_admitted(self, url: str, save_dir: str, options: dict, on_stage, admission: ExitStack) -> dict:
+        if self.proc is None or not self.proc.is_alive():
+            if self.proc is not None:
+                self._discard()
+            self._spawn()
+        self.conn.send(('job', url, save_dir, options))
+        self.jobs_done += 1
+
+        deadline = time.monotonic() + self.pool.job_timeout
+        next_rss_check = 0.0
+        peak_rss = 0
+        while True:
+            now = time.monotonic()
+            if now >= next_rss_check:
+                next_rss_check = now + RSS_POLL_INTERVAL
+                rss = process_tree_rss(self.proc.pid)
+                if rss is not None:
+                    peak_rss = max(peak_rss, rss)
+                    if rss > self.pool.rss_limit:
+                        self._kill()
+                        self.pool._count('rss_killed')
+                        self.pool._record_rss(peak_rss)
+                        raise WorkerCrashed(
+                            f'수집 워커 메모리 상한 초과 ({rss // 1048576}MB > {self.pool.rss_limit // 1048576}MB) — 워커 종료')
+
+            if now > deadline:
+                self._kill()
+                self.pool._count('timed_out')
+                raise WorkerCrashed(f'수집 시간 초과 ({self.pool.job_timeout}초) — 워커 종료')
+
+            try:
+                msg = self.conn.recv() if self.conn.poll(RSS_POLL_INTERVAL) else None
+            except (EOFError, OSError):
+                msg = None
+                self.proc.join(1)
+
+            if msg is not None:
+                kind, payload = msg
+                if kind == 'acquire':
+                    # 입장 대기 시간은 작업 제한 시간에서 제외
+                    started = time.monotonic()
+                    try:
+                        self._admit(admission)
+                    except (OSError, EOFError):
+                        pass
+                    deadline += time.monotonic() - started
+                    continue
+                if kind == 'release':
+                    admission.close()
+                    continue
+                if kind == 'event':
+                    if on_stage is not None:
+                        try:
+                            on_stage(payload)
+                        except Exception:
+                            pass
+                    continue
+                self.pool._record_rss(peak_rss)
+                if kind == 'result':
+                    payload['worker_peak_rss_mb'] = round(peak_rss / 1048576, 1)
+                    # 워커 프로세스의 히스토그램은 서버에서 보이지 않으므로 결과의 구간을 다시 반영
+                    if not payload.get('cache_hit'):
+                        get_stage_histogram().record_timings('capture', payload.get('timings'))
+                    return payload
+                raise RuntimeError(payload)
+
+            if not self.proc.is_alive():
+                code = self.proc.exitcode
+                self._discard()
+                self.pool._count('crashed')
+                raise WorkerCrashed(f'수집 워커가 비정상 종료됨 (exit code {code})')
+
+
+class CaptureWorkerPool:
+    """
+    감독되는 수집 워커 프로세스 풀
+    - submit(): Future (결과 dict = capture_screenshot 반환값)
+    - run(): 결과가 나올 때까지 대기
+    """
+
+    def __init__(self, size: int = DEFAULT_PROCESSES, max_jobs: int = DEFAULT_MAX_JOBS,
+                 rss_limit_mb: int = DEFAULT_RSS_LIMIT_MB, job_timeout: int = DEFAULT_JOB_TIMEOUT):
+        import multiprocessing
+
+        # spawn: 서버 프로세스의 스레드·브라우저 상태를 물려받지 않음
+        self.ctx = multiprocessing.get_context('spawn')
+        self.max_jobs = max(1, max_jobs)
+        self.rss_limit = rss_limit_mb * 1024 * 1024
+        self.job_timeout = job_timeout
+        self._jobs = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._stats = {'jobs': 0, 'spawned': 0, 'recycled': 0, 'crashed': 0,
+                       'timed_out': 0, 'rss_killed': 0, 'peak_rss_mb': 0.0}
+        self._closed = False
+        self._slots = [_WorkerSlot(self, i) for i in range(max(1, size))]
+        for slot in self._slots:
+            slot.start()
+
+    def submit(self, url: str, save_dir: str, on_stage=None, **options) -> Future:
+        """options: capture_screenshot 인자 (on_stage 이벤트는 감독 스레드에서 호출됨)"""
+        if self._closed:
+            raise RuntimeError('수집 워커 풀이 종료되었습니다')
+        future = Future()
+        self._count('jobs')
+        self._jobs.put((future, url, save_dir, options, on_stage))
+        return future
+
+    def run(self, url: str, save_dir: str, on_stage=None, **options) -> dict:
+        return self.submit(url, save_dir, on_stage, **options).result()
+
+    def _count(self, key: str):
+        with self._stats_lock:
+            self._stats[key] += 1
+
+    def _record_rss(self, rss: int):
+        with self._stats_lock:
+            self._stats['peak_rss_mb'] = max(self._stats['peak_rss_mb'], round(rss / 1048576, 1))
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return dict(self._stats, processes=len(self._slots), queued=self._jobs.qsize(),
+                        rss_limit_mb=self.rss_limit // 1048576)
+
+    def shutdown(self):
+        """새 작업 거부 + 워커 정상 종료 요청 (대기 중인 작업 처리 후)"""
+        self._closed = True
+        for _ in self._slots:
+            self._jobs.put(None)
+
+    def kill_all(self):
+        """서버 종료 시 워커 프로세스 그룹(Chromium 포함) 즉시 종료"""
+        self._closed = True
+        for slot in self._slots:
+            if slot.proc is not None:
+                try:
+                    os.killpg(slot.proc.pid, signal.SIGKILL)
+                except (OSError, AttributeError):
+                    pass
+
+
+_worker_pool = None
+_worker_pool_lock = threading.Lock()
+
+
+def get_capture_worker_pool() -> CaptureWorkerPool:
+    """프로세스 전역 수집 워커 풀"""
+    global _worker_pool
+    with _worker_pool_lock:
+        if _worker_pool is None:
+            _worker_pool = CaptureWorkerPool()
+            atexit.register(_worker_pool.kill_all)
+        return _worker_pool
@@ -0,0 +1,204 @@
+"""
+광고 표시 키워드 매칭 모듈
+- 수집기(evidence_collector)와 분석기(analyze_violation)가 공유하는 단일 키워드 표
+- Aho-Corasick 오토마톤으로 모든 키워드를 텍스트 1회 순회로 탐색
+- 발견 위치(offset)까지 반환하여 "첫부분 표시" 판단에 사용
+"""
+from collections import deque
+from typing import Dict, List
+
+# ── 정규 키워드 표 ──────────────────────────────────────────────
+# (키워드, 광고 표시로 인정, 첫부분 표시 판단에 사용)
+# 키워드 id = 이 목록의 인덱스 → 증거 기록에 저장되므로 순서를 바꾸지 말고 끝에 추가할 것
+DISCLOSURE_KEYWORDS = [
+    ('#광고', True, True),
+    ('#ad', True, True),
+    ('광고포함', True, False),
+    ('협찬', True, True),
+    ('유료광고', True, True),
+    ('경제적 대가', True, False),
+    ('소정의 원고료', True, False),
+    ('대가를 받', True, False),
+    ('협찬을 받', True, False),
+    ('#sponsored', True, False),
+    ('광고 포함', True, False),
+    ('파트너십', True, False),
+    ('제휴 링크', True, False),
+    # 네이버 블로그 / 크리에이터 어필리에이트 표시
+    ('수익이 발생', True, True),
+    ('수수료가 지급', True, True),
+    ('수수료를 지급', True, False),
+    ('크리에이터 활동을 통해', True, False),
+    ('링크가 포함', True, True),
+    ('대가성', True, True),
+    ('원고료를 받', True, False),
+    ('무상으로 제공', True, False),
+    ('제품을 제공', True, False),
+    ('서비스를 제공받', True, False),
+    ('물품을 제공', True, False),
+    # 추가 일반 패턴
+    ('이 포스팅은 광고', True, False),
+    ('이 글은 광고', True, False),
+    ('광고입니다', True, True),
+    ('#유료', True, False),
+    ('paid partnership', True, False),
+    ('#partnership', True, False),
+    ('쿠팡 파트너스', True, False),
+    ('수익을 얻', True, False),
+    ('수익이 창출', True, False),
+    ('활동의 일환', True, False),
+    ('일정액의 수수료', True, True),
+    ('소정의 수수료', True, True),
+    # 첫부분 판단 전용 (단독으로는 광고 표시로 보지 않음)
+    ('크리에이터 활동', False, True),
+]
+
+
+def _fold(text: str) -> str:
+    """소문자 변환 — 길이가 바뀌는 문자(예: 'İ')가 있으면 문자 단위로 처리해 offset 유지"""
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    return ''.join(c.lower() if len(c.lower()) == 1 else c for c in text)
+
+
+class DisclosureMatcher:
+    """Aho-Corasick 다중 패턴 매처 (대소문자 무시)"""
+
+    def __init__(self, table: list):
+        self.table = table
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+        for kw_id, (keyword, _, _) in enumerate(table):
+            self._insert(_fold(keyword), kw_id)
+        self._build_failure_links()
+
+    def _insert(self, keyword: str, kw_id: int):
+        node = 0
+        for ch in keyword:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append(kw_id)
+
+    def _build_failure_links(self):
+        q = deque(self._goto[0].values())
+        while q:
+            node = q.popleft()
+            for ch, nxt in self._goto[node].items():
+                q.append(nxt)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find_all(self, text: str) -> List[dict]:
+        """모든 키워드 발견 위치를 offset 순으로 반환"""
+        hits = []
+        if not text:
+            return hits
+        goto, fail, out, table = self._goto, self._fail, self._out, self.table
+        node = 0
+        for i, ch in enumerate(_fold(text)):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for kw_id in out[node]:
+                keyword, disclosure, prominent = table[kw_id]
+                start = i - len(keyword) + 1
+                hits.append({
+                    'kw': kw_id,
+                    'keyword': keyword,
+                    'offset': start,
+                    'end': i + 1,
+                    'disclosure': disclosure,
+                    'prominent': prominent,
+                })
+        hits.sort(key=lambda h: (h['offset'], h['kw']))
+        return hits
+
+
+MATCHER = DisclosureMatcher(DISCLOSURE_KEYWORDS)
+
+
+def find_disclosures(text: str) -> List[dict]:
+    """텍스트 내 모든 키워드 발견 목록 (disclosure=False 항목 포함)"""
+    return MATCHER.find_all(text)
+
+
+def has_disclosure(text: str) -> bool:
+    """광고 표시 키워드가 하나라도 있는지"""
+    return any(h['disclosure'] for h in MATCHER.find_all(text))
+
+
+def has_prominent_disclosure(hits: List[dict], within: int) -> bool:
+    """첫 within 글자 안에 완전히 들어가는 첫부분용 키워드가 있는지"""
+    return any(h['prominent'] and h['end'] <= within for h in hits)
+
+
+# ── 증거 기록용 발견 인덱스 ─────────────────────────────────────
+# 항목: {'kw': 키워드 id, 'offset': 글자 위치, 'source': 'text'|'meta'|'image', 'region': DOM 영역 또는 None}
+def build_hit_index(hits: List[dict], source: str, regions: List[dict] = None) -> List[dict]:
+    """find_disclosures 결과를 증거에 저장할 간결한 인덱스로 변환"""
+    index = []
+    for h in hits:
+        index.append({
+            'kw': h['kw'],
+            'offset': h['offset'],
+            'source': source,
+            'region': _region_of(h['offset'], regions) if regions else None,
+        })
+    return index
+
+
+def _region_of(offset: int, regions: List[dict]):
+    """offset을 포함하는 가장 좁은 DOM 영역 이름"""
+    best = None
+    for r in regions:
+        if r['start'] <= offset < r['end'] and (best is None or r['end'] - r['start'] < best['end'] - best['start']):
+            best = r
+    return best['name'] if best else None
+
+
+def index_has_disclosure(index: List[dict], source: str = 'text') -> bool:
+    return any(
+        h['source'] == source and h.get('kw') is not None and DISCLOSURE_KEYWORDS[h['kw']][1]
+        for h in index
+    )
+
+
+def first_prominent_hit(index: List[dict], within: int, source: str = 'text'):
+    """첫 within 글자 안에 완전히 들어가는 첫부분용 키워드 중 가장 앞의 항목 (없으면 None)"""
+    best = None
+    for h in index:
+        if h['source'] != source or h.get('kw') is None or h.get('offset') is None:
+            continue
+        keyword, _, prominent = DISCLOSURE_KEYWORDS[h['kw']]
+        if prominent and h['offset'] + len(keyword) <= within and (best is None or h['offset'] < best['offset']):
+            best = h
+    return best
+
+
+def first_prominent_disclosure(index: List[dict], within: int, source: str = 'text'):
+    """first_prominent_hit 중 광고 표시 키워드(disclosure=True)인 것만 — 이미지 분석 생략 판단용"""
+    best = None
+    for h in index:
+        if h['source'] != source or h.get('kw') is None or h.get('offset') is None:
+            continue
+        keyword, disclosure, prominent = DISCLOSURE_KEYWORDS[h['kw']]
+        if (disclosure and prominent and h['offset'] + len(keyword) <= within
+                and (best is None or h['offset'] < best['offset'])):
+            best = h
+    return best
+
+
+def index_has_prominent(index: List[dict], within: int, source: str = 'text') -> bool:
+    """인덱스만으로 "첫 within 글자 안에 첫부분용 키워드" 여부 판단 (텍스트 재검색 없음)"""
+    return first_prominent_hit(index, within, source) is not None
@@ -0,0 +1,303 @@
+"""
+증거 캐시 모듈
+- 정규화된 URL(+수집 프로파일)의 해시를 키로 수집 결과·스크린샷 보관
+- TTL 만료 + 용량 제한 LRU 제거
+- 저장 위치: 임시 디렉터리의 ad_report_evidence_cache (ad_report_evidence 옆)
+- Gemini 이미지 분석 결과는 스크린샷 지각 해시(dHash)로 근사 일치 조회
+"""
+import os
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+import threading
+from typing import Optional
+from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
+
+CACHE_DIR = os.environ.get('AD_REPORT_CACHE_DIR') or os.path.join(tempfile.gettempdir(), 'ad_report_evidence_cache')
+DEFAULT_TTL = int(os.environ.get('AD_REPORT_CACHE_TTL', '900'))               # 15분
+DEFAULT_MAX_ENTRIES = int(os.environ.get('AD_REPORT_CACHE_MAX_ENTRIES', '200'))
+DEFAULT_MAX_BYTES = int(os.environ.get('AD_REPORT_CACHE_MAX_MB', '200')) * 1024 * 1024
+
+# 같은 콘텐츠인데 공유 경로마다 달라지는 추적 파라미터 (어필리에이트 ref= 등은 유지)
+_TRACKING_PARAMS = {'fbclid', 'gclid', 'igsh', 'igshid', 'si', 'feature', 'mibextid', 'trk'}
+
+
+def normalize_url(url: str) -> str:
+    """캐시 키용 URL 정규화 (플랫폼 경량 URL → 소문자 호스트 → 추적 파라미터·fragment 제거)"""
+    from site_extractors import find_extractor
+
+    url = url.strip()
+    extractor = find_extractor(url)
+    if extractor is not None:
+        url = extractor.light_url(url)
+
+    parsed = urlparse(url)
+    scheme = (parsed.scheme or 'https').lower()
+    host = (parsed.hostname or '').lower()
+    if parsed.port and not ((scheme, parsed.port) in (('http', 80), ('https', 443))):
+        host = f'{host}:{parsed.port}'
+    path = parsed.path or '/'
+    if len(path) > 1:
+        path = path.rstrip('/')
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True)
+        if not k.lower().startswith('utm_') and k.lower() not in _TRACKING_PARAMS
+    )
+    return urlunparse((scheme, host, path, '', urlencode(query), ''))
+
+
+class EvidenceCache:
+    """디스크 기반 증거 캐시 (파일 mtime = 마지막 사용 시각 → LRU)"""
+
+    def __init__(self, cache_dir: str = CACHE_DIR, ttl: int = DEFAULT_TTL,
+                 max_entries: int = DEFAULT_MAX_ENTRIES, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, url: str, profile: str) -> str:
+        return hashlib.sha256(f'{profile}\n{normalize_url(url)}'.encode('utf-8')).hexdigest()[:32]
+
+    def _paths(self, key: str) -> tuple:
+        return os.path.join(self.cache_dir, f'{key}.json'), os.path.join(self.cache_dir, f'{key}.png')
+
+    def get(self, url: str, profile: str) -> Optional[dict]:
+        """유효한 캐시 결과 (없거나 만료되면 None)"""
+        key = self.key(url, profile)
+        json_path, png_path = self._paths(key)
+        with self._lock:
+            try:
+                with open(json_path, 'r', encoding='utf-8') as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                return None
+            if time.time() - entry.get('cached_at', 0) > self.ttl:
+                self._remove(key)
+                return None
+            result = entry['result']
+            if result.get('screenshot_path'):
+                if not os.path.exists(png_path):
+                    self._remove(key)
+                    return None
+                result['screenshot_path'] = png_path
+            os.utime(json_path)   # LRU 갱신
+        result['cache_hit'] = True
+        result['cached_at'] = entry['cached_at']
+        return result
+
+    def put(self, url: str, profile: str, result: dict):
+        """수집 결과 저장 (스크린샷은 캐시 디렉터리로 복사)"""
+        key = self.key(url, profile)
+        json_path, png_path = self._paths(key)
+        stored = {k: v for k, v in result.items() if k not in ('cache_hit', 'cached_at')}
+        # 임시 파일 이름은 쓰는 쪽마다 다르게 — 캡처 워커 프로세스들이 같은 키를 동시에 저장해도 충돌하지 않음
+        suffix = f'.{os.getpid()}.{threading.get_ident()}.tmp'
+        with self._lock:
+            if stored.get('screenshot_path') and os.path.exists(stored['screenshot_path']):
+                shutil.copyfile(stored['screenshot_path'], png_path + suffix)
+                os.replace(png_path + suffix, png_path)
+            tmp = json_path + suffix
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump({'cached_at': time.time(), 'result': stored}, f, ensure_ascii=False)
+            os.replace(tmp, json_path)
+            self._evict()
+
+    def invalidate(self, url: str, profile: str):
+        with self._lock:
+            self._remove(self.key(url, profile))
+
+    def _remove(self, key: str):
+        for path in self._paths(key):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _evict(self):
+        """만료 항목 삭제 후 개수·용량 한도를 넘으면 오래 안 쓴 항목부터 제거"""
+        entries = []
+        now = time.time()
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.json'):
+                continue
+            key = name[:-5]
+            json_path, png_path = self._paths(key)
+            try:
+                mtime = os.path.getmtime(json_path)
+                size = os.path.getsize(json_path)
+                if os.path.exists(png_path):
+                    size += os.path.getsize(png_path)
+            except OSError:
+                continue
+            if now - mtime > self.ttl:
+                self._remove(key)
+                continue
+            entries.append((mtime, size, key))
+
+        entries.sort()
+        total = sum(e[1] for e in entries)
+        while entries and (len(entries) > self.max_entries or total > self.max_bytes):
+            _, size, key = entries.pop(0)
+            self._remove(key)
+            total -= size
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_evidence_cache() -> EvidenceCache:
+    """프로세스 전역 증거 캐시"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = EvidenceCache()
+        return _cache
+
+
+# ── Gemini 이미지 분석 캐시 (지각 해시) ──────────────────────────
+# 재캡처한 스크린샷은 바이트가 달라도 거의 같은 이미지 → dHash의 해밍 거리로 비교
+VISION_CACHE_DIR = (os.environ.get('AD_REPORT_VISION_CACHE_DIR')
+                    or os.path.join(tempfile.gettempdir(), 'ad_report_vision_cache'))
+VISION_HASH_SIZE = 16                 # 16x16 dHash = 256비트
+VISION_MAX_DISTANCE = int(os.environ.get('AD_REPORT_VISION_CACHE_DISTANCE', '8'))
+VISION_MAX_ENTRIES = int(os.environ.get('AD_REPORT_VISION_CACHE_MAX_ENTRIES', '500'))
+VISION_TTL = int(os.environ.get('AD_REPORT_VISION_CACHE_TTL', str(24 * 3600)))
+
+
+def perceptual_hash(image_source, hash_size: int = VISION_HASH_SIZE) -> int:
+    """dHash — 인접 픽셀 밝기 비교 비트열 (image_source: 파일 경로 또는 bytes)"""
+    import io
+    from PIL import Image
+
+    fp = io.BytesIO(image_source) if isinstance(image_source, (bytes, bytearray)) else image_source
+    with Image.open(fp) as img:
+        small = img.convert('L').resize((hash_size + 1, hash_size), Image.LANCZOS)
+        pixels = list(small.getdata())
+    value = 0
+    for row in range(hash_size):
+        base = row * (hash_size + 1)
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[base + col] > pixels[base + col + 1])
+    return value
+
+
+def _hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+
+class VisionCache:
+    """
+    지각 해시 → 이미지 분석 결과 (항목마다 파일 하나, LRU + TTL)
+    - 파일 이름 = 네임스페이스 해시 + 지각 해시 → 조회 시 목록만으로 거리 계산, 가장 가까운 파일만 읽음
+    - 파일 단위 원자적 교체라 여러 프로세스(캡처 워커)가 같은 디렉터리를 써도 서로 덮어쓰지 않음
+    - 파일 mtime = 마지막 사용 시각 (조회 적중 시 utime만, 다시 쓰지 않음)
+    """
+
+    def __init__(self, cache_dir: str = VISION_CACHE_DIR, max_distance: int = VISION_MAX_DISTANCE,
+                 max_entries: int = VISION_MAX_ENTRIES, ttl: int = VISION_TTL):
+        self.cache_dir = cache_dir
+        self.max_distance = max_distance
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def _ns_key(namespace: str) -> str:
+        return hashlib.sha256(namespace.encode('utf-8')).hexdigest()[:12]
+
+    def _path(self, phash: int, namespace: str) -> str:
+        return os.path.join(self.cache_dir, f'{self._ns_key(namespace)}-{phash:x}.json')
+
+    def _candidates(self, phash: int, namespace: str) -> list:
+        """같은 네임스페이스에서 거리 max_distance 이내인 [(거리, 경로)] (가까운 순)"""
+        prefix = self._ns_key(namespace) + '-'
+        found = []
+        for name in os.listdir(self.cache_dir):
+            if not (name.startswith(prefix) and name.endswith('.json')):
+                continue
+            try:
+                dist = _hamming(phash, int(name[len(prefix):-5], 16))
+            except ValueError:
+                continue
+            if dist <= self.max_distance:
+                found.append((dist, os.path.join(self.cache_dir, name)))
+        return sorted(found)
+
+    def get(self, phash: int, namespace: str = '') -> Optional[dict]:
+        """해밍 거리 max_distance 이내의 가장 가까운 결과 (없으면 None)"""
+        now = time.time()
+        with self._lock:
+            for dist, path in self._candidates(phash, namespace):
+                try:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        entry = json.load(f)
+                except (OSError, ValueError):
+                    continue
+                if now - entry.get('created', 0) > self.ttl:
+                    self._remove(path)
+                    continue
+                try:
+                    os.utime(path)   # LRU 갱신
+                except OSError:
+                    pass
+                result = entry['result']
+                result['cache_hit'] = True
+                result['phash_distance'] = dist
+                return result
+        return None
+
+    def put(self, phash: int, result: dict, namespace: str = ''):
+        stored = {k: v for k, v in result.items() if k not in ('cache_hit', 'phash_distance')}
+        path = self._path(phash, namespace)
+        with self._lock:
+            tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump({'created': time.time(), 'result': stored}, f, ensure_ascii=False)
+            os.replace(tmp, path)
+            self._evict()
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _evict(self):
+        """TTL 동안 쓰이지 않은 항목 삭제 후 개수 한도를 넘으면 오래 안 쓴 항목부터 제거"""
+        entries = []
+        now = time.time()
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                mtime = os.path.getmtime(path)
+            except OSError:
+                continue
+            if now - mtime > self.ttl:
+                self._remove(path)
+                continue
+            entries.append((mtime, path))
+        entries.sort()
+        for _, path in entries[:max(0, len(entries) - self.max_entries)]:
+            self._remove(path)
+
+
+_vision_cache = None
+
+
+def get_vision_cache() -> VisionCache:
+    """프로세스 전역 이미지 분석 캐시"""
+    global _vision_cache
+    with _cache_lock:
+        if _vision_cache is None:
+            _vision_cache = VisionCache()
+        return _vision_cache
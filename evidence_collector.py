@@ -7,15 +7,656 @@
 """
 import os
 import json
-import base64
+import re
+import time
+import shutil
+import asyncio
+import threading
+from concurrent.futures import TimeoutError as FutureTimeout, wait as futures_wait
 from datetime import datetime
-from urllib.parse import urlparse
+from urllib.parse import urlparse, urljoin
 
-def capture_screenshot(url: str, save_dir: str) -> dict:
-    """Playwright로 URL 스크린샷 + 메타데이터 수집"""
-    from playwright.sync_api import sync_playwright
+from site_extractors import find_extractor
+from stage_timing import Timeline
+from disclosure_matcher import (
+    find_disclosures, has_prominent_disclosure,
+    build_hit_index, index_has_disclosure, index_has_prominent,
+    first_prominent_disclosure, DISCLOSURE_KEYWORDS,
+)
 
-    result = {
+# 풀 작업 1건(페이지 로드~텍스트 분석)의 최대 대기 시간 (초)
+CAPTURE_TIMEOUT = 90
+
+# 광고 표시가 "게시물 첫부분"에 있다고 보는 범위 (글자 수)
+FIRST_PART_CHARS = 500
+
+# 이미지 분석 캐시 구분값 — 프롬프트/모델을 바꾸면 올려서 예전 결과를 무효화
+VISION_CACHE_NAMESPACE = 'gemini-2.5-flash:v3'
+
+# ── 수집 프로파일 (요청 차단 규칙) ─────────────────────────────
+# text_only  : 스크린샷 없이 텍스트·링크 분석만 (이미지·미디어·폰트·트래커 차단)
+# screenshot : 기본값. 스크린샷 + 텍스트 분석 (동영상·트래커만 차단)
+# full       : 아무것도 차단하지 않음 (원본 그대로 보존이 필요할 때)
+CAPTURE_PROFILES = {
+    'text_only': {
+        'screenshot': False,
+        'block_resource_types': frozenset({'image', 'media', 'font', 'texttrack', 'manifest'}),
+        'block_trackers': True,
+    },
+    'screenshot': {
+        'screenshot': True,
+        'block_resource_types': frozenset({'media', 'texttrack'}),
+        'block_trackers': True,
+    },
+    'full': {
+        'screenshot': True,
+        'block_resource_types': frozenset(),
+        'block_trackers': False,
+    },
+}
+DEFAULT_PROFILE = 'screenshot'
+
+# 광고·분석 트래커 도메인 (서브도메인 포함)
+_TRACKER_DOMAINS = [
+    'doubleclick.net', 'googlesyndication.com', 'googleadservices.com',
+    'google-analytics.com', 'googletagmanager.com', 'googletagservices.com',
+    'adservice.google.com', 'connect.facebook.net', 'analytics.tiktok.com',
+    'scorecardresearch.com', 'criteo.com', 'criteo.net', 'adnxs.com',
+    'amazon-adsystem.com', 'taboola.com', 'outbrain.com', 'hotjar.com',
+    'mixpanel.com', 'segment.io', 'branch.io', 'adjust.com', 'appsflyer.com',
+    'wcs.naver.net', 'lcs.naver.com', 'adcr.naver.com', 'tivan.naver.com',
+    'kakaoad.com', 'ad.daum.net',
+]
+_TRACKER_RE = re.compile(
+    r'^(?:[^/]+\.)?(?:' + '|'.join(re.escape(d) for d in _TRACKER_DOMAINS) + r')$', re.I
+)
+
+
+def _get_profile(profile: str) -> dict:
+    if profile not in CAPTURE_PROFILES:
+        raise ValueError(f'알 수 없는 수집 프로파일: {profile} (가능: {", ".join(CAPTURE_PROFILES)})')
+    return CAPTURE_PROFILES[profile]
+
+
+def _should_block(profile: dict, resource_type: str, request_url: str) -> bool:
+    """요청 차단 여부 — 문서(iframe 포함)는 트래커 도메인일 때만 차단"""
+    if resource_type != 'document' and resource_type in profile['block_resource_types']:
+        return True
+    return profile['block_trackers'] and bool(_TRACKER_RE.match(urlparse(request_url).hostname or ''))
+
+
+# ── 페이지 준비 완료(readiness) 판단 ───────────────────────────
+# 고정 2초 대기 대신: DOM 변경이 READY_QUIET_MS 동안 없고, 진행 중 요청이
+# READY_MAX_INFLIGHT 이하이며, 플랫폼별 본문 셀렉터가 있으면 즉시 진행.
+# 어떤 경우에도 READY_MAX_WAIT_MS를 넘기지 않음.
+READY_MAX_WAIT_MS = 6000
+READY_QUIET_MS = 500
+READY_MAX_INFLIGHT = 2        # SPA의 롱폴링/비콘은 끝나지 않으므로 약간 허용
+READY_POLL_MS = 100
+
+# 도메인(접미사) → 본문이 렌더링되었음을 나타내는 셀렉터
+READY_SELECTORS = {
+    'instagram.com': 'article, main [role="presentation"]',
+    'youtube.com': 'ytd-watch-metadata, #description-inner, ytd-text-inline-expander',
+    'blog.naver.com': 'iframe#mainFrame, .se-main-container, #postViewArea',
+    'm.blog.naver.com': '.se-main-container, #postViewArea, .post_ct',
+    'tistory.com': 'article, .entry-content, .tt_article_useless_p_margin',
+}
+
+_JS_READY_INIT = '''() => {
+    if (window.__adReportReady) return;
+    window.__adReportReady = {last: performance.now()};
+    new MutationObserver(() => { window.__adReportReady.last = performance.now(); })
+        .observe(document, {subtree: true, childList: true, characterData: true});
+}'''
+
+_JS_READY_STATE = '''(selector) => ({
+    quiet_ms: performance.now() - (window.__adReportReady ? window.__adReportReady.last : 0),
+    content: selector ? !!document.querySelector(selector) : true,
+})'''
+
+
+def _ready_selector(url: str) -> str:
+    """URL 도메인에 맞는 본문 셀렉터 (가장 구체적인 도메인 우선)"""
+    host = (urlparse(url).hostname or '').lower()
+    for domain in sorted(READY_SELECTORS, key=len, reverse=True):
+        if host == domain or host.endswith('.' + domain):
+            return READY_SELECTORS[domain]
+    return ''
+
+
+def _track_inflight(page) -> dict:
+    """진행 중인 네트워크 요청 수 추적 (goto 전에 등록)"""
+    state = {'inflight': 0}
+
+    def _started(_):
+        state['inflight'] += 1
+
+    def _ended(_):
+        state['inflight'] = max(0, state['inflight'] - 1)
+
+    page.on('request', _started)
+    page.on('requestfinished', _ended)
+    page.on('requestfailed', _ended)
+    return state
+
+
+def _is_settled(dom_state: dict, inflight: int) -> bool:
+    return (
+        bool(dom_state)
+        and dom_state.get('content', False)
+        and dom_state.get('quiet_ms', 0) >= READY_QUIET_MS
+        and inflight <= READY_MAX_INFLIGHT
+    )
+
+
+def _wait_until_ready(page, url: str, network: dict, max_wait_ms: int = READY_MAX_WAIT_MS) -> dict:
+    """페이지가 안정될 때까지 대기하고 실제 대기 정보를 반환"""
+    selector = _ready_selector(url)
+    start = time.monotonic()
+    reason = 'timeout'
+    try:
+        page.evaluate(_JS_READY_INIT)
+    except Exception:
+        pass
+    while True:
+        try:
+            dom_state = page.evaluate(_JS_READY_STATE, selector)
+        except Exception:
+            dom_state = None
+        if _is_settled(dom_state, network['inflight']):
+            reason = 'stable'
+            break
+        if (time.monotonic() - start) * 1000 >= max_wait_ms:
+            break
+        try:
+            page.wait_for_timeout(READY_POLL_MS)
+        except Exception:
+            break
+    return {
+        'waited_ms': int((time.monotonic() - start) * 1000),
+        'reason': reason,
+        'content_selector': selector,
+        'inflight_requests': network['inflight'],
+    }
+
+
+async def _wait_until_ready_async(page, url: str, network: dict, max_wait_ms: int = READY_MAX_WAIT_MS) -> dict:
+    """_wait_until_ready의 async 버전"""
+    selector = _ready_selector(url)
+    start = time.monotonic()
+    reason = 'timeout'
+    try:
+        await page.evaluate(_JS_READY_INIT)
+    except Exception:
+        pass
+    while True:
+        try:
+            dom_state = await page.evaluate(_JS_READY_STATE, selector)
+        except Exception:
+            dom_state = None
+        if _is_settled(dom_state, network['inflight']):
+            reason = 'stable'
+            break
+        if (time.monotonic() - start) * 1000 >= max_wait_ms:
+            break
+        try:
+            await page.wait_for_timeout(READY_POLL_MS)
+        except Exception:
+            break
+    return {
+        'waited_ms': int((time.monotonic() - start) * 1000),
+        'reason': reason,
+        'content_selector': selector,
+        'inflight_requests': network['inflight'],
+    }
+
+
+# ── 단계 이벤트 ─────────────────────────────────────────────────
+# 수집 도중 결과를 단계별로 알림: page_loaded → screenshot_ready → text_verdict
+# → affiliate_indicators → vision_verdict (콜백은 수집 스레드에서 호출됨)
+def _no_emit(stage: str, **data):
+    pass
+
+
+def _stage_emitter(on_stage):
+    """on_stage(event dict)를 감싼 emit(stage, **data) — 콜백 오류는 수집에 영향 없음"""
+    if on_stage is None:
+        return _no_emit
+    started = time.monotonic()
+
+    def emit(stage: str, **data):
+        try:
+            on_stage({'stage': stage, 'elapsed_ms': round((time.monotonic() - started) * 1000), **data})
+        except Exception:
+            pass
+    return emit
+
+
+def _emit_extraction(emit, result: dict):
+    """텍스트 판정 + 어필리에이트 지표 이벤트 (추출 직후, 이미지 분석 전)"""
+    hits = result.get('disclosure_hits') or []
+    keywords = []
+    for h in hits:
+        if h['source'] == 'text' and h.get('kw') is not None and DISCLOSURE_KEYWORDS[h['kw']][1]:
+            keyword = DISCLOSURE_KEYWORDS[h['kw']][0]
+            if keyword not in keywords:
+                keywords.append(keyword)
+    emit('text_verdict',
+         has_ad_disclosure=bool(result.get('has_ad_disclosure')),
+         first_part=first_prominent_disclosure(hits, FIRST_PART_CHARS, 'text') is not None,
+         keywords=keywords[:5],
+         page_title=result.get('page_title', ''))
+    emit('affiliate_indicators', affiliate_indicators=list(result.get('affiliate_indicators') or []))
+
+
+def _emit_vision(emit, result: dict):
+    image_analysis = result.get('image_analysis') or {}
+    emit('vision_verdict',
+         decision=result.get('decision'),
+         skipped=(result.get('decision') or {}).get('tier') != 'vision',
+         image_has_disclosure=bool(image_analysis.get('image_has_disclosure')),
+         image_disclosure_details=list(image_analysis.get('image_disclosure_details') or []),
+         error=image_analysis.get('error'))
+
+
+# ── 정적 HTML 빠른 경로 (requests + BeautifulSoup) ──────────────
+# 스크린샷이 필요 없는 프로파일에서 브라우저 없이 서버 렌더링 HTML만으로 분석.
+# 본문이 너무 짧거나 JS 전용 페이지로 보이면 Playwright로 승격(escalate).
+STATIC_MIN_TEXT_CHARS = 200
+STATIC_TIMEOUT = 10
+STATIC_MAX_BYTES = 3 * 1024 * 1024
+
+_DISCOUNT_RE = re.compile(
+    r'할인\s*코드[:\s]*[A-Za-z0-9]+|쿠폰\s*코드[:\s]*[A-Za-z0-9]+|discount\s*code[:\s]*[A-Za-z0-9]+', re.I
+)
+_JS_ONLY_HINT_RE = re.compile(
+    r'<noscript[^>]*>[^<]*(?:enable javascript|javascript를 활성화|자바스크립트를 활성화|javascript is (?:required|disabled))',
+    re.I,
+)
+
+_static_session = None
+_static_session_lock = threading.Lock()
+
+
+def _get_static_session():
+    """커넥션 풀을 재사용하는 프로세스 전역 requests.Session"""
+    global _static_session
+    with _static_session_lock:
+        if _static_session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=16, pool_maxsize=16, max_retries=1)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            session.headers.update({
+                'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
+                'Accept-Language': 'ko-KR,ko;q=0.9,en;q=0.8',
+            })
+            _static_session = session
+        return _static_session
+
+
+def _fetch_static_html(url: str):
+    """(html, 최종 URL) 또는 (None, 승격 사유)"""
+    try:
+        resp = _get_static_session().get(url, timeout=STATIC_TIMEOUT, stream=True)
+    except Exception as e:
+        return None, f'요청 실패: {e}'
+    with resp:
+        if resp.status_code >= 400:
+            return None, f'HTTP {resp.status_code}'
+        if 'html' not in resp.headers.get('Content-Type', '').lower():
+            return None, 'HTML 아님'
+        body = resp.raw.read(STATIC_MAX_BYTES + 1, decode_content=True)
+        if len(body) > STATIC_MAX_BYTES:
+            return None, '문서가 너무 큼'
+        if 'charset' in resp.headers.get('Content-Type', '').lower():
+            return body.decode(resp.encoding, errors='replace'), resp.url
+    # 헤더에 charset이 없으면 받은 본문으로 판단 (<meta charset> → 내용 추정 순)
+    # resp.apparent_encoding은 스트림을 이미 읽은 뒤라 빈 내용으로 추정하므로 사용하지 않음
+    from bs4 import UnicodeDammit
+
+    html = UnicodeDammit(body, is_html=True).unicode_markup
+    return (html if html is not None else body.decode('utf-8', errors='replace')), resp.url
+
+
+def _payload_from_html(html: str, base_url: str, extractor=None) -> dict:
+    """BeautifulSoup으로 _JS_EXTRACT와 같은 형태의 payload 생성 (플랫폼 추출기 결과 우선)"""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
+
+    overrides = None
+    if extractor is not None:
+        try:
+            overrides = extractor.extract(soup, html, base_url)
+        except Exception:
+            overrides = None
+
+    def meta(attr, name):
+        tag = soup.find('meta', attrs={attr: name})
+        return (tag.get('content') or '') if tag else ''
+
+    # 모든 링크를 검사하되 어필리에이트·구매 유도 링크만 상한까지 보관 (_JS_EXTRACT와 같음)
+    links = []
+    affiliate_count = buy_count = 0
+    for a in soup.find_all('a'):
+        href = a.get('href')
+        href = urljoin(base_url, href) if href else ''
+        text = a.get_text(' ', strip=True)
+        affiliate = affiliate_count < 10 and bool(_AFFILIATE_HREF_RE.search(href))
+        buy = buy_count < 5 and bool(_BUY_TEXT_RE.search(text))
+        if not (affiliate or buy):
+            continue
+        affiliate_count += affiliate
+        buy_count += buy
+        links.append({'href': href, 'text': text[:100]})
+        if affiliate_count >= 10 and buy_count >= 5:
+            break
+
+    title = soup.title.get_text(strip=True) if soup.title else ''
+    metas = {
+        'description': meta('name', 'description'),
+        'author': meta('name', 'author'),
+        'og_title': meta('property', 'og:title'),
+        'og_description': meta('property', 'og:description'),
+    }
+    for tag in soup(['script', 'style', 'noscript', 'template', 'head']):
+        tag.decompose()
+    root = soup.body or soup
+    full_text = root.get_text('\n', strip=True)
+
+    regions = []
+    for name, sel in (
+        ('header', 'header, [role="banner"]'),
+        ('post', 'article, main, [role="main"], .se-main-container, #postViewArea'),
+        ('footer', 'footer, [role="contentinfo"]'),
+    ):
+        el = root.select_one(sel)
+        t = el.get_text('\n', strip=True) if el else ''
+        start = full_text.find(t[:200]) if t else -1
+        if start >= 0:
+            regions.append({'name': name, 'start': start, 'end': start + len(t)})
+
+    payload = {
+        'title': title,
+        'meta': metas,
+        'text': full_text[:5000],
+        'links': links,
+        'discounts': _DISCOUNT_RE.findall(full_text)[:5],
+        'regions': regions,
+        'source': 'generic',
+    }
+    if overrides:
+        payload['source'] = extractor.name
+        payload['meta'].update({k: v for k, v in (overrides.get('meta') or {}).items() if v})
+        if overrides.get('title'):
+            payload['title'] = overrides['title']
+        if 'links' in overrides:
+            payload['links'] = overrides['links']
+        if overrides.get('text'):
+            # 추출기 텍스트는 본문 자체이므로 전체를 post 영역으로 간주
+            text = overrides['text']
+            payload['text'] = text[:5000]
+            payload['discounts'] = _DISCOUNT_RE.findall(text)[:5]
+            payload['regions'] = [{'name': 'post', 'start': 0, 'end': len(text)}]
+    return payload
+
+
+def _try_static_capture(url: str, result: dict, emit=_no_emit, timeline: Timeline = None) -> bool:
+    """정적 HTML로 분석 완료 시 True, 브라우저가 필요하면 사유를 기록하고 False"""
+    timeline = timeline or Timeline()
+    extractor = find_extractor(url)
+    fetch_url = extractor.light_url(url) if extractor else url
+    if fetch_url != url:
+        result['fetched_url'] = fetch_url
+
+    with timeline.span('static_fetch'):
+        html, info = _fetch_static_html(fetch_url)
+    if html is None:
+        result['static_escalation'] = info
+        return False
+    try:
+        with timeline.span('static_parse'):
+            payload = _payload_from_html(html, info, extractor)
+    except Exception as e:
+        result['static_escalation'] = f'HTML 파싱 실패: {e}'
+        return False
+
+    text = payload['text']
+    min_chars = STATIC_MIN_TEXT_CHARS
+    if payload['source'] != 'generic':
+        result['extractor'] = payload['source']
+        min_chars = extractor.min_text_chars or STATIC_MIN_TEXT_CHARS
+    if len(text) < min_chars:
+        result['static_escalation'] = f'본문이 너무 짧음 ({len(text)}자)'
+        return False
+    # <noscript> 경고가 있고 본문이 빈약하면 JS 렌더링 본문을 놓친 것으로 판단
+    if len(text) < STATIC_MIN_TEXT_CHARS * 5 and _JS_ONLY_HINT_RE.search(html):
+        result['static_escalation'] = 'JS 전용 페이지'
+        return False
+
+    emit('page_loaded', url=fetch_url, method='static')
+    with timeline.span('disclosure_match'):
+        _apply_extraction(result, payload)
+    result['capture_method'] = 'static'
+    _emit_extraction(emit, result)
+    return True
+
+
+def capture_screenshot(url: str, save_dir: str, profile: str = DEFAULT_PROFILE,
+                       force_refresh: bool = False, pipelined: bool = None, on_stage=None) -> dict:
+    """
+    Playwright로 URL 스크린샷 + 메타데이터 수집 (상시 대기 브라우저 풀 사용)
+    - profile: 'text_only' | 'screenshot' | 'full' (CAPTURE_PROFILES 참고)
+    - text_only는 정적 HTML(requests)로 먼저 분석하고 부족할 때만 브라우저 사용
+    - 같은 URL을 TTL 안에 다시 요청하면 캐시된 결과 반환 (force_refresh=True로 무시)
+    - pipelined: 스크린샷 직후 이미지 분석 시작 (None이면 AD_REPORT_PIPELINED_VISION)
+    - on_stage: 단계 이벤트 콜백 (dict: stage, elapsed_ms, 단계별 데이터) — capture_jobs가 작업 이벤트로 보관
+    - 브라우저 단계는 admission 입장 제어를 거침 (대기 시 queued 이벤트, 혼잡 시 거절 결과 반환)
+    - 단계별 최고 RSS를 result['memory']에 기록, 소프트 한도면 프로파일을 낮추고
+      하드 한도면 브라우저를 강제 종료(풀이 재시작)하고 수집 중단
+    - 단계별 소요 시간을 result['timings']에 기록하고 전역 히스토그램(stage_timing)에 반영
+    """
+    from admission import AdmissionRejected, get_admission_controller
+    from browser_pool import get_browser_pool
+    from evidence_cache import get_evidence_cache
+    from memory_watchdog import downgrade_profile, kill_browser_processes, watch_stage
+
+    rules = _get_profile(profile)
+    emit = _stage_emitter(on_stage)
+    timeline = Timeline('capture')
+    cache = get_evidence_cache()
+    if not force_refresh:
+        with timeline.span('cache_lookup'):
+            cached = cache.get(url, profile)
+        if cached is not None and _restore_cached(cached, url, save_dir, timeline):
+            emit('page_loaded', url=url, cache_hit=True)
+            _emit_extraction(emit, cached)
+            _emit_vision(emit, cached)
+            return cached
+
+    result = _new_result(url)
+    memory = result['memory'] = {}
+    # 메모리가 이미 소프트 한도를 넘었으면 더 가벼운 프로파일로 수집 (캐시 키도 낮춘 프로파일)
+    lighter = downgrade_profile(profile)
+    if lighter:
+        memory['downgraded_from'] = profile
+        emit('profile_downgraded', from_profile=profile, to_profile=lighter)
+        profile, rules = lighter, _get_profile(lighter)
+    result['capture_profile'] = profile
+    screenshot_file, meta_file = _evidence_paths(url, save_dir)
+
+    # 스크린샷이 필요 없으면 정적 HTML부터 시도 (수십 ms)
+    if not rules['screenshot']:
+        with watch_stage('capture', memory):
+            static_ok = _try_static_capture(url, result, emit, timeline)
+        if static_ok:
+            _finalize_evidence(result, meta_file, emit=emit, timeline=timeline)
+            _cache_put(cache, url, profile, result)
+            return result
+
+    result['capture_method'] = 'browser'
+    speculative = []
+    on_screenshot = None
+    # 풀 작업은 자기 dict를 채우고 성공했을 때만 result에 합침 — 시간 초과로 포기한 작업이
+    # 반환·캐시된 뒤의 result를 고치거나 이벤트·이미지 분석을 보내지 않도록
+    job_result = dict(result)
+    abandoned = threading.Event()
+
+    def job_emit(stage: str, **data):
+        if not abandoned.is_set():
+            emit(stage, **data)
+
+    if PIPELINED_VISION if pipelined is None else pipelined:
+        def on_screenshot(png: bytes):
+            if not abandoned.is_set():
+                speculative.append(_get_vision_executor().submit(analyze_image_for_ad_disclosure, png))
+
+    def _collect(context):
+        # launch = 풀 대기 + (필요 시) 브라우저 기동 + 컨텍스트 생성
+        timeline.add('launch', launch_started)
+        _collect_from_page(context, url, screenshot_file, job_result, rules, on_screenshot, job_emit, timeline)
+
+    # 하드 한도를 넘으면 Chromium을 강제 종료 → 진행 중인 페이지 작업이 바로 실패하고 풀이 재시작
+    watch = watch_stage('capture', memory, on_hard=kill_browser_processes)
+    try:
+        # 동시 브라우저 수 제한 (세션 전체 공유) — 차례를 기다리는 동안 대기 순번 이벤트 전달
+        admission_started = timeline.now()
+        with get_admission_controller().slot(lambda update: emit('queued', **update)) as admitted:
+            timeline.add('admission_wait', admission_started)
+            result['admission_wait_ms'] = admitted['waited_ms']
+            if admitted['waited_ms']:
+                emit('admitted', waited_ms=admitted['waited_ms'])
+            # 브라우저 실행·컨텍스트 생성/정리는 풀이 담당
+            with watch:
+                launch_started = timeline.now()
+                future = get_browser_pool().submit(_collect)
+                try:
+                    future.result(timeout=CAPTURE_TIMEOUT)
+                except FutureTimeout:
+                    abandoned.set()
+                    # 대기 중이면 취소, 이미 실행 중이면 끝날 때까지 기다린 뒤 입장 슬롯 반환
+                    # (브라우저가 실제로 쓰이는 동안 다른 수집이 들어오지 않도록, 페이지 타임아웃으로 상한 있음)
+                    if not future.cancel():
+                        futures_wait([future], timeout=CAPTURE_TIMEOUT)
+                    raise TimeoutError(f'수집 시간 초과 ({CAPTURE_TIMEOUT}초)') from None
+                result.update(job_result)
+    except AdmissionRejected as e:
+        # 혼잡 시 브라우저를 띄우지 않고 바로 반환 (캐시·메타데이터 저장 없음)
+        result['error'] = f'서버가 혼잡하여 수집을 시작하지 못했습니다: {e}'
+        result['admission'] = {'rejected': True, 'position': e.position, 'estimated_wait_s': e.estimated_wait}
+        emit('rejected', message=result['error'])
+        result['timings'] = timeline.to_dict()
+        return result
+    except Exception as e:
+        result['error'] = str(e) or type(e).__name__
+    if watch.hard_exceeded:
+        result['error'] = f'메모리 하드 한도 초과로 수집 중단 — 브라우저 재시작 (최고 {watch.peak_mb:.0f}MB)'
+
+    _finalize_evidence(result, meta_file, speculative[0] if speculative else None, emit, timeline)
+    if not result.get('error'):
+        _cache_put(cache, url, profile, result)
+    return result
+
+
+async def capture_many(urls: list, save_dir: str, concurrency: int = 4, browsers: int = 1,
+                       profile: str = DEFAULT_PROFILE, pipelined: bool = None):
+    """
+    여러 URL을 async Playwright로 동시에 수집 (async generator)
+    - browsers개의 Chromium을 공유하고 URL마다 새 컨텍스트 사용
+    - 끝나는 순서대로 capture_screenshot과 같은 형태의 result를 yield
+    - metadata_*.json 저장 / Gemini 이미지 분석도 동일하게 수행
+    - profile, pipelined: capture_screenshot과 동일
+
+    사용 예:
+        async for ev in capture_many(urls, save_dir, concurrency=6):
+            ...
+    """
+    from playwright.async_api import async_playwright
+    from browser_pool import LAUNCH_ARGS, CONTEXT_OPTIONS
+
+    rules = _get_profile(profile)
+    pipelined = PIPELINED_VISION if pipelined is None else pipelined
+    urls = list(urls)
+    if not urls:
+        return
+
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    relaunch_lock = asyncio.Lock()
+
+    async with async_playwright() as p:
+        shared = [
+            await p.chromium.launch(headless=True, args=LAUNCH_ARGS)
+            for _ in range(max(1, min(browsers, len(urls))))
+        ]
+
+        async def _browser_for(slot: int):
+            # 공유 브라우저가 죽었으면 다시 띄움 (크래시 복구)
+            async with relaunch_lock:
+                if not shared[slot].is_connected():
+                    shared[slot] = await p.chromium.launch(headless=True, args=LAUNCH_ARGS)
+                return shared[slot]
+
+        async def _capture_one(index: int, url: str) -> dict:
+            result = _new_result(url)
+            result['capture_profile'] = profile
+            timeline = Timeline('capture')
+            screenshot_file, meta_file = _evidence_paths(url, save_dir)
+            if not rules['screenshot'] and await asyncio.to_thread(
+                    _try_static_capture, url, result, _no_emit, timeline):
+                await _finalize_evidence_async(result, meta_file, timeline=timeline)
+                return result
+            result['capture_method'] = 'browser'
+            speculative = []
+            on_screenshot = None
+            if pipelined:
+                def on_screenshot(png: bytes):
+                    speculative.append(asyncio.create_task(analyze_image_for_ad_disclosure_async(png)))
+            async with semaphore:
+                context = None
+                try:
+                    launch_started = timeline.now()
+                    browser = await _browser_for(index % len(shared))
+                    context = await browser.new_context(**CONTEXT_OPTIONS)
+                    timeline.add('launch', launch_started)
+                    await asyncio.wait_for(
+                        _collect_from_page_async(context, url, screenshot_file, result, rules, on_screenshot, timeline),
+                        timeout=CAPTURE_TIMEOUT,
+                    )
+                except Exception as e:
+                    result['error'] = str(e) or type(e).__name__
+                finally:
+                    if context is not None:
+                        try:
+                            await context.close()
+                        except Exception:
+                            pass
+            # Gemini 호출은 전역 클라이언트의 요청률·동시성 제한 안에서 비동기로 대기
+            await _finalize_evidence_async(result, meta_file, speculative[0] if speculative else None, timeline)
+            return result
+
+        tasks = [asyncio.create_task(_capture_one(i, u)) for i, u in enumerate(urls)]
+        try:
+            for done in asyncio.as_completed(tasks):
+                yield await done
+        finally:
+            for t in tasks:
+                t.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            for browser in shared:
+                try:
+                    await browser.close()
+                except Exception:
+                    pass
+
+
+def _new_result(url: str) -> dict:
+    """수집 결과 기본 구조"""
+    return {
         'url': url,
         'captured_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
         'screenshot_path': None,
@@ -28,229 +669,521 @@ def capture_screenshot(url: str, save_dir: str) -> dict:
         'error': None,
     }
 
+
+def _cache_put(cache, url: str, profile: str, result: dict):
+    """캐시 저장 실패(디스크 부족·동시 제거 등)는 수집 결과에 영향 주지 않음"""
+    try:
+        cache.put(url, profile, result)
+    except OSError as e:
+        result['cache_error'] = str(e) or type(e).__name__
+
+
+def _restore_cached(cached: dict, url: str, save_dir: str, timeline: Timeline) -> bool:
+    """
+    캐시 결과를 새 수집처럼 save_dir에 저장 (스크린샷 사본 + metadata_*.json)
+    - 캐시 디렉터리의 PNG는 제거·만료로 언제든 지워질 수 있으므로 반환값이 가리키지 않게 함
+    - 복사 중 캐시 파일이 사라지면 False (캐시 미스로 처리)
+    """
+    screenshot_file, meta_file = _evidence_paths(url, save_dir)
+    if cached.get('screenshot_path'):
+        try:
+            shutil.copyfile(cached['screenshot_path'], screenshot_file)
+        except OSError:
+            return False
+        cached['screenshot_path'] = screenshot_file
+    # 캐시 적중은 수집 소요 시간 히스토그램(capture.total)에 넣지 않음
+    cached['timings'] = timeline.to_dict()
+    _write_metadata(cached, meta_file)
+    return True
+
+
+def _evidence_paths(url: str, save_dir: str) -> tuple:
+    """(스크린샷 경로, 메타데이터 경로) — 동시 수집 시 충돌하지 않도록 마이크로초까지 포함"""
     os.makedirs(save_dir, exist_ok=True)
     domain = urlparse(url).netloc.replace('.', '_')
-    ts = datetime.now().strftime('%Y%m%d_%H%M%S')
-    screenshot_file = os.path.join(save_dir, f'evidence_{domain}_{ts}.png')
+    ts = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+    return (
+        os.path.join(save_dir, f'evidence_{domain}_{ts}.png'),
+        os.path.join(save_dir, f'metadata_{domain}_{ts}.json'),
+    )
 
-    browser = None
-    try:
-        with sync_playwright() as p:
-            browser = p.chromium.launch(
-                headless=True,
-                args=[
-                    '--no-sandbox',
-                    '--disable-dev-shm-usage',
-                    '--disable-gpu',
-                    '--single-process',
-                    '--disable-extensions',
-                    '--disable-background-networking',
-                    '--disable-default-apps',
-                ]
-            )
-            context = browser.new_context(
-                viewport={'width': 1280, 'height': 900},
-                locale='ko-KR',
-                user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
-                # 이미지/폰트 로딩 차단으로 메모리 절약
-                java_script_enabled=True,
-            )
-            # 이미지·미디어 요청 차단 (스크린샷 전에는 로드, 텍스트 분석만 할 때는 차단)
-            page = context.new_page()
-            page.set_default_timeout(20000)   # 전체 기본 타임아웃 20초
-
-            # ── networkidle 대신 domcontentloaded 사용 ─────────────────
-            # networkidle: Instagram/YouTube 같은 SPA에서 절대 종료 안 됨 → 타임아웃 크래시
-            # domcontentloaded: HTML+JS 로드 완료 즉시 진행
-            try:
-                page.goto(url, timeout=20000, wait_until='domcontentloaded')
-            except Exception:
-                # 타임아웃이어도 이미 로드된 내용으로 진행
-                pass
 
-            # 동적 콘텐츠 안정화 대기 (최대 2초)
-            try:
-                page.wait_for_timeout(2000)
-            except Exception:
-                pass
+# ── 단계별 판정 (저비용 단계에서 결론이 나면 이미지 분석 생략) ──────
+# 본문 첫부분에 광고 표시가 있으면 analyze_violation의 결론은 이미지 결과와 무관
+TIERED_ANALYSIS = os.environ.get('AD_REPORT_TIERED_ANALYSIS', '1') != '0'
 
-            # ── 스크린샷 캡처 ──────────────────────────────────────────
-            # full_page=True는 매우 긴 페이지에서 메모리 폭발 → clip으로 제한
-            try:
-                page.screenshot(
+
+def _text_tier_decision(result: dict):
+    """
+    텍스트 단계 판정 (수집 시 만든 발견 인덱스만 사용)
+    - 결론이 났으면 {'tier', 'reason', 'detail'} 반환, 이미지 분석이 필요하면 None
+    """
+    first = first_prominent_disclosure(result.get('disclosure_hits') or [], FIRST_PART_CHARS, 'text')
+    if first is not None:
+        keyword = DISCLOSURE_KEYWORDS[first['kw']][0]
+        return {
+            'tier': 'text',
+            'reason': 'text_first_part',
+            'detail': f'본문 첫부분({first["offset"]}자 위치)에서 "{keyword}" 발견 — 이미지 분석 생략',
+        }
+    return None
+
+
+def _vision_reason(result: dict) -> tuple:
+    """이미지 분석이 판정을 바꿀 수 있는 이유 (reason, detail)"""
+    if index_has_disclosure(result.get('disclosure_hits') or [], 'text'):
+        return 'text_disclosure_not_first', '텍스트 광고 표시가 첫부분에 없음 — 이미지 표시 확인 필요'
+    if index_has_disclosure(result.get('disclosure_hits') or [], 'meta'):
+        return 'meta_only_disclosure', '메타 설명에만 광고 표시 — 본문 이미지 표시 확인 필요'
+    return 'no_text_disclosure', '텍스트 광고 표시 없음 — 이미지/스티커 표시 확인 필요'
+
+
+def _pre_vision_decision(result: dict):
+    """텍스트 단계 판정 — 결론이 나면 decision, 이미지 분석이 필요하면 None"""
+    decision = _text_tier_decision(result) if TIERED_ANALYSIS else None
+    if decision is None and result.get('screenshot_path') and result.get('error'):
+        decision = {'tier': 'text', 'reason': 'capture_error', 'detail': '수집 오류로 이미지 분석 생략'}
+    if decision is None and not result.get('screenshot_path'):
+        decision = {'tier': 'text', 'reason': 'no_screenshot', 'detail': '스크린샷이 없어 텍스트/메타 단계에서 판정'}
+    if decision is not None and result['has_ad_disclosure']:
+        result['ad_disclosure_source'] = 'text'
+    return decision
+
+
+def _merge_image_analysis(result: dict, image_analysis: dict) -> dict:
+    """이미지 분석 결과를 result에 병합하고 vision 단계 decision 반환"""
+    reason, detail = _vision_reason(result)
+    decision = {'tier': 'vision', 'reason': reason, 'detail': detail}
+    result['image_analysis'] = image_analysis
+
+    # 이미지 발견 항목도 인덱스에 추가 (offset 없음, region = 화면상 위치)
+    for item in image_analysis.get('image_disclosure_items', []):
+        kw_hits = find_disclosures(item.get('content', ''))
+        result.setdefault('disclosure_hits', []).append({
+            'kw': kw_hits[0]['kw'] if kw_hits else None,
+            'offset': None,
+            'source': 'image',
+            'region': item.get('location') or None,
+        })
+
+    # 이미지에서 광고 표시가 발견되면 has_ad_disclosure 업데이트
+    if image_analysis.get('image_has_disclosure'):
+        result['has_ad_disclosure'] = True
+        result['ad_disclosure_source'] = 'image'  # 이미지/스티커에서 발견
+        if image_analysis.get('image_disclosure_details'):
+            result['image_disclosure_details'] = image_analysis['image_disclosure_details']
+    elif result['has_ad_disclosure']:
+        result['ad_disclosure_source'] = 'text'  # 텍스트에서 발견
+    if image_analysis.get('error'):
+        decision['detail'] += f' (이미지 분석 실패: {image_analysis["error"]})'
+    return decision
+
+
+def _write_metadata(result: dict, meta_file: str):
+    with open(meta_file, 'w', encoding='utf-8') as f:
+        save_data = {k: v for k, v in result.items() if k != 'page_text'}
+        json.dump(save_data, f, ensure_ascii=False, indent=2)
+
+
+def _write_timed_metadata(result: dict, meta_file: str, timeline: Timeline):
+    """
+    메타데이터 JSON 저장 + 소요 시간 확정
+    - 파일에는 저장 직전까지의 구간이 들어가고, metadata_write 구간과 최종 total_ms는
+      반환되는 result와 히스토그램에만 반영
+    """
+    result['timings'] = timeline.to_dict()
+    with timeline.span('metadata_write'):
+        _write_metadata(result, meta_file)
+    result['timings'] = timeline.finish()
+
+
+def _finalize_evidence(result: dict, meta_file: str, speculative=None, emit=_no_emit,
+                       timeline: Timeline = None):
+    """
+    단계별 판정(텍스트 → 이미지) 후 메타데이터 JSON 저장
+    - speculative: 파이프라인 모드에서 미리 시작한 이미지 분석 Future
+      (텍스트 단계에서 결론이 나면 버림)
+    - timeline: 수집 단계 구간 기록 (vision, metadata_write 추가)
+    """
+    timeline = timeline or Timeline()
+    decision = _pre_vision_decision(result)
+    if decision is None:
+        # 이미지/스티커 내 광고 표시 분석 (Gemini Vision)
+        from memory_watchdog import watch_stage
+        try:
+            with watch_stage('vision', result.setdefault('memory', {})), timeline.span('vision'):
+                if speculative is not None:
+                    image_analysis = speculative.result()
+                else:
+                    image_analysis = analyze_image_for_ad_disclosure(result['screenshot_path'], result.get('roi_boxes'))
+        except Exception as e:
+            image_analysis = {'error': str(e), 'image_analysis_done': False}
+        decision = _merge_image_analysis(result, image_analysis)
+    elif speculative is not None:
+        # 이미 시작한 분석은 결과를 쓰지 않음 (시작 전이면 취소)
+        speculative.cancel()
+    if speculative is not None:
+        decision['speculative_vision'] = 'used' if decision['tier'] == 'vision' else 'discarded'
+    result['decision'] = decision
+    _emit_vision(emit, result)
+    _write_timed_metadata(result, meta_file, timeline)
+
+
+async def _finalize_evidence_async(result: dict, meta_file: str, speculative=None, timeline: Timeline = None):
+    """_finalize_evidence의 async 버전 (Gemini 대기 중 다른 수집 진행, speculative는 asyncio.Task)"""
+    timeline = timeline or Timeline()
+    decision = _pre_vision_decision(result)
+    if decision is None:
+        from memory_watchdog import watch_stage
+        try:
+            # capture_many는 여러 URL이 한 프로세스에서 동시에 진행되므로 프로세스 전체 기준 값
+            with watch_stage('vision', result.setdefault('memory', {})), timeline.span('vision'):
+                if speculative is not None:
+                    image_analysis = await speculative
+                else:
+                    image_analysis = await analyze_image_for_ad_disclosure_async(
+                        result['screenshot_path'], result.get('roi_boxes'))
+        except Exception as e:
+            image_analysis = {'error': str(e), 'image_analysis_done': False}
+        decision = _merge_image_analysis(result, image_analysis)
+    elif speculative is not None:
+        # 이미 시작한 분석은 결과를 쓰지 않음 (시작 전이면 취소)
+        speculative.cancel()
+    if speculative is not None:
+        decision['speculative_vision'] = 'used' if decision['tier'] == 'vision' else 'discarded'
+    result['decision'] = decision
+    await asyncio.to_thread(_write_timed_metadata, result, meta_file, timeline)
+
+
+# ── 파이프라인 모드 ─────────────────────────────────────────────
+# 스크린샷 bytes가 나오는 즉시 이미지 분석을 시작하고 DOM 추출·페이지 정리와 병렬 진행
+# → URL당 지연 ≈ max(브라우저, 이미지 분석). ROI는 아직 모르므로 전체 이미지 전송
+PIPELINED_VISION = os.environ.get('AD_REPORT_PIPELINED_VISION', '0') == '1'
+
+_vision_executor = None
+_vision_executor_lock = threading.Lock()
+
+
+def _get_vision_executor():
+    """파이프라인 이미지 분석용 스레드 풀 (동시 요청 수는 gemini_client가 제한)"""
+    global _vision_executor
+    from concurrent.futures import ThreadPoolExecutor
+    from gemini_client import DEFAULT_MAX_INFLIGHT
+
+    with _vision_executor_lock:
+        if _vision_executor is None:
+            _vision_executor = ThreadPoolExecutor(max_workers=max(1, DEFAULT_MAX_INFLIGHT),
+                                                  thread_name_prefix='vision')
+        return _vision_executor
+
+
+# ── 페이지 분석 스크립트 (sync/async 공용, 1회 왕복) ──────────────
+# 제목·메타·본문·링크·할인코드를 한 번에 반환 → innerText(레이아웃 계산)도 1회만
+_JS_EXTRACT = '''() => {
+    const meta = (sel) => document.querySelector(sel)?.getAttribute('content') || '';
+    const fullText = document.body?.innerText || '';
+    const discounts = fullText.match(/할인\\s*코드[:\\s]*[A-Za-z0-9]+|쿠폰\\s*코드[:\\s]*[A-Za-z0-9]+|discount\\s*code[:\\s]*[A-Za-z0-9]+/gi) || [];
+    // 본문 텍스트 안에서 주요 DOM 영역의 위치 (발견 인덱스의 region 용)
+    const regions = [];
+    for (const [name, sel] of [
+        ['header', 'header, [role="banner"]'],
+        ['post', 'article, main, [role="main"], .se-main-container, #postViewArea'],
+        ['footer', 'footer, [role="contentinfo"]'],
+    ]) {
+        const el = document.querySelector(sel);
+        const t = el ? (el.innerText || '') : '';
+        const start = t ? fullText.indexOf(t.substring(0, 200)) : -1;
+        if (start >= 0) regions.push({name: name, start: start, end: start + t.length});
+    }
+    // 이미지 분석용 관심 영역 — 본문 상·하단 띠, 본문 이미지, 작성자 헤더, 스티커/오버레이
+    // (스크린샷 범위인 상단 1800px 안의 박스만, 페이지 좌표)
+    const roi = [];
+    const addBox = (kind, left, top, width, height) => {
+        const y = top + window.scrollY;
+        if (width < 24 || height < 24 || y + height <= 0 || y >= 1800) return;
+        roi.push({kind: kind, x: left + window.scrollX, y: y, w: width, h: height});
+    };
+    const post = document.querySelector('article, main, [role="main"], .se-main-container, #postViewArea');
+    if (post) {
+        const r = post.getBoundingClientRect();
+        addBox('post_top', r.left, r.top, r.width, Math.min(300, r.height));
+        if (r.height > 300) addBox('post_bottom', r.left, r.bottom - 300, r.width, 300);
+        for (const img of Array.from(post.querySelectorAll('img')).slice(0, 40)) {
+            const b = img.getBoundingClientRect();
+            addBox('image', b.left, b.top, b.width, b.height);
+        }
+    }
+    const author = document.querySelector('[itemprop="author"], [class*="author" i], [class*="profile" i]');
+    if (author) {
+        const b = author.getBoundingClientRect();
+        addBox('author', b.left, b.top, b.width, b.height);
+    }
+    for (const el of Array.from(document.querySelectorAll(
+            '[class*="sticker" i], [class*="badge" i], [class*="overlay" i], [class*="sponsor" i]')).slice(0, 20)) {
+        const b = el.getBoundingClientRect();
+        const pos = getComputedStyle(el).position;
+        addBox(pos === 'fixed' || pos === 'absolute' || pos === 'sticky' ? 'overlay' : 'label', b.left, b.top, b.width, b.height);
+    }
+    // 모든 링크를 검사하되 어필리에이트(href)·구매 유도(텍스트) 링크만 상한까지 보관
+    // (정규식은 _AFFILIATE_HREF_RE / _BUY_TEXT_RE와 같음)
+    const links = [];
+    let affiliateCount = 0, buyCount = 0;
+    for (const a of document.querySelectorAll('a')) {
+        const href = a.href || '';
+        const text = (a.innerText || '').trim();
+        const affiliate = affiliateCount < 10 && /ref=|affiliate|aff_id|utm_|click_id|partner|tracking/i.test(href);
+        const buy = buyCount < 5 && /구매|buy|shop|purchase|주문/i.test(text);
+        if (!affiliate && !buy) continue;
+        affiliateCount += affiliate ? 1 : 0;
+        buyCount += buy ? 1 : 0;
+        links.push({href: href, text: text.substring(0, 100)});
+        if (affiliateCount >= 10 && buyCount >= 5) break;
+    }
+    return {
+        title: document.title || '',
+        meta: {
+            description: meta('meta[name="description"]'),
+            author: meta('meta[name="author"]'),
+            og_title: meta('meta[property="og:title"]'),
+            og_description: meta('meta[property="og:description"]'),
+        },
+        text: fullText.substring(0, 5000),
+        links: links,
+        discounts: discounts.slice(0, 5),
+        regions: regions,
+        roi: roi,
+    };
+}'''
+
+_AFFILIATE_HREF_RE = re.compile(r'ref=|affiliate|aff_id|utm_|click_id|partner|tracking', re.I)
+_BUY_TEXT_RE = re.compile(r'구매|buy|shop|purchase|주문', re.I)
+
+def _browser_target(url: str, extractor, rules: dict, result: dict) -> str:
+    """스크린샷이 필요 없으면 추출기의 경량 URL로 이동 (증거 스크린샷은 원본 URL 유지)"""
+    if extractor is None:
+        return url
+    result['extractor'] = extractor.name
+    if rules['screenshot']:
+        return url
+    target = extractor.light_url(url)
+    if target != url:
+        result['fetched_url'] = target
+    return target
+
+
+def _content_frame(page, extractor):
+    """본문이 들어 있는 프레임 (추출기가 지정한 iframe이 있으면 그 프레임)"""
+    if extractor is not None and extractor.frame_name:
+        frame = page.frame(name=extractor.frame_name)
+        if frame is not None:
+            return frame
+    return page
+
+
+def _offset_roi(payload: dict, frame_box: dict):
+    if not frame_box:
+        return
+    for box in payload.get('roi') or []:
+        box['x'] += frame_box['x']
+        box['y'] += frame_box['y']
+
+
+def _collect_from_page(context, url: str, screenshot_file: str, result: dict, rules: dict,
+                       on_screenshot=None, emit=_no_emit, timeline: Timeline = None):
+    """
+    풀에서 받은 BrowserContext로 페이지를 열어 result를 채움 (풀 워커 스레드에서 실행)
+    - on_screenshot: 스크린샷 직후 PNG bytes로 호출 (파이프라인 모드에서 이미지 분석 시작)
+    - emit: 단계 이벤트 (_stage_emitter)
+    - timeline: 단계 구간 기록 (new_page, goto, readiness, screenshot, extract, disclosure_match, page_close)
+    """
+    timeline = timeline or Timeline()
+    with timeline.span('new_page'):
+        page = context.new_page()
+    page.set_default_timeout(20000)   # 전체 기본 타임아웃 20초
+
+    # ── 프로파일에 따라 이미지·미디어·트래커 요청 차단 ──────────────
+    result['blocked_requests'] = 0
+    if rules['block_resource_types'] or rules['block_trackers']:
+        def _route(route):
+            request = route.request
+            if _should_block(rules, request.resource_type, request.url):
+                result['blocked_requests'] += 1
+                route.abort()
+            else:
+                route.continue_()
+        page.route('**/*', _route)
+
+    network = _track_inflight(page)
+    extractor = find_extractor(url)
+    target = _browser_target(url, extractor, rules, result)
+
+    # ── networkidle 대신 domcontentloaded 사용 ─────────────────
+    # networkidle: Instagram/YouTube 같은 SPA에서 절대 종료 안 됨 → 타임아웃 크래시
+    # domcontentloaded: HTML+JS 로드 완료 즉시 진행
+    with timeline.span('goto'):
+        try:
+            page.goto(target, timeout=20000, wait_until='domcontentloaded')
+        except Exception:
+            # 타임아웃이어도 이미 로드된 내용으로 진행
+            pass
+
+    # 동적 콘텐츠 안정화 대기 (DOM 정지 + 요청 수 + 본문 셀렉터, 최대 READY_MAX_WAIT_MS)
+    with timeline.span('readiness'):
+        result['readiness'] = _wait_until_ready(page, target, network)
+    emit('page_loaded', url=target, method='browser', readiness=result['readiness'])
+
+    # ── 스크린샷 캡처 ──────────────────────────────────────────
+    # full_page=True는 매우 긴 페이지에서 메모리 폭발 → clip으로 제한
+    if rules['screenshot']:
+        try:
+            with timeline.span('screenshot'):
+                png = page.screenshot(
                     path=screenshot_file,
                     full_page=False,             # 뷰포트만 캡처 (메모리 절약)
                     clip={'x': 0, 'y': 0, 'width': 1280, 'height': 1800},  # 상단 1800px
                     timeout=15000,
                 )
-                result['screenshot_path'] = screenshot_file
-            except Exception as ss_err:
-                result['error'] = f'스크린샷 실패: {ss_err}'
+            result['screenshot_path'] = screenshot_file
+            emit('screenshot_ready', screenshot_path=screenshot_file)
+            if on_screenshot is not None:
+                on_screenshot(png)
+        except Exception as ss_err:
+            result['error'] = f'스크린샷 실패: {ss_err}'
 
-            # ── 메타데이터 수집 ────────────────────────────────────────
+    # ── 메타데이터·텍스트·링크 수집 (단일 evaluate) ────────────────
+    # 네이버 블로그처럼 본문이 iframe에 있으면 해당 프레임에서 추출
+    extract_started = timeline.now()
+    try:
+        frame = _content_frame(page, extractor)
+        payload = frame.evaluate(_JS_EXTRACT)
+        if frame is not page:
+            # iframe 내부 좌표 → 페이지(스크린샷) 좌표
+            _offset_roi(payload, frame.frame_element().bounding_box())
+        timeline.add('extract', extract_started, frame='content' if frame is not page else 'page')
+    except Exception:
+        timeline.add('extract', extract_started, failed=True)
+        with timeline.span('extract', frame='page'):
             try:
-                result['page_title'] = page.title()
+                payload = page.evaluate(_JS_EXTRACT)
             except Exception:
-                pass
+                payload = {}
+    with timeline.span('disclosure_match'):
+        _apply_extraction(result, payload)
+    _emit_extraction(emit, result)
 
-            try:
-                meta_desc = page.query_selector('meta[name="description"]')
-                if meta_desc:
-                    result['meta_description'] = meta_desc.get_attribute('content') or ''
-                author = page.query_selector('meta[name="author"]')
-                if author:
-                    result['author'] = author.get_attribute('content') or ''
-            except Exception:
-                pass
+    with timeline.span('page_close'):
+        page.close()
 
-            # ── 페이지 텍스트 ──────────────────────────────────────────
-            try:
-                body_text = page.evaluate(
-                    '() => document.body?.innerText?.substring(0, 5000) || ""'
-                )
-            except Exception:
-                body_text = ''
-            result['page_text'] = body_text
-
-            # ── 광고 표시 키워드 검사 ──────────────────────────────────
-            ad_keywords = [
-                '#광고', '#ad', '광고포함', '협찬', '유료광고', '경제적 대가',
-                '소정의 원고료', '대가를 받', '협찬을 받', '#sponsored',
-                '광고 포함', '파트너십', '제휴 링크',
-                # 네이버 블로그 / 크리에이터 어필리에이트 표시
-                '수익이 발생', '수수료가 지급', '수수료를 지급',
-                '크리에이터 활동을 통해', '링크가 포함',
-                '대가성', '원고료를 받', '무상으로 제공',
-                '제품을 제공', '서비스를 제공받', '물품을 제공',
-                # 추가 일반 패턴
-                '이 포스팅은 광고', '이 글은 광고', '광고입니다',
-                '#유료', 'paid partnership', '#partnership',
-                '쿠팡 파트너스', '수익을 얻', '수익이 창출',
-                '활동의 일환', '일정액의 수수료', '소정의 수수료',
-            ]
-            text_lower = body_text.lower()
-            for kw in ad_keywords:
-                if kw.lower() in text_lower:
-                    result['has_ad_disclosure'] = True
-                    break
-
-            # ── 어필리에이트 지표 탐지 ────────────────────────────────
-            aff_indicators = []
-            try:
-                links = page.evaluate('''() => {
-                    return Array.from(document.querySelectorAll('a[href]'))
-                        .map(a => a.href)
-                        .filter(h => /ref=|affiliate|aff_id|utm_|click_id|partner|tracking/i.test(h))
-                        .slice(0, 10);
-                }''')
-                if links:
-                    aff_indicators.append(f'어필리에이트 링크 {len(links)}개 발견')
-            except Exception:
-                pass
 
-            try:
-                discount_patterns = page.evaluate('''() => {
-                    const text = document.body.innerText;
-                    const patterns = text.match(/할인\\s*코드[:\\s]*[A-Za-z0-9]+|쿠폰\\s*코드[:\\s]*[A-Za-z0-9]+|discount\\s*code[:\\s]*[A-Za-z0-9]+/gi);
-                    return patterns ? patterns.slice(0, 5) : [];
-                }''')
-                if discount_patterns:
-                    aff_indicators.append(f'할인/쿠폰 코드 발견: {", ".join(discount_patterns[:3])}')
-            except Exception:
-                pass
+async def _collect_from_page_async(context, url: str, screenshot_file: str, result: dict, rules: dict,
+                                   on_screenshot=None, timeline: Timeline = None):
+    """_collect_from_page의 async Playwright 버전 (capture_many용)"""
+    timeline = timeline or Timeline()
+    with timeline.span('new_page'):
+        page = await context.new_page()
+    page.set_default_timeout(20000)
 
-            try:
-                buy_links = page.evaluate('''() => {
-                    return Array.from(document.querySelectorAll('a'))
-                        .filter(a => /구매|buy|shop|purchase|주문/i.test(a.innerText))
-                        .map(a => ({text: a.innerText.trim().substring(0, 50), href: a.href}))
-                        .slice(0, 5);
-                }''')
-                if buy_links:
-                    aff_indicators.append(f'구매 유도 링크 {len(buy_links)}개 발견')
-            except Exception:
-                pass
+    result['blocked_requests'] = 0
+    if rules['block_resource_types'] or rules['block_trackers']:
+        async def _route(route):
+            request = route.request
+            if _should_block(rules, request.resource_type, request.url):
+                result['blocked_requests'] += 1
+                await route.abort()
+            else:
+                await route.continue_()
+        await page.route('**/*', _route)
 
-            result['affiliate_indicators'] = aff_indicators
+    network = _track_inflight(page)
+    extractor = find_extractor(url)
+    target = _browser_target(url, extractor, rules, result)
 
-            # 명시적 리소스 정리
-            page.close()
-            context.close()
-            browser.close()
-            browser = None
+    with timeline.span('goto'):
+        try:
+            await page.goto(target, timeout=20000, wait_until='domcontentloaded')
+        except Exception:
+            pass
 
-    except Exception as e:
-        result['error'] = str(e)
-    finally:
-        if browser:
+    with timeline.span('readiness'):
+        result['readiness'] = await _wait_until_ready_async(page, target, network)
+
+    if rules['screenshot']:
+        try:
+            with timeline.span('screenshot'):
+                png = await page.screenshot(
+                    path=screenshot_file,
+                    full_page=False,
+                    clip={'x': 0, 'y': 0, 'width': 1280, 'height': 1800},
+                    timeout=15000,
+                )
+            result['screenshot_path'] = screenshot_file
+            if on_screenshot is not None:
+                on_screenshot(png)
+        except Exception as ss_err:
+            result['error'] = f'스크린샷 실패: {ss_err}'
+
+    extract_started = timeline.now()
+    try:
+        frame = _content_frame(page, extractor)
+        payload = await frame.evaluate(_JS_EXTRACT)
+        if frame is not page:
+            _offset_roi(payload, await (await frame.frame_element()).bounding_box())
+        timeline.add('extract', extract_started, frame='content' if frame is not page else 'page')
+    except Exception:
+        timeline.add('extract', extract_started, failed=True)
+        with timeline.span('extract', frame='page'):
             try:
-                browser.close()
+                payload = await page.evaluate(_JS_EXTRACT)
             except Exception:
-                pass
+                payload = {}
+    with timeline.span('disclosure_match'):
+        _apply_extraction(result, payload)
 
-    # 이미지/스티커 내 광고 표시 분석 (Gemini Vision)
-    if result.get('screenshot_path') and not result.get('error'):
-        try:
-            image_analysis = analyze_image_for_ad_disclosure(result['screenshot_path'])
-            result['image_analysis'] = image_analysis
-
-            # 이미지에서 광고 표시가 발견되면 has_ad_disclosure 업데이트
-            if image_analysis.get('image_has_disclosure'):
-                result['has_ad_disclosure'] = True
-                result['ad_disclosure_source'] = 'image'  # 이미지/스티커에서 발견
-                if image_analysis.get('image_disclosure_details'):
-                    result['image_disclosure_details'] = image_analysis['image_disclosure_details']
-            elif result['has_ad_disclosure']:
-                result['ad_disclosure_source'] = 'text'  # 텍스트에서 발견
-        except Exception as e:
-            result['image_analysis'] = {'error': str(e), 'image_analysis_done': False}
+    with timeline.span('page_close'):
+        await page.close()
 
-    # 메타데이터 저장
-    meta_file = os.path.join(save_dir, f'metadata_{domain}_{ts}.json')
-    with open(meta_file, 'w', encoding='utf-8') as f:
-        save_data = {k: v for k, v in result.items() if k != 'page_text'}
-        json.dump(save_data, f, ensure_ascii=False, indent=2)
 
-    return result
+def _apply_extraction(result: dict, payload: dict):
+    """_JS_EXTRACT 결과를 파싱하여 result에 반영 (광고 표시·어필리에이트 지표 판단)"""
+    payload = payload or {}
+    meta = payload.get('meta') or {}
 
+    result['page_title'] = payload.get('title') or ''
+    result['meta_description'] = meta.get('description') or ''
+    result['author'] = meta.get('author') or ''
+    body_text = payload.get('text') or ''
+    result['page_text'] = body_text
+    result['roi_boxes'] = payload.get('roi') or []
 
-def analyze_image_for_ad_disclosure(screenshot_path: str) -> dict:
-    """Gemini Vision으로 스크린샷 내 이미지/스티커 형태의 광고 표시 감지"""
-    result = {
-        'image_has_disclosure': False,
-        'image_disclosure_details': [],
-        'image_analysis_done': False,
-        'error': None,
-    }
+    # ── 광고 표시 키워드 검사 (공용 Aho-Corasick 매처, 1회 순회) ──────
+    # 발견 위치를 인덱스로 남겨 analyze_violation이 텍스트 없이도 판단하도록 함
+    hit_index = build_hit_index(find_disclosures(body_text), 'text', payload.get('regions'))
+    for field in ('description', 'og_description'):
+        hit_index += build_hit_index(find_disclosures(meta.get(field) or ''), 'meta')
+    result['disclosure_hits'] = hit_index
+    if index_has_disclosure(hit_index, 'text'):
+        result['has_ad_disclosure'] = True
 
-    api_key = os.environ.get('GEMINI_API_KEY') or os.environ.get('GOOGLE_API_KEY')
-    if not api_key:
-        result['error'] = 'GEMINI_API_KEY 미설정 — 이미지 분석 건너뜀'
-        return result
+    # ── 어필리에이트 지표 탐지 ────────────────────────────────
+    links = payload.get('links') or []
+    aff_indicators = []
 
-    if not screenshot_path or not os.path.exists(screenshot_path):
-        result['error'] = '스크린샷 파일 없음'
-        return result
+    affiliate_links = [l['href'] for l in links if _AFFILIATE_HREF_RE.search(l.get('href') or '')][:10]
+    if affiliate_links:
+        aff_indicators.append(f'어필리에이트 링크 {len(affiliate_links)}개 발견')
 
-    try:
-        import google.generativeai as genai
+    discount_patterns = payload.get('discounts') or []
+    if discount_patterns:
+        aff_indicators.append(f'할인/쿠폰 코드 발견: {", ".join(discount_patterns[:3])}')
 
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel(
-            'gemini-2.5-flash',
-            generation_config={'max_output_tokens': 1024},
-        )
+    buy_links = [l for l in links if _BUY_TEXT_RE.search(l.get('text') or '')][:5]
+    if buy_links:
+        aff_indicators.append(f'구매 유도 링크 {len(buy_links)}개 발견')
 
-        # 이미지 읽기
-        with open(screenshot_path, 'rb') as f:
-            image_data = f.read()
+    result['affiliate_indicators'] = aff_indicators
 
-        image_part = {
-            'mime_type': 'image/png',
-            'data': base64.b64encode(image_data).decode('utf-8')
-        }
 
-        prompt = """이 웹페이지 스크린샷을 분석하여 **광고/협찬 표시**가 있는지 확인해주세요.
+_VISION_PROMPT = """이 웹페이지 스크린샷을 분석하여 **광고/협찬 표시**가 있는지 확인해주세요.
 
 특히 다음을 집중적으로 확인하세요:
 1. **스티커 형태의 광고 표시** (예: "광고", "협찬", "AD", "Sponsored" 등이 적힌 이미지 스티커)
@@ -259,7 +1192,7 @@ def analyze_image_for_ad_disclosure(screenshot_path: str) -> dict:
 4. **워터마크나 오버레이 형태의 표시**
 5. **"소정의 원고료", "대가를 받고", "경제적 대가" 등의 문구가 이미지에 포함된 경우**
 
-반드시 아래 JSON 형식으로만 응답하세요:
+아래 형식의 JSON으로 응답하세요 (응답 스키마로 강제됨):
 {
   "found": true/false,
   "disclosures": [
@@ -273,65 +1206,261 @@ def analyze_image_for_ad_disclosure(screenshot_path: str) -> dict:
   "confidence": "높음|중간|낮음"
 }"""
 
-        response = model.generate_content([prompt, image_part])
-        response_text = response.text.strip()
+_VISION_ROI_NOTE = """
+
+※ 첨부 이미지 {count}장은 같은 스크린샷에서 광고 표시가 있을 만한 영역만 잘라낸 것입니다
+(본문 상단/하단, 본문 이미지, 작성자 영역, 오버레이). 각 disclosures 항목에
+"region": 해당 이미지 번호(1부터)를 반드시 포함하세요."""
+
+_VISION_RETRY_NOTE = """
+
+※ 이전 응답이 요구한 JSON 형식에 맞지 않았습니다 ({error}). 형식을 정확히 지켜 다시 응답하세요."""
+
+# 스키마 제약 출력 (Gemini responseSchema — OpenAPI 부분집합)
+_VISION_LOCATIONS = ('상단', '중간', '하단', '사이드바')
+
+_VISION_SCHEMA = {
+    'type': 'OBJECT',
+    'properties': {
+        'found': {'type': 'BOOLEAN'},
+        'disclosures': {
+            'type': 'ARRAY',
+            'items': {
+                'type': 'OBJECT',
+                'properties': {
+                    'type': {'type': 'STRING', 'enum': ['스티커', '배너', '텍스트이미지', '워터마크', '기타']},
+                    'content': {'type': 'STRING'},
+                    'location': {'type': 'STRING', 'enum': list(_VISION_LOCATIONS)},
+                    'visibility': {'type': 'STRING', 'enum': ['명확', '작음', '불분명']},
+                    'region': {'type': 'INTEGER'},
+                },
+                'required': ['type', 'content', 'location', 'visibility'],
+            },
+        },
+        'confidence': {'type': 'STRING', 'enum': ['높음', '중간', '낮음']},
+    },
+    'required': ['found', 'disclosures', 'confidence'],
+}
+
+# 형식이 맞지 않는 응답은 1회만 다시 요청
+VISION_PARSE_ATTEMPTS = 2
+
+
+def _parse_vision_response(text: str):
+    """응답 검증 — (analysis dict, None) 또는 (None, 오류 설명)"""
+    if not isinstance(text, str):
+        return None, '빈 응답'
+    # 스키마 미지원 경로 대비로 코드 펜스 제거는 유지
+    text = text.strip().replace('```json', '').replace('```', '').strip()
+    try:
+        analysis = json.loads(text)
+    except json.JSONDecodeError as e:
+        return None, f'JSON 파싱 실패: {e.msg}'
+    if not isinstance(analysis, dict):
+        return None, '최상위가 객체가 아님'
+    if not isinstance(analysis.get('found'), bool):
+        return None, 'found가 boolean이 아님'
+    disclosures = analysis.get('disclosures', [])
+    if not isinstance(disclosures, list) or not all(isinstance(d, dict) for d in disclosures):
+        return None, 'disclosures가 객체 배열이 아님'
+    if any(not isinstance(d.get('content', ''), str) for d in disclosures):
+        return None, 'content가 문자열이 아님'
+    analysis['disclosures'] = disclosures
+    return analysis, None
+
+
+def _vertical_location(box: dict, height: int) -> str:
+    """잘라낸 영역의 세로 위치 → 상단/중간/하단 (height: 잘라낸 원본 이미지 높이)"""
+    center = box['y'] + box['h'] / 2
+    return '상단' if center < height / 3 else ('중간' if center < height * 2 / 3 else '하단')
+
+
+def _image_height(image_source) -> int:
+    """이미지 높이 (헤더만 읽음, image_source: 파일 경로 또는 bytes)"""
+    import io
+    from PIL import Image
 
-        # JSON 파싱
-        response_text = response_text.replace('```json', '').replace('```', '').strip()
-        analysis = json.loads(response_text)
+    fp = io.BytesIO(image_source) if isinstance(image_source, (bytes, bytearray)) else image_source
+    with Image.open(fp) as img:
+        return img.height
+
+
+def _prepare_vision_request(screenshot_path, regions: list = None):
+    """
+    이미지 분석 준비 (API 키·캐시 확인, 모델 입력 이미지 생성)
+    - screenshot_path: 파일 경로 또는 메모리의 PNG bytes
+    - 반환: (result, 요청 정보 dict) — 요청 정보가 None이면 result가 최종 결과
+    """
+    result = {
+        'image_has_disclosure': False,
+        'image_disclosure_details': [],
+        'image_disclosure_items': [],
+        'image_analysis_done': False,
+        'error': None,
+    }
+
+    api_key = os.environ.get('GEMINI_API_KEY') or os.environ.get('GOOGLE_API_KEY')
+    if not api_key:
+        result['error'] = 'GEMINI_API_KEY 미설정 — 이미지 분석 건너뜀'
+        return result, None
 
-        result['image_analysis_done'] = True
-        result['image_has_disclosure'] = analysis.get('found', False)
+    in_memory = isinstance(screenshot_path, (bytes, bytearray))
+    if not screenshot_path or not (in_memory or os.path.exists(screenshot_path)):
+        result['error'] = '스크린샷 파일 없음'
+        return result, None
 
-        if analysis.get('disclosures'):
-            for d in analysis['disclosures']:
-                detail = f"[{d.get('type', '기타')}] {d.get('content', '')} (위치: {d.get('location', '미상')}, 가시성: {d.get('visibility', '미상')})"
-                result['image_disclosure_details'].append(detail)
+    # 거의 같은 스크린샷을 최근에 분석했으면 API 호출 생략
+    cache_namespace = VISION_CACHE_NAMESPACE + (':roi' if regions else ':full')
+    vision_cache, phash = None, None
+    try:
+        from evidence_cache import get_vision_cache, perceptual_hash
+        vision_cache = get_vision_cache()
+        phash = perceptual_hash(screenshot_path)
+        cached = vision_cache.get(phash, cache_namespace)
+        if cached is not None:
+            return cached, None
+    except Exception:
+        vision_cache = None
 
-        result['confidence'] = analysis.get('confidence', '미상')
+    # 관심 영역만 잘라 보내기 (영역이 없거나 너무 넓으면 전체 이미지)
+    crops, source_height = None, None
+    if regions:
+        try:
+            from image_preprocess import crop_regions
+            crops = crop_regions(screenshot_path, regions)
+            source_height = _image_height(screenshot_path) if crops else None
+        except Exception:
+            crops = None
 
-    except json.JSONDecodeError:
-        result['error'] = 'Gemini 응답 파싱 실패'
-        result['image_analysis_done'] = True
-    except ImportError:
-        # google-generativeai 미설치 시 REST API fallback
+    if crops:
+        images = [(data, mime) for data, mime, _ in crops]
+        result['image_encoding'] = {
+            'mode': 'roi',
+            'crops': [box for _, _, box in crops],
+            'bytes': sum(len(data) for data, _ in images),
+        }
+    else:
+        # 모델 입력용 이미지 (축소 + WebP/JPEG 재인코딩, base64 문자열 없이 bytes로 전달)
         try:
-            import urllib.request
-            url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash:generateContent?key={api_key}"
-
-            with open(screenshot_path, 'rb') as f:
-                img_b64 = base64.b64encode(f.read()).decode('utf-8')
-
-            payload = json.dumps({
-                "contents": [{
-                    "parts": [
-                        {"text": "이 웹페이지 스크린샷에서 광고/협찬 표시(스티커, 이미지, 배너 포함)가 있는지 확인해주세요. found(boolean)와 disclosures(배열)를 JSON으로 응답. disclosures 항목: type, content, location, visibility"},
-                        {"inline_data": {"mime_type": "image/png", "data": img_b64}}
-                    ]
-                }]
-            }).encode('utf-8')
-
-            req = urllib.request.Request(url, data=payload, headers={'Content-Type': 'application/json'})
-            with urllib.request.urlopen(req, timeout=30) as resp:
-                api_result = json.loads(resp.read().decode('utf-8'))
-                text = api_result['candidates'][0]['content']['parts'][0]['text']
-                text = text.replace('```json', '').replace('```', '').strip()
-                analysis = json.loads(text)
-
-                result['image_analysis_done'] = True
-                result['image_has_disclosure'] = analysis.get('found', False)
-                if analysis.get('disclosures'):
-                    for d in analysis['disclosures']:
-                        detail = f"[{d.get('type', '기타')}] {d.get('content', '')} (위치: {d.get('location', '미상')})"
-                        result['image_disclosure_details'].append(detail)
-        except Exception as e2:
-            result['error'] = f'REST API fallback 실패: {str(e2)}'
-    except Exception as e:
-        result['error'] = f'이미지 분석 실패: {str(e)}'
+            from image_preprocess import prepare_vision_image
+            image_data, image_mime, encoding = prepare_vision_image(screenshot_path)
+        except Exception as e:
+            # 전처리 실패 시 원본 PNG 그대로 전송
+            if in_memory:
+                image_data = bytes(screenshot_path)
+            else:
+                with open(screenshot_path, 'rb') as f:
+                    image_data = f.read()
+            image_mime = 'image/png'
+            encoding = {'format': 'PNG', 'bytes': len(image_data), 'error': str(e)}
+        encoding['mode'] = 'full'
+        images = [(image_data, image_mime)]
+        result['image_encoding'] = encoding
+
+    request = {
+        'api_key': api_key,
+        'prompt': _VISION_PROMPT + (_VISION_ROI_NOTE.format(count=len(crops)) if crops else ''),
+        'images': images,
+        'crops': crops,
+        'source_height': source_height,
+        'cache': vision_cache,
+        'phash': phash,
+        'namespace': cache_namespace,
+    }
+    return result, request
 
+
+def _complete_vision_request(result: dict, request: dict, analysis: dict = None, error: str = None) -> dict:
+    """검증된 모델 응답 → result 채우기 → 성공 시 캐시 저장"""
+    crops = request['crops']
+    if error is not None:
+        result['error'] = error
+        return result
+
+    result['image_analysis_done'] = True
+    result['image_has_disclosure'] = analysis.get('found', False)
+    result['confidence'] = analysis.get('confidence', '미상')
+    for d in analysis['disclosures']:
+        region = d.get('region')
+        if crops and isinstance(region, int) and 1 <= region <= len(crops):
+            # 잘라낸 영역 번호 → 페이지 좌표
+            box = crops[region - 1][2]
+            d['page_box'] = {k: box[k] for k in ('x', 'y', 'w', 'h')}
+            # 스키마상 필수 값이므로 모델이 enum 밖의 값을 준 경우에만 좌표로 보정
+            if d.get('location') not in _VISION_LOCATIONS:
+                d['location'] = _vertical_location(box, request['source_height'])
+        result['image_disclosure_details'].append(
+            f"[{d.get('type', '기타')}] {d.get('content', '')} "
+            f"(위치: {d.get('location', '미상')}, 가시성: {d.get('visibility', '미상')})"
+        )
+        result['image_disclosure_items'].append(d)
+
+    if request['cache'] is not None:
+        try:
+            request['cache'].put(request['phash'], result, request['namespace'])
+        except Exception:
+            pass
     return result
 
 
+def _parse_failed(result: dict, attempts: int, reason: str) -> str:
+    # 호출 자체는 됐으므로 분석 수행으로 기록 (예전 동작과 동일)
+    result['image_analysis_done'] = True
+    result['vision_attempts'] = attempts
+    return f'Gemini 응답 파싱 실패 (재시도 {attempts - 1}회): {reason}'
+
+
+def analyze_image_for_ad_disclosure(screenshot_path, regions: list = None) -> dict:
+    """
+    Gemini Vision으로 스크린샷 내 이미지/스티커 형태의 광고 표시 감지
+    - screenshot_path: 파일 경로 또는 메모리의 PNG bytes (파이프라인 모드)
+    - regions: 캡처 시 수집한 DOM 관심 영역 박스 — 있으면 해당 영역만 잘라 전송하고
+      발견 항목마다 페이지 좌표(page_box)를 기록
+    - 호출은 전역 클라이언트(gemini_client)를 거쳐 요청률·동시성 제한과 재시도 적용
+    - 스키마 제약 JSON으로 요청하고, 형식이 틀리면 1회 다시 요청
+    """
+    from gemini_client import get_gemini_client
+
+    result, request = _prepare_vision_request(screenshot_path, regions)
+    if request is None:
+        return result
+    client = get_gemini_client(request['api_key'])
+    prompt, reason = request['prompt'], None
+    for attempt in range(1, VISION_PARSE_ATTEMPTS + 1):
+        try:
+            text = client.analyze(prompt, request['images'], response_schema=_VISION_SCHEMA)
+        except Exception as e:
+            return _complete_vision_request(result, request, error=f'이미지 분석 실패: {str(e)}')
+        analysis, reason = _parse_vision_response(text)
+        if analysis is not None:
+            result['vision_attempts'] = attempt
+            return _complete_vision_request(result, request, analysis)
+        prompt = request['prompt'] + _VISION_RETRY_NOTE.format(error=reason)
+    return _complete_vision_request(result, request, error=_parse_failed(result, VISION_PARSE_ATTEMPTS, reason))
+
+
+async def analyze_image_for_ad_disclosure_async(screenshot_path, regions: list = None) -> dict:
+    """analyze_image_for_ad_disclosure의 async 버전 (대기 중 이벤트 루프를 막지 않음)"""
+    from gemini_client import get_gemini_client
+
+    result, request = await asyncio.to_thread(_prepare_vision_request, screenshot_path, regions)
+    if request is None:
+        return result
+    client = get_gemini_client(request['api_key'])
+    prompt, reason = request['prompt'], None
+    for attempt in range(1, VISION_PARSE_ATTEMPTS + 1):
+        try:
+            text = await client.analyze_async(prompt, request['images'], response_schema=_VISION_SCHEMA)
+        except Exception as e:
+            return _complete_vision_request(result, request, error=f'이미지 분석 실패: {str(e)}')
+        analysis, reason = _parse_vision_response(text)
+        if analysis is not None:
+            result['vision_attempts'] = attempt
+            return await asyncio.to_thread(_complete_vision_request, result, request, analysis)
+        prompt = request['prompt'] + _VISION_RETRY_NOTE.format(error=reason)
+    return _complete_vision_request(result, request, error=_parse_failed(result, VISION_PARSE_ATTEMPTS, reason))
+
+
 def analyze_violation(evidence: dict) -> dict:
     """수집된 증거를 분석하여 위반 유형 판단"""
     analysis = {
@@ -365,8 +1494,17 @@ def analyze_violation(evidence: dict) -> dict:
             '표시·광고의 공정화에 관한 법률 제3조 위반 가능성이 있습니다.'
         )
     elif has_affiliate and has_disclosure:
-        # 이미지/스티커에서만 광고 표시가 발견된 경우
-        if disclosure_source == 'image' and image_details:
+        # 텍스트 첫부분 표시 여부 — 수집 시 만든 발견 인덱스로 판단
+        # (인덱스가 없는 예전 증거는 page_text를 재검색)
+        hit_index = evidence.get('disclosure_hits')
+        if hit_index is not None:
+            ad_in_first = index_has_prominent(hit_index, FIRST_PART_CHARS, 'text')
+        else:
+            text = evidence.get('page_text', '')
+            ad_in_first = has_prominent_disclosure(find_disclosures(text), FIRST_PART_CHARS)
+
+        # 이미지/스티커에서만 광고 표시가 발견된 경우 (본문 첫부분 표시가 있으면 그쪽이 우선)
+        if disclosure_source == 'image' and image_details and not ad_in_first:
             analysis['disclosure_method'] = 'image'
             analysis['image_disclosure_details'] = image_details
 
@@ -390,15 +1528,7 @@ def analyze_violation(evidence: dict) -> dict:
                     '다만 텍스트가 아닌 이미지 형태이므로 가시성이 충분한지 추가 확인을 권장합니다.'
                 )
         else:
-            # 텍스트에서 발견된 경우 — 기존 로직
-            text = evidence.get('page_text', '')
-            first_500 = text[:500].lower()
-            ad_in_first = any(kw.lower() in first_500 for kw in [
-                '#광고', '#ad', '협찬', '유료광고',
-                '수익이 발생', '수수료가 지급', '크리에이터 활동',
-                '링크가 포함', '광고입니다', '대가성',
-                '일정액의 수수료', '소정의 수수료',
-            ])
+            # 텍스트에서 발견된 경우
             if not ad_in_first:
                 analysis['violation_detected'] = True
                 analysis['violation_types'].append('경제적 이해관계 표시 위치 부적절 (게시물 첫부분 미표시)')
@@ -417,6 +1547,10 @@ def analyze_violation(evidence: dict) -> dict:
             '직접 콘텐츠를 확인하여 경제적 이해관계 여부를 판단해주세요.'
         )
 
+    # 어느 단계에서 판정했는지 (텍스트 단계에서 끝나면 이미지 분석 없음)
+    if evidence.get('decision'):
+        analysis['decision'] = evidence['decision']
+
     # 이미지 분석 메타 추가
     if image_analysis.get('image_analysis_done'):
         analysis['image_analysis_performed'] = True
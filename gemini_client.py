@@ -0,0 +1,367 @@
+"""
+Gemini Vision 클라이언트 모듈
+- 프로세스 전역 클라이언트 1개: SDK 설정·모델 객체·HTTP 연결을 재사용
+- 토큰 버킷 요청률 제한 + 동시 요청 수 제한 (sync/async 공용, 스레드 안전)
+- 429/5xx·시간 초과만 지수 백오프(full jitter)로 재시도, Retry-After 헤더 존중
+- google-generativeai 미설치 시 REST(requests.Session 연결 풀)로 호출
+- response_schema를 주면 스키마 제약 JSON 출력 요청
+- GEMINI_API_BASE 환경변수로 REST 엔드포인트 변경 (예: gemini_stub_server 로컬 대역 서버)
+"""
+import os
+import time
+import base64
+import random
+import asyncio
+import threading
+from collections import deque
+from typing import List, Optional, Tuple
+
+GEMINI_MODEL = 'gemini-2.5-flash'
+GEMINI_API_BASE_DEFAULT = 'https://generativelanguage.googleapis.com/v1beta'
+GEMINI_API_BASE = os.environ.get('GEMINI_API_BASE', GEMINI_API_BASE_DEFAULT).rstrip('/')
+
+DEFAULT_RPM = float(os.environ.get('AD_REPORT_GEMINI_RPM', '60'))              # 분당 요청 수
+DEFAULT_BURST = int(os.environ.get('AD_REPORT_GEMINI_BURST', '5'))
+DEFAULT_MAX_INFLIGHT = int(os.environ.get('AD_REPORT_GEMINI_MAX_INFLIGHT', '4'))
+DEFAULT_MAX_RETRIES = int(os.environ.get('AD_REPORT_GEMINI_MAX_RETRIES', '4'))
+REQUEST_TIMEOUT = 30
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 30.0
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# (bytes, mime) 목록
+Images = List[Tuple[bytes, str]]
+
+
+class GeminiError(Exception):
+    """Gemini 호출 실패 (status: HTTP 상태 코드, 알 수 없으면 None / timeout: 응답 시간 초과)"""
+
+    def __init__(self, message: str, status: Optional[int] = None, retry_after: Optional[float] = None,
+                 timeout: bool = False):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+        self.timeout = timeout
+
+    @property
+    def retryable(self) -> bool:
+        # 상태 코드 없는 오류(인증·요청 형식·차단된 응답 등)는 다시 보내도 같은 결과
+        return self.timeout or self.status in RETRY_STATUSES
+
+
+# SDK(google.api_core 등)가 시간 초과에 쓰는 예외 이름
+_TIMEOUT_ERRORS = ('DeadlineExceeded', 'Timeout', 'ReadTimeout', 'ConnectTimeout')
+
+
+class InflightSlots:
+    """
+    동시 요청 수 제한 — 스레드(acquire)·이벤트 루프(acquire_async) 공용
+    - 반납 시 가장 오래 기다린 대기자에게 슬롯을 바로 넘김 (폴링 없음)
+    """
+
+    def __init__(self, limit: int):
+        self.limit = max(1, limit)
+        self._active = 0
+        self._lock = threading.Lock()
+        self._waiters = deque()     # threading.Event 또는 (loop, asyncio.Future)
+
+    def acquire(self):
+        with self._lock:
+            if self._active < self.limit and not self._waiters:
+                self._active += 1
+                return
+            event = threading.Event()
+            self._waiters.append(event)
+        event.wait()
+
+    async def acquire_async(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._active < self.limit and not self._waiters:
+                self._active += 1
+                return
+            waiter = (loop, loop.create_future())
+            self._waiters.append(waiter)
+        try:
+            await waiter[1]
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                    raise
+            # 이미 슬롯을 넘겨받았으면 반납 (넘기는 중이면 _grant가 반납)
+            if waiter[1].done() and not waiter[1].cancelled():
+                self.release()
+            raise
+
+    def release(self):
+        with self._lock:
+            if not self._waiters:
+                self._active -= 1
+                return
+            waiter = self._waiters.popleft()
+        # 슬롯은 _active를 줄이지 않고 그대로 대기자에게 넘김
+        if isinstance(waiter, threading.Event):
+            waiter.set()
+        else:
+            loop, future = waiter
+            try:
+                loop.call_soon_threadsafe(self._grant, future)
+            except RuntimeError:    # 루프가 이미 닫힘
+                self.release()
+
+    def _grant(self, future):
+        if future.cancelled():
+            self.release()
+        else:
+            future.set_result(None)
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class TokenBucket:
+    """토큰 버킷 — rate(개/초)로 채워지고 최대 capacity개까지 모아 둘 수 있음"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _take(self) -> float:
+        """토큰 1개를 가져가면 0, 부족하면 기다려야 할 시간(초)"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self):
+        while True:
+            wait = self._take()
+            if not wait:
+                return
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        while True:
+            wait = self._take()
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+    def drain(self):
+        """429 응답 시 모아 둔 토큰을 비워 다른 호출도 속도를 늦추게 함"""
+        with self._lock:
+            self._tokens = min(self._tokens, 0.0)
+
+
+def _backoff(attempt: int, retry_after: Optional[float]) -> float:
+    if retry_after:
+        return min(BACKOFF_MAX, retry_after) + random.uniform(0, BACKOFF_BASE)
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+
+class GeminiVisionClient:
+    """
+    이미지 + 프롬프트 → 응답 텍스트
+    - analyze(): 호출 스레드에서 실행 (수집 풀 스레드 등)
+    - analyze_async(): 대기(요청률·동시성·백오프)는 이벤트 루프에서, HTTP 호출만 스레드에서
+    """
+
+    def __init__(self, api_key: str, model: str = GEMINI_MODEL, rpm: float = DEFAULT_RPM,
+                 burst: int = DEFAULT_BURST, max_inflight: int = DEFAULT_MAX_INFLIGHT,
+                 max_retries: int = DEFAULT_MAX_RETRIES, api_base: str = GEMINI_API_BASE):
+        self.api_key = api_key
+        self.model_name = model
+        self.api_base = api_base.rstrip('/')
+        self.max_retries = max_retries
+        self.max_inflight = max_inflight
+        self._bucket = TokenBucket(rpm / 60.0, burst)
+        self._slots = InflightSlots(max_inflight)
+        self._stats_lock = threading.Lock()
+        self._stats = {'requests': 0, 'retries': 0, 'rate_limited': 0, 'failures': 0}
+        self._model = None
+        self._session = None
+        self._transport = self._init_transport()
+
+    # ── 전송 계층 ───────────────────────────────────────────────
+    def _init_transport(self) -> str:
+        try:
+            if self.api_base != GEMINI_API_BASE_DEFAULT:
+                # SDK는 gRPC 엔드포인트 고정 → 다른 엔드포인트는 REST로만 호출
+                raise ImportError
+            import google.generativeai as genai
+        except ImportError:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            self._session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(4, self.max_inflight))
+            self._session.mount('https://', adapter)
+            self._session.mount('http://', adapter)
+            return 'rest'
+
+        genai.configure(api_key=self.api_key)
+        self._model = genai.GenerativeModel(self.model_name)
+        return 'sdk'
+
+    def _call_sdk(self, prompt: str, images: Images, max_output_tokens: int, response_schema: dict) -> str:
+        parts = [prompt] + [{'mime_type': mime, 'data': data} for data, mime in images]
+        config = {'max_output_tokens': max_output_tokens}
+        if response_schema:
+            config.update(response_mime_type='application/json', response_schema=response_schema)
+        try:
+            response = self._model.generate_content(
+                parts,
+                generation_config=config,
+                request_options={'timeout': REQUEST_TIMEOUT},
+            )
+            return response.text
+        except Exception as e:
+            code = getattr(e, 'code', None)
+            status = int(code) if isinstance(code, int) else None
+            timeout = isinstance(e, TimeoutError) or type(e).__name__ in _TIMEOUT_ERRORS
+            raise GeminiError(str(e) or type(e).__name__, status, timeout=timeout) from e
+
+    def _call_rest(self, prompt: str, images: Images, max_output_tokens: int, response_schema: dict) -> str:
+        import requests
+
+        parts = [{'text': prompt}]
+        for data, mime in images:
+            parts.append({'inline_data': {'mime_type': mime, 'data': base64.b64encode(data).decode('ascii')}})
+        body = {
+            'contents': [{'parts': parts}],
+            'generationConfig': {'maxOutputTokens': max_output_tokens},
+        }
+        if response_schema:
+            body['generationConfig'].update(responseMimeType='application/json', responseSchema=response_schema)
+        url = f'{self.api_base}/models/{self.model_name}:generateContent'
+        try:
+            resp = self._session.post(url, json=body, headers={'x-goog-api-key': self.api_key},
+                                      timeout=REQUEST_TIMEOUT)
+        except requests.Timeout as e:
+            raise GeminiError(f'응답 시간 초과: {e}', timeout=True) from e
+        except requests.RequestException as e:
+            raise GeminiError(f'연결 실패: {e}') from e
+
+        if resp.status_code != 200:
+            retry_after = resp.headers.get('Retry-After')
+            raise GeminiError(
+                f'HTTP {resp.status_code}: {resp.text[:200]}',
+                resp.status_code,
+                float(retry_after) if retry_after and retry_after.isdigit() else None,
+            )
+        try:
+            return resp.json()['candidates'][0]['content']['parts'][0]['text']
+        except (ValueError, KeyError, IndexError) as e:
+            raise GeminiError(f'응답 형식 오류: {e}', 200) from e
+
+    def _call(self, prompt: str, images: Images, max_output_tokens: int, response_schema: dict) -> str:
+        self._count('requests')
+        if self._transport == 'sdk':
+            return self._call_sdk(prompt, images, max_output_tokens, response_schema)
+        return self._call_rest(prompt, images, max_output_tokens, response_schema)
+
+    # ── 재시도 ─────────────────────────────────────────────────
+    def _on_error(self, e: GeminiError, attempt: int) -> float:
+        """재시도할 대기 시간 반환, 더 이상 재시도하지 않으면 예외 재발생"""
+        if e.status == 429:
+            self._count('rate_limited')
+            self._bucket.drain()
+        if not e.retryable or attempt >= self.max_retries:
+            self._count('failures')
+            raise e
+        self._count('retries')
+        return _backoff(attempt, e.retry_after)
+
+    def analyze(self, prompt: str, images: Images, max_output_tokens: int = 1024,
+                response_schema: dict = None) -> str:
+        attempt = 0
+        while True:
+            with self._slots:
+                self._bucket.acquire()
+                try:
+                    return self._call(prompt, images, max_output_tokens, response_schema)
+                except GeminiError as e:
+                    delay = self._on_error(e, attempt)
+            # 백오프 동안에는 슬롯을 반납해 다른 요청이 진행되도록 함
+            time.sleep(delay)
+            attempt += 1
+
+    async def analyze_async(self, prompt: str, images: Images, max_output_tokens: int = 1024,
+                            response_schema: dict = None) -> str:
+        attempt = 0
+        while True:
+            await self._slots.acquire_async()
+            try:
+                await self._bucket.acquire_async()
+            except BaseException:
+                self._slots.release()
+                raise
+            try:
+                return await self._call_in_thread(prompt, images, max_output_tokens, response_schema)
+            except GeminiError as e:
+                delay = self._on_error(e, attempt)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def _call_in_thread(self, *args) -> str:
+        """
+        슬롯을 쥔 채 스레드에서 _call 실행 — 슬롯 반납은 스레드가 끝날 때
+        (태스크가 취소돼도 진행 중인 API 호출은 동시 요청 수에 계속 포함, 시작 전에 취소되면 바로 반납)
+        """
+        lock = threading.Lock()
+        state = {'started': False, 'abandoned': False}
+
+        def run():
+            with lock:
+                if state['abandoned']:
+                    return None
+                state['started'] = True
+            try:
+                return self._call(*args)
+            finally:
+                self._slots.release()
+
+        try:
+            return await asyncio.to_thread(run)
+        except asyncio.CancelledError:
+            with lock:
+                state['abandoned'] = True
+                started = state['started']
+            if not started:
+                self._slots.release()
+            raise
+
+    # ── 상태 ───────────────────────────────────────────────────
+    def _count(self, key: str):
+        with self._stats_lock:
+            self._stats[key] += 1
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return dict(self._stats, transport=self._transport, model=self.model_name)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_gemini_client(api_key: str) -> GeminiVisionClient:
+    """프로세스 전역 Gemini 클라이언트 (API 키가 바뀌면 새로 생성)"""
+    global _client
+    with _client_lock:
+        if _client is None or _client.api_key != api_key:
+            _client = GeminiVisionClient(api_key)
+        return _client
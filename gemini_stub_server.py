@@ -0,0 +1,274 @@
+"""
+Gemini REST 엔드포인트 로컬 대역 서버 (녹화/재생)
+- POST .../models/{model}:generateContent 를 흉내 — 실제 API 없이 부하·장애 처리 시험
+- 재생: 녹화 파일(JSONL)에서 같은 요청의 응답을, 없으면 순서대로 돌려줌
+  (녹화 파일이 없으면 스키마에 맞는 기본 응답 사용)
+- 녹화: --record 시 실제 엔드포인트로 전달하고 응답을 녹화 파일에 추가
+- 지연(평균 + 지터)과 429 / 503 / 형식 오류 응답 비율을 설정 가능
+- GET /stats: 처리 건수 통계
+
+사용 예:
+    python gemini_stub_server.py --port 8765 --latency-ms 800 --jitter-ms 300 --rate-limit-rate 0.05
+    GEMINI_API_BASE=http://127.0.0.1:8765/v1beta GEMINI_API_KEY=stub streamlit run app.py
+"""
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+UPSTREAM_API_BASE = 'https://generativelanguage.googleapis.com/v1beta'
+
+# 녹화 파일이 없을 때 번갈아 돌려주는 기본 응답 (evidence_collector의 응답 스키마 형식)
+_DEFAULT_ANSWERS = [
+    {'found': True, 'confidence': '높음', 'disclosures': [
+        {'type': '스티커', 'content': '광고', 'location': '상단', 'visibility': '명확', 'region': 1},
+    ]},
+    {'found': False, 'confidence': '중간', 'disclosures': []},
+]
+
+_MALFORMED_TEXT = '{"found": true, "disclosures": [{"type": "스티커", "content": '
+
+
+def _response_body(text: str) -> dict:
+    return {
+        'candidates': [{'content': {'role': 'model', 'parts': [{'text': text}]}, 'finishReason': 'STOP'}],
+        'usageMetadata': {'promptTokenCount': 0, 'candidatesTokenCount': 0},
+    }
+
+
+def request_key(path: str, body: dict) -> str:
+    """녹화 조회 키 — 모델 경로 + 텍스트 파트 + 이미지 파트 해시 (API 키·생성 설정 제외)"""
+    h = hashlib.sha256(path.split('?')[0].encode('utf-8'))
+    for content in body.get('contents', []):
+        for part in content.get('parts', []):
+            if 'text' in part:
+                h.update(part['text'].encode('utf-8'))
+            inline = part.get('inline_data') or part.get('inlineData')
+            if inline:
+                h.update(hashlib.sha256(inline.get('data', '').encode('ascii')).digest())
+    return h.hexdigest()
+
+
+class GeminiStubServer:
+    """
+    대역 서버 (백그라운드 스레드)
+    - start() 후 base_url을 GEMINI_API_BASE로 사용
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, recordings: str = None,
+                 record: bool = False, upstream: str = UPSTREAM_API_BASE,
+                 latency_ms: float = 0, jitter_ms: float = 0, rate_limit_rate: float = 0,
+                 error_rate: float = 0, malformed_rate: float = 0, seed: int = None):
+        self.recordings_path = recordings
+        self.record = record
+        self.upstream = upstream.rstrip('/')
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rate_limit_rate = rate_limit_rate
+        self.error_rate = error_rate
+        self.malformed_rate = malformed_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._by_key = {}
+        self._sequence = []
+        self._cursor = 0
+        self._stats = {'requests': 0, 'replayed': 0, 'recorded': 0, 'default': 0,
+                       'rate_limited': 0, 'errors': 0, 'malformed': 0}
+        self._load_recordings()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}/v1beta'
+
+    # ── 녹화 파일 ───────────────────────────────────────────────
+    def _load_recordings(self):
+        if not self.recordings_path:
+            return
+        try:
+            with open(self.recordings_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    entry = json.loads(line)
+                    self._by_key[entry['key']] = entry
+                    if entry.get('status') == 200:
+                        self._sequence.append(entry)
+        except FileNotFoundError:
+            if not self.record:
+                raise
+
+    def _append_recording(self, entry: dict):
+        with self._lock:
+            self._by_key[entry['key']] = entry
+            if entry['status'] == 200:
+                self._sequence.append(entry)
+            with open(self.recordings_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+    # ── 응답 결정 ───────────────────────────────────────────────
+    def _count(self, key: str):
+        with self._lock:
+            self._stats[key] += 1
+
+    def _injected_fault(self):
+        """설정한 비율로 장애 응답 (status, body, headers) 또는 None"""
+        with self._lock:
+            roll = self._random.random()
+        if roll < self.rate_limit_rate:
+            self._count('rate_limited')
+            return 429, {'error': {'code': 429, 'status': 'RESOURCE_EXHAUSTED', 'message': 'stub quota'}}, {'Retry-After': '1'}
+        roll -= self.rate_limit_rate
+        if roll < self.error_rate:
+            self._count('errors')
+            return 503, {'error': {'code': 503, 'status': 'UNAVAILABLE', 'message': 'stub overload'}}, {}
+        roll -= self.error_rate
+        if roll < self.malformed_rate:
+            self._count('malformed')
+            return 200, _response_body(_MALFORMED_TEXT), {}
+        return None
+
+    def _replay(self, key: str):
+        with self._lock:
+            entry = self._by_key.get(key)
+            if entry is None and self._sequence:
+                entry = self._sequence[self._cursor % len(self._sequence)]
+                self._cursor += 1
+            if entry is None:
+                answer = _DEFAULT_ANSWERS[self._cursor % len(_DEFAULT_ANSWERS)]
+                self._cursor += 1
+        if entry is not None:
+            self._count('replayed')
+            return entry['status'], entry['body']
+        self._count('default')
+        return 200, _response_body(json.dumps(answer, ensure_ascii=False))
+
+    def _forward(self, path: str, raw: bytes, api_key: str):
+        import requests
+
+        resp = requests.post(self.upstream + path[len('/v1beta'):], data=raw, timeout=60,
+                             headers={'Content-Type': 'application/json', 'x-goog-api-key': api_key or ''})
+        try:
+            body = resp.json()
+        except ValueError:
+            body = {'error': {'code': resp.status_code, 'message': resp.text[:500]}}
+        return resp.status_code, body
+
+    def handle_generate(self, path: str, raw: bytes, api_key: str):
+        self._count('requests')
+        delay = self.latency_ms + (self._random.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0)
+        if delay > 0:
+            time.sleep(delay / 1000)
+
+        fault = self._injected_fault()
+        if fault is not None:
+            return fault
+
+        body = json.loads(raw or b'{}')
+        key = request_key(path, body)
+        if self.record:
+            status, resp_body = self._forward(path, raw, api_key)
+            self._append_recording({'key': key, 'status': status, 'body': resp_body, 'recorded_at': time.time()})
+            self._count('recorded')
+            return status, resp_body, {}
+        status, resp_body = self._replay(key)
+        return status, resp_body, {}
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats, recordings=len(self._by_key))
+
+    # ── HTTP ───────────────────────────────────────────────────
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def _send(self, status: int, body: dict, headers: dict = None):
+                data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(data)))
+                for k, v in (headers or {}).items():
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                raw = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+                path = self.path.split('?')[0]
+                if not path.endswith(':generateContent'):
+                    self._send(404, {'error': {'code': 404, 'message': f'unknown path {path}'}})
+                    return
+                try:
+                    status, body, headers = stub.handle_generate(path, raw, self.headers.get('x-goog-api-key'))
+                except Exception as e:
+                    status, body, headers = 500, {'error': {'code': 500, 'message': str(e)}}, {}
+                self._send(status, body, headers)
+
+            def do_GET(self):
+                if self.path.split('?')[0] == '/stats':
+                    self._send(200, stub.stats())
+                else:
+                    self._send(404, {'error': {'code': 404, 'message': 'not found'}})
+
+            def log_message(self, fmt, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> 'GeminiStubServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, name='gemini-stub', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Gemini REST 로컬 대역 서버 (녹화/재생)')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--recordings', help='녹화 파일 (JSONL)')
+    parser.add_argument('--record', action='store_true', help='실제 엔드포인트로 전달하고 응답을 녹화')
+    parser.add_argument('--upstream', default=UPSTREAM_API_BASE)
+    parser.add_argument('--latency-ms', type=float, default=0)
+    parser.add_argument('--jitter-ms', type=float, default=0)
+    parser.add_argument('--rate-limit-rate', type=float, default=0, help='429 응답 비율 (0~1)')
+    parser.add_argument('--error-rate', type=float, default=0, help='503 응답 비율 (0~1)')
+    parser.add_argument('--malformed-rate', type=float, default=0, help='형식이 깨진 200 응답 비율 (0~1)')
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+
+    if args.record and not args.recordings:
+        parser.error('--record에는 --recordings 경로가 필요합니다')
+
+    stub = GeminiStubServer(
+        host=args.host, port=args.port, recordings=args.recordings, record=args.record,
+        upstream=args.upstream, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+        rate_limit_rate=args.rate_limit_rate, error_rate=args.error_rate,
+        malformed_rate=args.malformed_rate, seed=args.seed,
+    )
+    print(f'Gemini 대역 서버: {stub.base_url}  (GEMINI_API_BASE로 지정)')
+    try:
+        stub.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(json.dumps(stub.stats(), ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
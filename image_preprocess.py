@@ -0,0 +1,171 @@
+"""
+이미지 전처리 모듈 (Gemini Vision 입력용)
+- 긴 변 기준 축소 → WebP/JPEG 재인코딩으로 업로드 크기 축소
+- 선택적으로 작은 글씨가 밀집된 영역(또는 전체)을 흑백 변환
+- 적용한 인코딩 파라미터를 함께 반환 (분석 결과에 기록 → 감사 가능)
+"""
+import io
+import os
+from typing import Tuple
+
+VISION_LONG_EDGE = int(os.environ.get('AD_REPORT_VISION_LONG_EDGE', '1280'))
+VISION_FORMAT = os.environ.get('AD_REPORT_VISION_FORMAT', 'WEBP').upper()     # WEBP | JPEG
+VISION_QUALITY = int(os.environ.get('AD_REPORT_VISION_QUALITY', '80'))
+VISION_GRAYSCALE = os.environ.get('AD_REPORT_VISION_GRAYSCALE', 'none')        # none | text | all
+
+# 'text' 모드: 이 높이의 가로 띠마다 윤곽선 밀도를 보고 글씨가 빽빽하면 흑백 처리
+_TEXT_BAND_HEIGHT = 48
+_TEXT_EDGE_THRESHOLD = 18
+
+_MIME = {'WEBP': 'image/webp', 'JPEG': 'image/jpeg', 'PNG': 'image/png'}
+
+
+def _webp_supported() -> bool:
+    from PIL import features
+    return bool(features.check('webp'))
+
+
+def _grayscale_text_bands(img):
+    """윤곽선 밀도가 높은(작은 글씨가 많은) 가로 띠만 흑백으로 변환"""
+    from PIL import ImageFilter, ImageStat
+
+    edges = img.convert('L').filter(ImageFilter.FIND_EDGES)
+    bands = 0
+    for top in range(0, img.height, _TEXT_BAND_HEIGHT):
+        box = (0, top, img.width, min(img.height, top + _TEXT_BAND_HEIGHT))
+        if ImageStat.Stat(edges.crop(box)).mean[0] >= _TEXT_EDGE_THRESHOLD:
+            img.paste(img.crop(box).convert('L').convert('RGB'), box[:2])
+            bands += 1
+    return bands
+
+
+def prepare_vision_image(image_source, long_edge: int = VISION_LONG_EDGE, fmt: str = VISION_FORMAT,
+                         quality: int = VISION_QUALITY, grayscale: str = VISION_GRAYSCALE) -> Tuple[bytes, str, dict]:
+    """
+    모델 입력용 이미지 생성
+    - image_source: 파일 경로, bytes 또는 PIL Image
+    - 반환: (인코딩된 bytes, MIME 타입, 인코딩 파라미터 dict)
+    """
+    from PIL import Image
+
+    fmt = fmt.upper()
+    if fmt == 'WEBP' and not _webp_supported():
+        fmt = 'JPEG'
+
+    if isinstance(image_source, Image.Image):
+        original_bytes = None
+        original_size = image_source.size
+        img = image_source.convert('RGB')
+    else:
+        if isinstance(image_source, (bytes, bytearray)):
+            original_bytes = len(image_source)
+            fp = io.BytesIO(image_source)
+        else:
+            original_bytes = os.path.getsize(image_source)
+            fp = image_source
+        with Image.open(fp) as src:
+            original_size = src.size
+            img = src.convert('RGB')
+
+    scale = min(1.0, long_edge / max(img.size)) if long_edge else 1.0
+    if scale < 1.0:
+        img = img.resize((max(1, round(img.width * scale)), max(1, round(img.height * scale))), Image.LANCZOS)
+
+    gray_bands = 0
+    if grayscale == 'all':
+        img = img.convert('L')
+    elif grayscale == 'text':
+        gray_bands = _grayscale_text_bands(img)
+
+    out = io.BytesIO()
+    if fmt == 'PNG':
+        img.save(out, 'PNG', optimize=True)
+    else:
+        img.save(out, fmt, quality=quality, **({'method': 4} if fmt == 'WEBP' else {'optimize': True}))
+    data = out.getvalue()
+
+    params = {
+        'format': fmt,
+        'quality': quality if fmt != 'PNG' else None,
+        'long_edge': long_edge,
+        'scale': round(scale, 4),
+        'width': img.width,
+        'height': img.height,
+        'original_width': original_size[0],
+        'original_height': original_size[1],
+        'grayscale': grayscale,
+        'grayscale_bands': gray_bands,
+        'bytes': len(data),
+        'original_bytes': original_bytes,
+    }
+    return data, _MIME[fmt], params
+
+
+# ── 관심 영역(ROI) 잘라내기 ─────────────────────────────────────
+# 캡처 시 수집한 DOM 박스(본문 이미지, 본문 상·하단 띠, 오버레이)만 모델에 전송
+ROI_MAX_CROPS = 6
+ROI_MIN_SIDE = 24               # 이보다 작은 박스는 무시 (px)
+ROI_MERGE_GAP = 16              # 이 간격 이내로 붙은 박스는 하나로 합침 (px)
+ROI_MAX_COVERAGE = 0.6          # 잘라낸 면적이 전체의 60%를 넘으면 전체 이미지 전송이 나음
+ROI_LONG_EDGE = 768
+
+
+def _clip_box(box: dict, width: int, height: int):
+    x0 = max(0, int(box['x']))
+    y0 = max(0, int(box['y']))
+    x1 = min(width, int(box['x'] + box['w']))
+    y1 = min(height, int(box['y'] + box['h']))
+    if x1 - x0 < ROI_MIN_SIDE or y1 - y0 < ROI_MIN_SIDE:
+        return None
+    return [x0, y0, x1, y1, [box.get('kind', 'region')]]
+
+
+def _merge_boxes(boxes: list) -> list:
+    """겹치거나 가까운 박스를 합침 (kind 목록 유지)"""
+    merged = []
+    for b in sorted(boxes, key=lambda b: (b[1], b[0])):
+        for m in merged:
+            if (b[0] <= m[2] + ROI_MERGE_GAP and m[0] <= b[2] + ROI_MERGE_GAP
+                    and b[1] <= m[3] + ROI_MERGE_GAP and m[1] <= b[3] + ROI_MERGE_GAP):
+                m[0], m[1] = min(m[0], b[0]), min(m[1], b[1])
+                m[2], m[3] = max(m[2], b[2]), max(m[3], b[3])
+                m[4] = sorted(set(m[4] + b[4]))
+                break
+        else:
+            merged.append(list(b))
+    return merged
+
+
+def crop_regions(image_source, boxes: list, long_edge: int = ROI_LONG_EDGE, fmt: str = VISION_FORMAT,
+                 quality: int = VISION_QUALITY):
+    """
+    DOM 박스로 스크린샷을 잘라 모델 입력 목록 생성
+    - boxes: [{'kind', 'x', 'y', 'w', 'h'}] (페이지 좌표 = 스크린샷 좌표)
+    - 반환: [(bytes, mime, 페이지 좌표 box dict)] 또는 None (ROI가 부적합하면 전체 이미지 사용)
+    """
+    from PIL import Image
+
+    if not boxes:
+        return None
+    fp = io.BytesIO(image_source) if isinstance(image_source, (bytes, bytearray)) else image_source
+    with Image.open(fp) as src:
+        img = src.convert('RGB')
+
+    clipped = [c for c in (_clip_box(b, img.width, img.height) for b in boxes) if c]
+    # 합친 뒤 다시 합쳐질 수 있으므로 변화가 없을 때까지 반복
+    merged = _merge_boxes(clipped)
+    while len(merged) != len(clipped):
+        clipped, merged = merged, _merge_boxes(merged)
+    if not merged:
+        return None
+
+    covered = sum((m[2] - m[0]) * (m[3] - m[1]) for m in merged)
+    if len(merged) > ROI_MAX_CROPS or covered > img.width * img.height * ROI_MAX_COVERAGE:
+        return None
+
+    crops = []
+    for x0, y0, x1, y1, kinds in merged:
+        data, mime, _ = prepare_vision_image(img.crop((x0, y0, x1, y1)), long_edge=long_edge, fmt=fmt,
+                                             quality=quality, grayscale='none')
+        crops.append((data, mime, {'x': x0, 'y': y0, 'w': x1 - x0, 'h': y1 - y0, 'kinds': kinds}))
+    return crops
@@ -0,0 +1,195 @@
+"""
+메모리(RSS) 감시 모듈
+- 현재 프로세스 + 자식 프로세스(Chromium, Playwright 드라이버) RSS 합계를 /proc에서 읽음
+- 단계(capture / vision / generate_report)마다 백그라운드 샘플링 → 시작·최고·종료 RSS 기록
+- 소프트 한도: 수집 시작 시 넘었으면 더 가벼운 수집 프로파일로 낮춤
+- 하드 한도: 단계 진행 중 넘으면 콜백 실행(브라우저 프로세스 강제 종료 → 풀이 재시작)
+  및 check()에서 MemoryLimitExceeded 발생
+"""
+import os
+import signal
+import threading
+
+# 측정 대상은 수집을 실행하는 프로세스 트리 — 격리 방식(AD_REPORT_CAPTURE_ISOLATION)에 따라 기본값이 다름
+# - process: 수집 워커 1개(+ Chromium) 기준. 하드 한도는 워커 상한(capture_workers.DEFAULT_RSS_LIMIT_MB,
+#   700MB)보다 낮아야 감독자가 워커를 강제 종료하기 전에 워커 안에서 브라우저 재시작·부분 결과 반환이 먼저 일어남
+# - thread: Streamlit 서버 프로세스 전체(세션 상태 + Chromium) 기준이라 서버 평소 사용량만으로 넘지 않도록 높게
+_THREAD_MODE = os.environ.get('AD_REPORT_CAPTURE_ISOLATION', 'process') == 'thread'
+SOFT_LIMIT_MB = int(os.environ.get('AD_REPORT_MEM_SOFT_MB', '1200' if _THREAD_MODE else '450'))
+HARD_LIMIT_MB = int(os.environ.get('AD_REPORT_MEM_HARD_MB', '1600' if _THREAD_MODE else '600'))
+SAMPLE_INTERVAL = 0.25
+
+# 소프트 한도 초과 시 한 단계 가벼운 프로파일 (evidence_collector.CAPTURE_PROFILES)
+PROFILE_DOWNGRADE = {'full': 'screenshot', 'screenshot': 'text_only'}
+
+_BROWSER_COMM = ('chrome', 'chromium', 'headless_shell')
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+_MB = 1024 * 1024
+
+
+class MemoryLimitExceeded(RuntimeError):
+    """하드 한도 초과로 단계 중단"""
+
+
+# ── /proc 읽기 ─────────────────────────────────────────────────
+def _children_map() -> dict:
+    children = {}
+    for name in os.listdir('/proc'):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f'/proc/{name}/stat', 'rb') as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # comm에 공백·괄호가 있을 수 있으므로 마지막 ')' 뒤에서 필드 분리
+        fields = stat[stat.rfind(b')') + 2:].split()
+        children.setdefault(int(fields[1]), []).append(int(name))
+    return children
+
+
+def _descendants(pid: int) -> list:
+    children = _children_map()
+    found, stack = [], list(children.get(pid, ()))
+    while stack:
+        p = stack.pop()
+        found.append(p)
+        stack.extend(children.get(p, ()))
+    return found
+
+
+def _rss(pid: int) -> int:
+    try:
+        with open(f'/proc/{pid}/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def process_tree_rss(pid: int = None):
+    """pid(기본: 현재 프로세스)와 모든 자손 프로세스의 RSS 합계 (bytes), /proc이 없으면 None"""
+    if not os.path.isdir('/proc'):
+        return None
+    pid = pid or os.getpid()
+    return _rss(pid) + sum(_rss(p) for p in _descendants(pid))
+
+
+def current_rss_mb(include_children: bool = True):
+    """현재 프로세스(include_children=True면 자손 포함) RSS (MB), /proc이 없으면 None"""
+    if include_children:
+        rss = process_tree_rss()
+    else:
+        rss = _rss(os.getpid()) if os.path.isdir('/proc') else None
+    return None if rss is None else round(rss / _MB, 1)
+
+
+def kill_browser_processes() -> int:
+    """현재 프로세스 아래의 Chromium 프로세스를 강제 종료 (브라우저 풀이 다음 작업에서 재시작)"""
+    if not os.path.isdir('/proc'):
+        return 0
+    killed = 0
+    for pid in _descendants(os.getpid()):
+        try:
+            with open(f'/proc/{pid}/comm') as f:
+                comm = f.read().strip().lower()
+        except OSError:
+            continue
+        if any(name in comm for name in _BROWSER_COMM):
+            try:
+                os.kill(pid, signal.SIGKILL)
+                killed += 1
+            except OSError:
+                pass
+    return killed
+
+
+def downgrade_profile(profile: str):
+    """소프트 한도를 넘었으면 낮춘 프로파일, 아니면 None"""
+    rss = current_rss_mb()
+    if rss is None or rss < SOFT_LIMIT_MB:
+        return None
+    return PROFILE_DOWNGRADE.get(profile)
+
+
+# ── 단계 감시 ───────────────────────────────────────────────────
+class StageWatch:
+    """
+    with watch_stage('capture', record) as w: ...
+    - 블록 실행 중 SAMPLE_INTERVAL마다 RSS 샘플링
+    - 하드 한도 첫 초과 시 on_hard() 1회 호출, 이후 check()는 MemoryLimitExceeded
+    - 종료 시 record[stage]에 요약 기록
+    - include_children=False: 현재 프로세스만 측정 (같은 서버의 수집 워커·Chromium 제외)
+    """
+
+    def __init__(self, stage: str, record: dict = None, on_hard=None,
+                 soft_mb: int = SOFT_LIMIT_MB, hard_mb: int = HARD_LIMIT_MB, include_children: bool = True):
+        self.stage = stage
+        self.include_children = include_children
+        self.record = record
+        self.on_hard = on_hard
+        self.soft_mb = soft_mb
+        self.hard_mb = hard_mb
+        self.start_mb = None
+        self.peak_mb = None
+        self.end_mb = None
+        self.soft_exceeded = False
+        self.hard_exceeded = False
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        rss = current_rss_mb(self.include_children)
+        if rss is None:
+            return
+        self.peak_mb = rss if self.peak_mb is None else max(self.peak_mb, rss)
+        if rss >= self.soft_mb:
+            self.soft_exceeded = True
+        if rss >= self.hard_mb and not self.hard_exceeded:
+            self.hard_exceeded = True
+            if self.on_hard is not None:
+                try:
+                    self.on_hard()
+                except Exception:
+                    pass
+
+    def _run(self):
+        while not self._stop.wait(SAMPLE_INTERVAL):
+            self._sample()
+
+    def __enter__(self) -> 'StageWatch':
+        self._sample()
+        self.start_mb = self.peak_mb
+        if self.start_mb is not None:
+            self._thread = threading.Thread(target=self._run, name=f'memwatch-{self.stage}', daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._sample()
+        self.end_mb = current_rss_mb(self.include_children)
+        if self.record is not None:
+            self.record[self.stage] = self.summary()
+        return False
+
+    def check(self):
+        """하드 한도를 넘었으면 MemoryLimitExceeded (긴 작업 중간에 호출)"""
+        if self.hard_exceeded:
+            raise MemoryLimitExceeded(
+                f'{self.stage}: 메모리 하드 한도 초과 (최고 {self.peak_mb:.0f}MB ≥ {self.hard_mb}MB)')
+
+    def summary(self) -> dict:
+        return {
+            'start_rss_mb': self.start_mb,
+            'peak_rss_mb': self.peak_mb,
+            'end_rss_mb': self.end_mb,
+            'soft_exceeded': self.soft_exceeded,
+            'hard_exceeded': self.hard_exceeded,
+        }
+
+
+def watch_stage(stage: str, record: dict = None, on_hard=None, include_children: bool = True) -> StageWatch:
+    return StageWatch(stage, record, on_hard, include_children=include_children)
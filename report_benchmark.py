@@ -0,0 +1,282 @@
+"""
+신고서 PDF 생성(report_generator.generate_report) 벤치마크
+- 합성 report_data: 스크린샷 1~50장(해상도별), 짧은/긴 content·violation_reason
+- CJK 폰트로만 측정 — 신고서 양식 문구 자체가 한글이라 폰트 없이는(기본 폰트) 첫 페이지에서
+  생성이 실패하므로 폰트 없음 축은 두지 않음 (결과 meta.note에도 기록)
+- 시나리오마다 새 프로세스(spawn)에서 실행 → 최고 RSS가 이전 시나리오 영향을 받지 않음
+- 측정: 소요 시간(반복 p50 등), 최고 RSS·증가분, Python 힙 최고치(tracemalloc, 별도 1회),
+  PDF 크기·페이지 수, 단계별 소요 시간(data['timings'])
+- JSON 출력, --baseline 결과와 비교해 회귀 표시
+
+사용 예:
+    python report_benchmark.py --output report-bench.json
+    python report_benchmark.py --counts 1,50 --resolutions large --baseline report-bench.json
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+# 해상도 이름 → (가로, 세로) — screenshot은 수집 스크린샷(clip 1280x1800)과 같은 크기
+RESOLUTIONS = {
+    'small': (800, 600),
+    'screenshot': (1280, 1800),
+    'large': (2560, 3600),
+}
+MIXED = 'mixed'     # small → screenshot → large 순환
+
+TEXT_LENGTHS = {'short': 1, 'long': 40}     # 문단 반복 수
+
+FONT_CANDIDATES = [
+    '/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc',
+    '/usr/share/fonts/truetype/noto/NotoSansCJK-Regular.ttf',
+    '/System/Library/Fonts/Supplemental/AppleGothic.ttf',
+    '/Library/Fonts/NanumGothic.ttf',
+]
+
+COMPARE_METRICS = {
+    'wall_ms.p50': 'lower',
+    'wall_ms.p95': 'lower',
+    'peak_rss_mb': 'lower',
+    'rss_growth_mb': 'lower',
+    'py_heap_peak_mb': 'lower',
+    'pdf_bytes': 'lower',
+}
+
+_SENTENCE = ('게시물 본문에 경제적 이해관계가 표시되지 않았고, 제품 링크와 할인 코드가 함께 게시되어 '
+             '소비자가 광고임을 알기 어렵습니다. ')
+
+
+# ── 합성 입력 ───────────────────────────────────────────────────
+def make_screenshot(path: str, size: tuple, seed: int):
+    """스크린샷처럼 보이는 PNG (배경 그라디언트 + UI 블록 + 사진 영역) — seed마다 다른 이미지"""
+    from PIL import Image, ImageDraw
+
+    rnd = random.Random(seed)
+    w, h = size
+    img = Image.linear_gradient('L').resize((w, h)).convert('RGB')
+    img = Image.blend(img, Image.new('RGB', (w, h), (rnd.randint(200, 255), 245, 240)), 0.85)
+    draw = ImageDraw.Draw(img)
+    for _ in range(30):
+        x, y = rnd.randrange(w), rnd.randrange(h)
+        draw.rectangle((x, y, x + rnd.randint(40, w // 3), y + rnd.randint(10, h // 20)),
+                       fill=(rnd.randrange(256), rnd.randrange(256), rnd.randrange(256)))
+    for row in range(0, h, max(24, h // 60)):
+        draw.line((w // 10, row, w - w // 10, row), fill=(90, 90, 90), width=2)
+    # 사진 영역: 저해상도 노이즈를 확대 (압축이 잘 안 되는 부분)
+    photo = Image.effect_noise((max(1, w // 8), max(1, h // 16)), 60).convert('RGB')
+    img.paste(photo.resize((w * 2 // 3, h // 4), Image.BILINEAR), (w // 6, h // 3))
+    img.save(path, 'PNG')
+
+
+def prepare_screenshots(work_dir: str, resolutions: list, max_count: int) -> dict:
+    """해상도별 서로 다른 스크린샷 max_count장 (fpdf2가 같은 이미지를 한 번만 넣지 않도록 모두 다르게)"""
+    names = set()
+    for name in resolutions:
+        names.update(RESOLUTIONS if name == MIXED else [name])
+    files = {}
+    for name in sorted(names):
+        files[name] = []
+        for i in range(max_count):
+            path = os.path.join(work_dir, f'shot_{name}_{i:02d}.png')
+            if not os.path.exists(path):
+                make_screenshot(path, RESOLUTIONS[name], seed=list(RESOLUTIONS).index(name) * 1000 + i)
+            files[name].append(path)
+    if MIXED in resolutions:
+        order = list(RESOLUTIONS)
+        files[MIXED] = [files[order[i % len(order)]][i] for i in range(max_count)]
+    return files
+
+
+def make_report_data(screenshots: list, text: str) -> dict:
+    """generate_report 입력 (app.py가 만드는 구조와 동일)"""
+    repeat = TEXT_LENGTHS[text]
+    return {
+        'reporter': {
+            'name': '홍길동', 'birth_date': '1990-01-01', 'address': '서울특별시 강남구 테헤란로 123',
+            'phone': '02-123-4567', 'mobile': '010-1234-5678', 'fax': '', 'email': 'hong@example.com',
+            'relationship': '소비자',
+        },
+        'respondent': {
+            'business_name': '○○컴퍼니', 'representative': '김○○',
+            'address_phone': '서울특별시 서초구 반포대로 45 / 02-987-6543', 'department': '마케팅팀',
+        },
+        'report_content': {
+            'media': '인스타그램',
+            'date': '2024-02-19',
+            'content': ('인플루언서 게시물에서 제품을 소개했습니다. ' + _SENTENCE) * repeat,
+            'violation_reason': ('경제적 이해관계 미표시. ' + _SENTENCE) * repeat,
+        },
+        'checklist': {
+            'false_exaggerated': False, 'deceptive': True, 'unfair_comparison': False, 'defamatory': False,
+            'missing_info': True, 'association_restriction': False, 'other': False,
+        },
+        'attachment_desc': '게시물 스크린샷',
+        'identity_disclosure': '비공개',
+        'evidence': {
+            'url': 'https://www.instagram.com/p/BENCH/',
+            'captured_at': '2024-02-19 12:00:00',
+            'screenshot_path': screenshots[0] if screenshots else None,
+            'extra_screenshots': screenshots[1:],
+            'additional_notes': _SENTENCE * repeat,
+        },
+    }
+
+
+# ── 시나리오 실행 (자식 프로세스) ───────────────────────────────
+def _measure(scenario: dict, screenshots: list, out_dir: str, repeat: int) -> dict:
+    """자식 프로세스 본체 — 폰트 환경변수를 먼저 정한 뒤 report_generator import"""
+    os.environ['AD_REPORT_FONT_PATH'] = scenario['font_path']
+    import tracemalloc
+    from memory_watchdog import StageWatch, current_rss_mb
+    from report_generator import generate_report
+    from stage_timing import summarize
+
+    out = {'wall_ms': None, 'error': None}
+    pdf_path = os.path.join(out_dir, f'{scenario["name"]}.pdf')
+    walls, data = [], None
+    start_rss = current_rss_mb()
+    with StageWatch('report', soft_mb=10 ** 9, hard_mb=10 ** 9) as watch:
+        for _ in range(repeat):
+            data = make_report_data(screenshots, scenario['text'])
+            started = time.perf_counter()
+            try:
+                generate_report(data, pdf_path)
+            except Exception as e:
+                out['error'] = f'{type(e).__name__}: {e}'
+                break
+            walls.append((time.perf_counter() - started) * 1000)
+    out['wall_ms'] = summarize(walls)
+    out['peak_rss_mb'] = watch.peak_mb
+    out['rss_growth_mb'] = None if watch.peak_mb is None or start_rss is None else round(watch.peak_mb - start_rss, 1)
+    if data is not None:
+        out['stages_ms'] = {span['stage']: span['duration_ms'] for span in (data.get('timings') or {}).get('spans', [])
+                            if span['stage'] != 'image_embed'}
+        embeds = [span['duration_ms'] for span in (data.get('timings') or {}).get('spans', [])
+                  if span['stage'] == 'image_embed']
+        out['image_embed_ms'] = summarize(embeds)
+    if out['error'] is None:
+        out['pdf_bytes'] = os.path.getsize(pdf_path)
+        out['pages'] = _count_pages(pdf_path)
+        # Python 힙 최고치는 추적 비용이 커서 소요 시간 측정과 분리해 1회만
+        tracemalloc.start()
+        generate_report(make_report_data(screenshots, scenario['text']), pdf_path)
+        out['py_heap_peak_mb'] = round(tracemalloc.get_traced_memory()[1] / 1048576, 1)
+        tracemalloc.stop()
+    return out
+
+
+def _count_pages(pdf_path: str):
+    import re
+    with open(pdf_path, 'rb') as f:
+        return len(re.findall(rb'/Type\s*/Page(?![a-z])', f.read())) or None
+
+
+def _child(conn, scenario, screenshots, out_dir, repeat):
+    try:
+        conn.send(_measure(scenario, screenshots, out_dir, repeat))
+    except Exception as e:
+        conn.send({'error': f'{type(e).__name__}: {e}'})
+    finally:
+        conn.close()
+
+
+def run_scenario(scenario: dict, screenshots: list, out_dir: str, repeat: int, timeout: float) -> dict:
+    import multiprocessing
+
+    ctx = multiprocessing.get_context('spawn')
+    parent_conn, child_conn = ctx.Pipe(duplex=False)
+    proc = ctx.Process(target=_child, args=(child_conn, scenario, screenshots, out_dir, repeat), daemon=True)
+    proc.start()
+    child_conn.close()
+    if parent_conn.poll(timeout):
+        measured = parent_conn.recv()
+    else:
+        proc.kill()
+        measured = {'error': f'시간 초과 ({timeout:.0f}초)'}
+    proc.join(5)
+    if proc.exitcode not in (0, None) and 'wall_ms' not in measured:
+        measured.setdefault('error', f'프로세스 비정상 종료 (exit code {proc.exitcode})')
+    return dict({k: v for k, v in scenario.items() if k != 'font_path'}, **measured)
+
+
+def build_scenarios(counts: list, resolutions: list, texts: list, font_path: str) -> list:
+    scenarios = []
+    for text in texts:
+        for resolution in resolutions:
+            for count in counts:
+                scenarios.append({
+                    'name': f'n{count}-{resolution}-{text}',
+                    'screenshots': count,
+                    'resolution': resolution,
+                    'text': text,
+                    'font_path': font_path,
+                })
+    return scenarios
+
+
+def _split(value: str) -> list:
+    return [v.strip() for v in value.split(',') if v.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='신고서 PDF 생성 벤치마크')
+    parser.add_argument('--counts', default='1,10,50', help='스크린샷 장수, 쉼표 구분 (1~50)')
+    parser.add_argument('--resolutions', default='screenshot,large',
+                        help=f'쉼표 구분: {", ".join(RESOLUTIONS)}, {MIXED}')
+    parser.add_argument('--texts', default='short,long', help='쉼표 구분: short, long')
+    parser.add_argument('--font-path', help='CJK 폰트 경로 (기본: 시스템 경로에서 탐색)')
+    parser.add_argument('--repeat', type=int, default=3, help='시나리오당 반복 횟수 (소요 시간 백분위)')
+    parser.add_argument('--timeout', type=float, default=600, help='시나리오당 제한 시간 (초)')
+    parser.add_argument('--work-dir', help='합성 스크린샷·PDF 저장 위치 (기본: 임시 디렉터리, 재사용 가능)')
+    parser.add_argument('--output', '-o', help='결과 JSON 경로 (기본: stdout)')
+    parser.add_argument('--baseline', help='비교할 이전 결과 JSON')
+    parser.add_argument('--threshold', type=float, default=0.2, help='회귀로 볼 변화 비율 (기본 0.2 = 20%%)')
+    parser.add_argument('--fail-on-regression', action='store_true', help='회귀가 있으면 종료 코드 1')
+    args = parser.parse_args()
+
+    counts = sorted({int(c) for c in _split(args.counts)})
+    if not counts or counts[0] < 1 or counts[-1] > 50:
+        parser.error('--counts는 1~50')
+    resolutions, texts = _split(args.resolutions), _split(args.texts)
+    for values, allowed, flag in ((resolutions, list(RESOLUTIONS) + [MIXED], '--resolutions'),
+                                  (texts, list(TEXT_LENGTHS), '--texts')):
+        unknown = [v for v in values if v not in allowed]
+        if unknown:
+            parser.error(f'{flag}: 알 수 없는 값 {", ".join(unknown)}')
+
+    from benchmark_common import run_info, write_results, compare_to_baseline, format_comparison, load_baseline
+
+    font_path = args.font_path or next((p for p in FONT_CANDIDATES if os.path.exists(p)), None)
+    if not font_path:
+        parser.error('CJK 폰트를 찾지 못했습니다 (--font-path로 지정) — 신고서 양식이 한글이라 폰트 없이는 생성할 수 없음')
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix='report-bench-')
+    os.makedirs(work_dir, exist_ok=True)
+    screenshots = prepare_screenshots(work_dir, resolutions, counts[-1])
+
+    results = {'meta': run_info(dict(vars(args), font_path=font_path, work_dir=work_dir)), 'scenarios': []}
+    results['meta']['note'] = ('폰트 없음 축은 측정하지 않음: 신고서 양식 문구가 한글이라 '
+                               'CJK 폰트 없이는 첫 페이지에서 생성이 실패함')
+    for scenario in build_scenarios(counts, resolutions, texts, font_path):
+        result = run_scenario(scenario, screenshots[scenario['resolution']][:scenario['screenshots']],
+                              work_dir, max(1, args.repeat), args.timeout)
+        results['scenarios'].append(result)
+        wall = (result.get('wall_ms') or {}).get('p50')
+        print(f'{result["name"]:<28} p50 {wall}ms  RSS {result.get("peak_rss_mb")}MB  '
+              f'PDF {result.get("pdf_bytes")}B  {result.get("error") or ""}'.rstrip(), file=sys.stderr)
+
+    regressions = []
+    if args.baseline:
+        rows = compare_to_baseline(results, load_baseline(args.baseline), COMPARE_METRICS, args.threshold)
+        results['comparison'] = {'baseline': args.baseline, 'threshold': args.threshold, 'rows': rows}
+        regressions = [r for r in rows if r['regression']]
+        print(format_comparison(rows), file=sys.stderr)
+    write_results(results, args.output)
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
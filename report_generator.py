@@ -5,6 +5,7 @@
 """
 from fpdf import FPDF
 import os
+import time
 from datetime import datetime
 import tempfile
 from typing import Dict, List, Optional
@@ -22,6 +23,11 @@ class KoreanPDF(FPDF):
     
     def _find_korean_font(self) -> Optional[str]:
         """시스템에서 한국어 폰트 찾기"""
+        # AD_REPORT_FONT_PATH로 직접 지정 가능 (report_benchmark --font-path)
+        override = os.environ.get('AD_REPORT_FONT_PATH')
+        if override:
+            return override
+
         # Streamlit Cloud 경로
         noto_paths = [
             '/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc',
@@ -118,22 +124,40 @@ def generate_report(data: dict, save_path: str) -> str:
         }
     }
     """
-    pdf = KoreanPDF()
-    
-    # 페이지 1: 메인 신고서
-    _generate_main_report_page(pdf, data)
-    
-    # 페이지 2: 첨부1 - 사전점검표
-    _generate_checklist_page(pdf, data)
-    
-    # 페이지 3: 첨부2 - 추가 작성 양식
-    _generate_additional_page(pdf, data)
-    
-    # 페이지 4+: 증거 스크린샷
-    _add_evidence_pages(pdf, data)
-    
-    # PDF 저장
-    pdf.output(save_path)
+    from memory_watchdog import watch_stage
+    from stage_timing import Timeline
+
+    # 단계별 소요 시간은 data['timings'] (히스토그램에는 'report.*'), 실패해도 기록
+    timeline = Timeline('report')
+    try:
+        # 최고 RSS를 data['memory']['generate_report']에 기록, 하드 한도면 이미지 삽입 전에 중단
+        # 서버 프로세스 자체만 측정 — 동시에 돌고 있는 수집 워커·Chromium 메모리로 중단되지 않도록
+        with watch_stage('generate_report', data.setdefault('memory', {}), include_children=False) as watch:
+            with timeline.span('font_load'):
+                pdf = KoreanPDF()
+
+            # 페이지 1: 메인 신고서
+            with timeline.span('page_main'):
+                _generate_main_report_page(pdf, data)
+
+            # 페이지 2: 첨부1 - 사전점검표
+            with timeline.span('page_checklist'):
+                _generate_checklist_page(pdf, data)
+
+            # 페이지 3: 첨부2 - 추가 작성 양식
+            with timeline.span('page_additional'):
+                _generate_additional_page(pdf, data)
+
+            # 페이지 4+: 증거 스크린샷
+            with timeline.span('evidence_pages'):
+                _add_evidence_pages(pdf, data, watch, timeline)
+
+            # PDF 저장
+            watch.check()
+            with timeline.span('pdf_output'):
+                pdf.output(save_path)
+    finally:
+        data['timings'] = timeline.finish()
     return save_path
 
 
@@ -429,8 +453,12 @@ def _get_evidence_list(data: dict) -> str:
     return '\n'.join(items)
 
 
-def _add_evidence_pages(pdf: KoreanPDF, data: dict):
-    """페이지 4+: 증거 스크린샷 이미지"""
+def _add_evidence_pages(pdf: KoreanPDF, data: dict, watch=None, timeline=None):
+    """
+    페이지 4+: 증거 스크린샷 이미지
+    - watch: 메모리 감시 — 이미지마다 하드 한도 확인
+    - timeline: 이미지마다 image_embed 구간 기록
+    """
     evidence = data.get('evidence', {})
     all_screenshots = []
     
@@ -445,6 +473,8 @@ def _add_evidence_pages(pdf: KoreanPDF, data: dict):
     
     # 각 스크린샷을 페이지로 추가
     for i, screenshot_path in enumerate(all_screenshots):
+        if watch is not None:
+            watch.check()
         pdf.add_page()
         
         # 페이지 제목
@@ -455,7 +485,10 @@ def _add_evidence_pages(pdf: KoreanPDF, data: dict):
             # 페이지 크기에 맞게 조정
             img_width = 170
             img_height = 200  # 적절한 높이
+            embed_started = time.perf_counter()
             pdf.image(screenshot_path, x=20, y=40, w=img_width, h=img_height)
+            if timeline is not None:
+                timeline.add('image_embed', embed_started, index=i + 1)
             
             # 캡처 시간 표시
             captured_at = evidence.get('captured_at', '')
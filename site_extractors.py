@@ -0,0 +1,175 @@
+"""
+플랫폼별 경량 추출기 모듈
+- 도메인별 추출기 레지스트리 (일치하는 추출기가 없으면 일반 경로 사용)
+- URL을 가장 가벼운 형태로 변환 (예: 네이버 블로그 → m.blog.naver.com)
+- 정적 HTML의 내장 JSON / 본문 컨테이너에서 바로 텍스트 추출
+- 브라우저 경로에서 본문이 들어 있는 iframe 이름 제공
+"""
+import re
+import json
+from typing import Optional
+from urllib.parse import urlparse, parse_qs
+
+_EXTRACTORS = []
+
+
+def register_extractor(cls):
+    """클래스 데코레이터 — 추출기 인스턴스를 레지스트리에 등록"""
+    _EXTRACTORS.append(cls())
+    return cls
+
+
+def find_extractor(url: str) -> Optional['SiteExtractor']:
+    """URL 도메인(접미사 일치)에 맞는 추출기, 없으면 None"""
+    host = (urlparse(url).hostname or '').lower()
+    for extractor in _EXTRACTORS:
+        for domain in extractor.domains:
+            if host == domain or host.endswith('.' + domain):
+                return extractor
+    return None
+
+
+class SiteExtractor:
+    """추출기 기본형 — 필요한 부분만 재정의"""
+    name = 'generic'
+    domains = ()
+    frame_name = None          # 브라우저 경로에서 본문이 있는 iframe 이름
+    min_text_chars = None      # 정적 경로 최소 본문 길이 (None이면 기본값)
+
+    def light_url(self, url: str) -> str:
+        """같은 콘텐츠를 가장 가볍게 받을 수 있는 URL"""
+        return url
+
+    def extract(self, soup, html: str, url: str) -> Optional[dict]:
+        """
+        정적 HTML에서 payload 항목을 덮어쓸 dict 반환
+        (title / text / meta / links 중 일부). 실패 시 None.
+        soup은 script 태그가 아직 제거되지 않은 상태.
+        """
+        return None
+
+
+def _container_text(soup, selector: str) -> str:
+    el = soup.select_one(selector)
+    return el.get_text('\n', strip=True) if el else ''
+
+
+# ── 네이버 블로그 ───────────────────────────────────────────────
+@register_extractor
+class NaverBlogExtractor(SiteExtractor):
+    """
+    PC 블로그는 본문을 mainFrame iframe(PostView)에 넣으므로
+    모바일 페이지(서버 렌더링, iframe 없음)로 바로 접근
+    """
+    name = 'naver_blog'
+    domains = ('blog.naver.com',)
+    frame_name = 'mainFrame'
+
+    _PATH_RE = re.compile(r'^/([A-Za-z0-9_-]+)/(\d+)')
+
+    def light_url(self, url: str) -> str:
+        parsed = urlparse(url)
+        qs = parse_qs(parsed.query)
+        blog_id = (qs.get('blogId') or [None])[0]
+        log_no = (qs.get('logNo') or [None])[0]
+        if not (blog_id and log_no):
+            m = self._PATH_RE.match(parsed.path)
+            if not m:
+                return url
+            blog_id, log_no = m.groups()
+        return f'https://m.blog.naver.com/PostView.naver?blogId={blog_id}&logNo={log_no}'
+
+    def extract(self, soup, html: str, url: str) -> Optional[dict]:
+        text = _container_text(soup, '.se-main-container, #postViewArea, .post_ct, #viewTypeSelector')
+        if not text:
+            return None
+        title = _container_text(soup, '.se-title-text, .tit_h3, .pcol1')
+        return {'title': title, 'text': f'{title}\n{text}' if title else text}
+
+
+# ── YouTube ─────────────────────────────────────────────────────
+@register_extractor
+class YouTubeExtractor(SiteExtractor):
+    """
+    초기 HTML의 ytInitialPlayerResponse JSON에 제목·설명·유료광고 표시가 포함됨
+    """
+    name = 'youtube'
+    domains = ('youtube.com', 'youtu.be')
+    min_text_chars = 1
+
+    _PLAYER_RE = re.compile(r'ytInitialPlayerResponse\s*=\s*\{')
+    _URL_RE = re.compile(r'https?://[^\s<>"]+')
+
+    def light_url(self, url: str) -> str:
+        parsed = urlparse(url)
+        host = (parsed.hostname or '').lower()
+        video_id = None
+        if host.endswith('youtu.be'):
+            video_id = parsed.path.strip('/').split('/')[0]
+        elif parsed.path.startswith('/shorts/') or parsed.path.startswith('/live/'):
+            video_id = parsed.path.split('/')[2]
+        else:
+            video_id = (parse_qs(parsed.query).get('v') or [None])[0]
+        return f'https://www.youtube.com/watch?v={video_id}' if video_id else url
+
+    def _player_response(self, html: str) -> Optional[dict]:
+        m = self._PLAYER_RE.search(html)
+        if not m:
+            return None
+        try:
+            data, _ = json.JSONDecoder().raw_decode(html, m.end() - 1)
+            return data
+        except ValueError:
+            return None
+
+    def extract(self, soup, html: str, url: str) -> Optional[dict]:
+        player = self._player_response(html)
+        details = (player or {}).get('videoDetails')
+        if not details:
+            return None
+        title = details.get('title', '')
+        description = details.get('shortDescription', '')
+        lines = [title]
+        # 크리에이터가 "유료 광고 포함"을 설정한 경우 플레이어 응답에 오버레이가 포함됨
+        if player.get('paidContentOverlay'):
+            lines.append('유료 광고 포함')
+        lines.append(description)
+        return {
+            'title': title,
+            'text': '\n'.join(l for l in lines if l),
+            'meta': {'author': details.get('author', ''), 'description': description[:300]},
+            'links': [{'href': u, 'text': ''} for u in self._URL_RE.findall(description)[:100]],
+        }
+
+
+# ── Instagram ───────────────────────────────────────────────────
+@register_extractor
+class InstagramExtractor(SiteExtractor):
+    """
+    비로그인 HTML에는 본문 DOM이 없지만 og:description에 캡션이 들어 있음
+    ('좋아요 N개, 댓글 M개 - 계정명: "캡션"')
+    """
+    name = 'instagram'
+    domains = ('instagram.com',)
+    min_text_chars = 1
+
+    _POST_RE = re.compile(r'^/(?:[A-Za-z0-9_.]+/)?(p|reel|tv)/([A-Za-z0-9_-]+)')
+
+    def light_url(self, url: str) -> str:
+        m = self._POST_RE.match(urlparse(url).path)
+        if not m:
+            return url
+        kind, code = m.groups()
+        # igsh 등 추적 파라미터 제거
+        return f'https://www.instagram.com/{kind}/{code}/'
+
+    def extract(self, soup, html: str, url: str) -> Optional[dict]:
+        def og(prop):
+            tag = soup.find('meta', attrs={'property': prop})
+            return (tag.get('content') or '') if tag else ''
+
+        caption = og('og:description')
+        if not caption:
+            return None
+        title = og('og:title')
+        return {'title': title, 'text': f'{title}\n{caption}' if title else caption}
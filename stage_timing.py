@@ -0,0 +1,140 @@
+"""
+단계별 소요 시간 측정 모듈
+- Timeline: 작업 1건(수집·신고서 생성)의 단계 구간(span) 기록 → metadata_*.json의 timings
+- 구간이 끝날 때마다 프로세스 전역 히스토그램에 반영 (단계별 최근 WINDOW건 기준 p50/p95/p99)
+- 워커 프로세스에서 끝난 수집은 결과의 timings를 서버 프로세스 히스토그램에 다시 반영
+"""
+import os
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+WINDOW = int(os.environ.get('AD_REPORT_TIMING_WINDOW', '500'))     # 단계별 보관 표본 수
+PERCENTILES = (50, 95, 99)
+
+
+class StageHistogram:
+    """단계 이름별 최근 WINDOW건의 소요 시간(ms) — 백분위는 조회 시 계산"""
+
+    def __init__(self, window: int = WINDOW):
+        self.window = max(1, window)
+        self._lock = threading.Lock()
+        self._samples = {}
+        self._counts = {}
+
+    def record(self, stage: str, duration_ms: float):
+        with self._lock:
+            samples = self._samples.get(stage)
+            if samples is None:
+                samples = self._samples[stage] = deque(maxlen=self.window)
+            samples.append(duration_ms)
+            self._counts[stage] = self._counts.get(stage, 0) + 1
+
+    def record_timings(self, name: str, timings: dict):
+        """다른 프로세스에서 기록된 Timeline.to_dict() 결과를 반영"""
+        if not timings:
+            return
+        for span in timings.get('spans') or []:
+            self.record(f'{name}.{span["stage"]}', span['duration_ms'])
+        if timings.get('total_ms') is not None:
+            self.record(f'{name}.total', timings['total_ms'])
+
+    def percentiles(self, stage: str) -> dict:
+        with self._lock:
+            samples = list(self._samples.get(stage, ()))
+            total = self._counts.get(stage, 0)
+        return summarize(samples, total)
+
+    def snapshot(self) -> dict:
+        """{단계: {count, window, p50, p95, p99, max, mean}} (단계 이름순)"""
+        with self._lock:
+            items = [(stage, list(samples), self._counts[stage]) for stage, samples in self._samples.items()]
+        return {stage: summarize(samples, total) for stage, samples, total in sorted(items)}
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._counts.clear()
+
+
+def summarize(samples: list, total: int = None) -> dict:
+    """표본(ms) 요약 — count(전체 건수, 기본: 표본 수), window, p50/p95/p99(nearest-rank), max, mean"""
+    samples = sorted(samples)
+    summary = {'count': len(samples) if total is None else total, 'window': len(samples)}
+    if not samples:
+        return summary
+    for p in PERCENTILES:
+        rank = max(1, -(-p * len(samples) // 100))
+        summary[f'p{p}'] = round(samples[rank - 1], 1)
+    summary['max'] = round(samples[-1], 1)
+    summary['mean'] = round(sum(samples) / len(samples), 1)
+    return summary
+
+
+_histogram = None
+_histogram_lock = threading.Lock()
+
+
+def get_stage_histogram() -> StageHistogram:
+    """프로세스 전역 단계별 소요 시간 히스토그램"""
+    global _histogram
+    with _histogram_lock:
+        if _histogram is None:
+            _histogram = StageHistogram()
+        return _histogram
+
+
+def stage_percentiles() -> dict:
+    """get_stage_histogram().snapshot() 단축"""
+    return get_stage_histogram().snapshot()
+
+
+class Timeline:
+    """
+    작업 1건의 단계 구간 기록
+    - with timeline.span('goto'): ...   또는   timeline.add('launch', started)
+    - name이 있으면 구간마다 전역 히스토그램에 '{name}.{stage}'로 반영
+    - to_dict(): {'total_ms', 'spans': [{'stage', 'start_ms', 'duration_ms'}]} (start_ms는 작업 시작 기준)
+    """
+
+    def __init__(self, name: str = None):
+        self.name = name
+        self.spans = []
+        self.total_ms = None
+        self._t0 = time.perf_counter()
+
+    @staticmethod
+    def now() -> float:
+        return time.perf_counter()
+
+    def elapsed_ms(self) -> float:
+        return round((time.perf_counter() - self._t0) * 1000, 1)
+
+    def add(self, stage: str, started: float, ended: float = None, **attrs):
+        """started~ended(기본: 지금) 구간 기록 (perf_counter 기준 시각)"""
+        ended = time.perf_counter() if ended is None else ended
+        duration_ms = round((ended - started) * 1000, 1)
+        self.spans.append(dict(stage=stage, start_ms=round((started - self._t0) * 1000, 1),
+                               duration_ms=duration_ms, **attrs))
+        if self.name:
+            get_stage_histogram().record(f'{self.name}.{stage}', duration_ms)
+
+    @contextmanager
+    def span(self, stage: str, **attrs):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, started, **attrs)
+
+    def finish(self) -> dict:
+        """전체 소요 시간 확정 (히스토그램에는 '{name}.total')"""
+        self.total_ms = self.elapsed_ms()
+        if self.name:
+            get_stage_histogram().record(f'{self.name}.total', self.total_ms)
+        return self.to_dict()
+
+    def to_dict(self) -> dict:
+        total = self.total_ms if self.total_ms is not None else self.elapsed_ms()
+        return {'total_ms': total, 'spans': list(self.spans)}